@@ -1,26 +1,11 @@
-import ac
-import acsys
-
-import os
-import sys
-import platform
 import math
 
-# Import Assetto Corsa shared memory library.
-# It has a dependency on ctypes, which is not included in AC python version.
-# Point to correct ctypes module based on platform architecture.
-# First, get directory of the app, then add correct folder to sys.path.
-app_dir = os.path.dirname(__file__)
+from stdlib_path import add_stdlib_path
+add_stdlib_path()
 
-if platform.architecture()[0] == "64bit":
-    sysdir = os.path.join(app_dir, 'dll', 'stdlib64')
-else:
-    sysdir = os.path.join(app_dir, 'dll', 'stdlib')
-# Python looks in sys.path for modules to load, insert new dir first in line.
-sys.path.insert(0, sysdir)
-os.environ['PATH'] = os.environ['PATH'] + ";."
+from lib.sim_info import AC_OFF, AC_REPLAY, AC_PAUSE
 
-from lib.sim_info import info
+KMH_TO_MPH = 0.621371
 
 
 class ACGlobalData:
@@ -28,35 +13,75 @@ class ACGlobalData:
     
     Args:
         cfg (obj:Config): App configuration.
+        source (obj:ACSource): Telemetry source, see telemetry_source.
     """
-    def __init__(self, cfg):
-        # Config object
+    def __init__(self, cfg, source):
+        # Config object and telemetry source
         self.cfg = cfg
+        self.source = source
+        self.pages = source.pages
 
         # Data attributes
         self.focused_car = 0
+        self.num_cars = 1
         self.replay_time_multiplier = 1
+        self.status = AC_OFF
+        self.lap_position = 0
+        self.completed_laps = 0
+        self.last_time = 0
+        self.best_time = 0
 
     def update(self):
         """Update data."""
-        self.focused_car = ac.getFocusedCar()
-        self.replay_time_multiplier = info.graphics.replayTimeMultiplier
+        self.focused_car = self.source.focused_car()
+        self.num_cars = self.pages.static.numCars
+        self.replay_time_multiplier = self.pages.graphics.replayTimeMultiplier
+
+    def update_position(self):
+        """Update lap count, lap times and normalized position of the car on track."""
+        graphics = self.pages.graphics
+        self.lap_position = graphics.normalizedCarPosition
+        self.completed_laps = graphics.completedLaps
+        self.last_time = graphics.iLastTime
+        self.best_time = graphics.iBestTime
+
+    def update_status(self):
+        """Update sim status only, cheap enough to run every physics tick."""
+        self.status = self.pages.graphics.status
+
+    def sim_running(self):
+        """Return True if the sim is in a state where inputs change.
+
+        False when the sim is off, paused, or showing a paused replay.
+        """
+        if self.status == AC_OFF or self.status == AC_PAUSE:
+            return False
+        if self.status == AC_REPLAY:
+            self.replay_time_multiplier = self.pages.graphics.replayTimeMultiplier
+            return self.replay_time_multiplier != 0
+        return True
 
 
 class ACCarData:
     """Handling all data from AC that is car-specific.
+
+    Data is read as one snapshot from the telemetry source, e.g. the
+    shared memory physics page for the player car, or ac.getCarState.
     
     Args:
         cfg (obj:Config): App configuration.
+        source (obj:ACSource): Telemetry source, see telemetry_source.
         car_id (int, optional): Car ID number to retrieve data from.
             Defaults to own car.
     """
-    def __init__(self, cfg, car_id=0):
+    def __init__(self, cfg, source, car_id=0):
         self.cfg = cfg
+        self.source = source
         self.car_id = car_id
 
         # Initialize data attributes
         self.speed = 0
+        self.speed_kmh = 0
         self.throttle = 0
         self.brake = 0
         self.clutch = 0
@@ -75,21 +100,26 @@ class ACCarData:
         
         Args:
             car_id (int): Car ID number."""
+        if car_id != self.car_id:
+            self.source.reset()
         self.car_id = car_id
 
+    def calibrate_steering(self):
+        """Calibrate steering of the telemetry source, runs at low rate."""
+        self.source.calibrate(self.car_id)
+
     def update(self):
-        """Update data."""
-        self.throttle = ac.getCarState(self.car_id, acsys.CS.Gas)
-        self.brake = ac.getCarState(self.car_id, acsys.CS.Brake)
-        self.clutch = 1 - ac.getCarState(self.car_id, acsys.CS.Clutch)
-        self.ffb = ac.getCarState(self.car_id, acsys.CS.LastFF)
-        self.steering = ac.getCarState(self.car_id, acsys.CS.Steer) * math.pi / 180
-        self.gear = ac.getCarState(self.car_id, acsys.CS.Gear)
+        """Update data.
 
+        Returns:
+            bool: True if the data may have changed since the previous update.
+        """
+        if not self.source.read(self.car_id, self):
+            return False
         if self.cfg.use_kmh:
-            self.speed = ac.getCarState(self.car_id, acsys.CS.SpeedKMH)
+            self.speed = self.speed_kmh
         else:
-            self.speed = ac.getCarState(self.car_id, acsys.CS.SpeedMPH)
+            self.speed = self.speed_kmh * KMH_TO_MPH
 
         self.steering_normalized = 0.5 - (self.steering / (2 * self.steering_cap))
         if self.steering_normalized > 1:
@@ -103,4 +133,5 @@ class ACCarData:
         elif self.gear == 1:
             self.gear_text = "N"
         else:
-            self.gear_text = str(self.gear - 1)
\ No newline at end of file
+            self.gear_text = str(self.gear - 1)
+        return True
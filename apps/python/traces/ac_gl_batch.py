@@ -0,0 +1,177 @@
+import ac
+
+# Batched immediate mode drawing for Assetto Corsa.
+# Every glBegin/glEnd pair is a call into the game, which is the main
+# rendering cost of the app. Drawables fill a VertexBatch with a flat list
+# of vertex coordinates, which can then be emitted in a single
+# glBegin/glEnd block, optionally merged with batches of the same color.
+
+
+class GLStats:
+    """Counter of GL calls issued by the app.
+
+    Counts are accumulated for the current frame and moved to the
+    last_* attributes when a new frame starts.
+    """
+    def __init__(self):
+        self.frames = 0
+        self.begins = 0
+        self.vertices = 0
+        self.colors = 0
+        self.last_begins = 0
+        self.last_vertices = 0
+        self.last_colors = 0
+
+    def count(self, begins=0, vertices=0, colors=0):
+        """Add GL calls to the counters of the current frame."""
+        self.begins += begins
+        self.vertices += vertices
+        self.colors += colors
+
+    def new_frame(self):
+        """Close the counters of the current frame and start a new one."""
+        self.frames += 1
+        self.last_begins = self.begins
+        self.last_vertices = self.vertices
+        self.last_colors = self.colors
+        self.begins = 0
+        self.vertices = 0
+        self.colors = 0
+
+
+# App wide GL call counter
+gl_stats = GLStats()
+
+
+class VertexBatch:
+    """Flat vertex list of one GL primitive type and color.
+
+    Batches of scrolling drawables, such as traces, are moved
+    horizontally by a scroll offset when emitted, which is set per frame
+    without rebuilding the vertices. Vertices moved left of clip_x are
+    clamped to it, so the oldest part of a trace stops at the edge of its
+    graph instead of running into the padding.
+
+    Args:
+        mode (int): GL primitive type, e.g. acsys.GL.Quads.
+        color (tuple): r,g,b,a on a 0-1 scale.
+        vertices_per_primitive (int): Vertices per primitive, 4 for quads.
+    """
+    def __init__(self, mode, color, vertices_per_primitive=4):
+        self.mode = mode
+        self.color = color
+        self.vertices_per_primitive = vertices_per_primitive
+        # Flat sequence of coordinates, [x0, y0, x1, y1, ...]
+        self.vertices = []
+        self.scrolls = False
+        self.clip_x = None
+
+    def clear(self):
+        """Remove all vertices from the batch."""
+        self.vertices = []
+
+    def emit(self, offset_x=0):
+        """Draw all vertices of the batch in one glBegin/glEnd block.
+
+        Args:
+            offset_x (float): Horizontal offset added to all vertices.
+        """
+        vertices = self.vertices
+        if not vertices:
+            return
+        set_color(self.color)
+        ac.glBegin(self.mode)
+        it = iter(vertices)
+        if self.clip_x is not None:
+            # Clamp in unscrolled coordinates
+            clip_x = self.clip_x - offset_x
+            for x, y in zip(it, it):
+                ac.glVertex2f((x if x > clip_x else clip_x) + offset_x, y)
+        elif offset_x:
+            for x, y in zip(it, it):
+                ac.glVertex2f(x + offset_x, y)
+        else:
+            for x, y in zip(it, it):
+                ac.glVertex2f(x, y)
+        ac.glEnd()
+        gl_stats.count(begins=1, vertices=len(vertices) // 2)
+
+    def emit_primitives(self, offset_x=0):
+        """Draw the batch with a separate glBegin/glEnd block per primitive.
+
+        Args:
+            offset_x (float): Horizontal offset added to all vertices.
+        """
+        vertices = self.vertices
+        if not vertices:
+            return
+        set_color(self.color)
+        step = 2 * self.vertices_per_primitive
+        mode = self.mode
+        clip_x = self.clip_x - offset_x if self.clip_x is not None else None
+        for i in range(0, len(vertices), step):
+            ac.glBegin(mode)
+            it = iter(vertices[i:i + step])
+            for x, y in zip(it, it):
+                if clip_x is not None and x < clip_x:
+                    x = clip_x
+                ac.glVertex2f(x + offset_x, y)
+            ac.glEnd()
+        gl_stats.count(begins=len(vertices) // step, vertices=len(vertices) // 2)
+
+
+class BatchMerger:
+    """Merge batches sharing primitive type, color and scrolling into one draw call.
+
+    Merged batches are emitted in order of first appearance. The merged
+    vertex lists are kept until the next merge, so unchanged frames can
+    be drawn again without rebuilding them.
+    """
+    def __init__(self):
+        self.groups = {}
+        self.order = []
+
+    def merge(self, batches):
+        """Merge a sequence of batches into groups.
+
+        Args:
+            batches (iterable): VertexBatch objects in drawing order.
+        """
+        groups = self.groups
+        order = self.order
+        del order[:]
+        for group in groups.values():
+            del group.vertices[:]
+
+        for batch in batches:
+            if not batch.vertices:
+                continue
+            key = (batch.mode, batch.color, batch.scrolls, batch.clip_x)
+            group = groups.get(key)
+            if group is None:
+                group = VertexBatch(batch.mode, batch.color, batch.vertices_per_primitive)
+                group.scrolls = batch.scrolls
+                group.clip_x = batch.clip_x
+                groups[key] = group
+            if not group.vertices:
+                order.append(group)
+            group.vertices.extend(batch.vertices)
+
+    def emit(self, scroll_offset=0):
+        """Draw the merged groups.
+
+        Args:
+            scroll_offset (float): Horizontal offset of scrolling groups.
+        """
+        for group in self.order:
+            group.emit(scroll_offset if group.scrolls else 0)
+
+
+def set_color(rgba):
+    """Apply RGBA color for GL drawing.
+
+    Agrs:
+        rgba (tuple): r,g,b,a on a 0-1 scale.
+    """
+    ac.glColor4f(rgba[0], rgba[1], rgba[2], rgba[3])
+    gl_stats.count(colors=1)
@@ -0,0 +1,250 @@
+import math
+from array import array
+from collections import OrderedDict
+
+# Compact storage for the vector graphics of the app.
+# Vertex coordinates are kept in flat array('f') buffers laid out as
+# [x0, y0, x1, y1, ...], so that shapes and collections of shapes don't
+# need a Python object per vertex. All transformations work in place
+# on a range of vertices, which is either a single shape or a whole batch.
+
+
+def _xy(value):
+    """Split a Point or a number into an x,y pair.
+
+    Args:
+        value (obj:Point/float): Point obj for different x and y values,
+            or a float for the same value on both x and y.
+    """
+    if isinstance(value, (int, float)):
+        return value, value
+    return value.x, value.y
+
+
+class VertexArray:
+    """Flat buffer of 2D vertices.
+
+    Args:
+        size (int): Number of vertices to allocate, initialized to 0,0.
+            Optional, defaults to 0.
+        data (iterable): Flat sequence of x,y coordinates to fill the buffer with.
+            Optional, takes precedence over size.
+    """
+    def __init__(self, size=0, data=None):
+        if data is not None:
+            self.data = array('f', data)
+        else:
+            self.data = array('f', bytes(8 * size))
+
+    def __len__(self):
+        return len(self.data) // 2
+
+    def get(self, index):
+        """Return x,y tuple of vertex at index."""
+        i = 2 * index
+        return self.data[i], self.data[i + 1]
+
+    def set(self, index, x, y):
+        """Set x,y coordinates of vertex at index."""
+        i = 2 * index
+        self.data[i] = x
+        self.data[i + 1] = y
+
+    def append(self, x, y):
+        """Add a vertex to the end of the buffer."""
+        self.data.append(x)
+        self.data.append(y)
+
+    def extend(self, coords):
+        """Add a flat sequence of x,y coordinates to the end of the buffer."""
+        self.data.extend(coords)
+
+    def clear(self):
+        """Remove all vertices from the buffer."""
+        del self.data[:]
+
+    def copy(self):
+        """Return a copy of object."""
+        return VertexArray(data=self.data)
+
+    def _slices(self, start, count):
+        """Return slice objects selecting x and y coordinates of a vertex range."""
+        if count is None:
+            count = len(self) - start
+        begin = 2 * start
+        end = 2 * (start + count)
+        return slice(begin, end, 2), slice(begin + 1, end, 2)
+
+    def translate(self, dx, dy, start=0, count=None):
+        """Move a range of vertices.
+
+        Args:
+            dx (float): Offset along x axis.
+            dy (float): Offset along y axis.
+            start (int): Index of the first vertex to transform.
+            count (int): Number of vertices to transform.
+                Optional, defaults to all vertices from start onwards.
+        """
+        sx, sy = self._slices(start, count)
+        data = self.data
+        if dx:
+            data[sx] = array('f', [x + dx for x in data[sx]])
+        if dy:
+            data[sy] = array('f', [y + dy for y in data[sy]])
+
+    def scale(self, fx, fy, cor=0, start=0, count=None):
+        """Scale a range of vertices relative to a center point.
+
+        Args:
+            fx (float): Scale factor along x axis.
+            fy (float): Scale factor along y axis.
+            cor (obj:Point/float): Center of scaling (x,y).
+            start (int): Index of the first vertex to transform.
+            count (int): Number of vertices to transform.
+        """
+        cx, cy = _xy(cor)
+        sx, sy = self._slices(start, count)
+        data = self.data
+        data[sx] = array('f', [cx + (x - cx) * fx for x in data[sx]])
+        data[sy] = array('f', [cy + (y - cy) * fy for y in data[sy]])
+
+    def rotate_rad(self, angle, cor=0, start=0, count=None):
+        """Rotate a range of vertices in positive counterclockwise direction.
+
+        Args:
+            angle (float): Rotation in radians.
+            cor (obj:Point/float): Center of rotation (x,y).
+            start (int): Index of the first vertex to transform.
+            count (int): Number of vertices to transform.
+        """
+        self.rotate_cs(math.cos(angle), math.sin(angle), cor, start, count)
+
+    def rotate_deg(self, angle, cor=0, start=0, count=None):
+        """Rotate a range of vertices in positive counterclockwise direction.
+
+        Args:
+            angle (float): Rotation in degrees.
+            cor (obj:Point/float): Center of rotation (x,y).
+            start (int): Index of the first vertex to transform.
+            count (int): Number of vertices to transform.
+        """
+        self.rotate_rad(angle * math.pi / 180, cor, start, count)
+
+    def rotate_cs(self, c, s, cor=0, start=0, count=None, out=None):
+        """Rotate a range of vertices using precalculated trig functions.
+
+        Args:
+            c (float): Cosine of desired rotation angle.
+            s (float): Sine of desired rotation angle.
+            cor (obj:Point/float): Center of rotation (x,y).
+            start (int): Index of the first vertex to transform.
+            count (int): Number of vertices to transform.
+            out (obj:VertexArray): Buffer to write the rotated vertices to,
+                at the same indices. Optional, defaults to rotating in place.
+        """
+        cx, cy = _xy(cor)
+        sx, sy = self._slices(start, count)
+        xs = self.data[sx]
+        ys = self.data[sy]
+        if out is None:
+            out = self
+        # Rotate around origin (0,0) by subtracting the center of rotation,
+        # and add it back afterwards.
+        out.data[sx] = array('f', [cx + (x - cx) * c - (y - cy) * s
+                                   for x, y in zip(xs, ys)])
+        out.data[sy] = array('f', [cy + (x - cx) * s + (y - cy) * c
+                                   for x, y in zip(xs, ys)])
+
+
+class ShapeArray(VertexArray):
+    """Collection of equally sized shapes stored in one vertex buffer.
+
+    Args:
+        vertices_per_shape (int): Number of vertices per shape,
+            e.g. 4 for a collection of quads.
+        data (iterable): Flat sequence of x,y coordinates.
+            Optional, defaults to an empty collection.
+    """
+    def __init__(self, vertices_per_shape, data=None):
+        VertexArray.__init__(self, data=data if data is not None else ())
+        self.vertices_per_shape = vertices_per_shape
+
+    def shape_count(self):
+        """Return number of shapes in the collection."""
+        return len(self) // self.vertices_per_shape
+
+    def add_shape(self, shape):
+        """Append a copy of the vertices of a shape to the collection.
+
+        Args:
+            shape (obj:Line/Triangle/Quad): Shape with matching vertex count.
+                Only the vertex range of the shape is copied, shapes can be
+                views into a larger shared buffer.
+        """
+        if shape.vertex_count != self.vertices_per_shape:
+            raise ValueError("expected a shape of {} vertices, got {}".format(
+                self.vertices_per_shape, shape.vertex_count))
+        begin = 2 * shape.start
+        self.data.extend(shape.vertices.data[begin:begin + 2 * shape.vertex_count])
+
+    def remove_shapes(self, count):
+        """Remove shapes from the start of the collection.
+
+        Args:
+            count (int): Number of shapes to remove.
+        """
+        del self.data[:2 * self.vertices_per_shape * count]
+
+    def shape_range(self, index):
+        """Return start vertex and vertex count of shape at index."""
+        return index * self.vertices_per_shape, self.vertices_per_shape
+
+    def copy(self):
+        """Return a copy of object."""
+        return ShapeArray(self.vertices_per_shape, self.data)
+
+
+class RotationCache:
+    """Bounded cache of pre-rotated copies of a vertex buffer.
+
+    Rotation angles are quantized into buckets of fixed angular resolution.
+    The rotated vertices for a bucket are calculated on first request and
+    served from the cache afterwards. When the cache is full, the least
+    recently used bucket is dropped.
+
+    Args:
+        base (obj:VertexArray): Vertices at zero rotation.
+        cor (obj:Point/float): Center of rotation (x,y).
+        resolution (float): Angular size of a bucket in radians.
+        max_entries (int): Maximum number of cached rotations.
+    """
+    def __init__(self, base, cor, resolution, max_entries=1024):
+        self.base = base
+        self.cor = cor
+        self.resolution = resolution
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, angle):
+        """Return vertices rotated by angle, quantized to the cache resolution.
+
+        Args:
+            angle (float): Rotation in radians.
+        """
+        bucket = int(round(angle / self.resolution))
+        vertices = self.entries.get(bucket)
+        if vertices is None:
+            quantized = bucket * self.resolution
+            vertices = self.base.copy()
+            self.base.rotate_cs(math.cos(quantized), math.sin(quantized),
+                                self.cor, out=vertices)
+            self.entries[bucket] = vertices
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(bucket)
+        return vertices
+
+    def clear(self):
+        """Drop all cached rotations."""
+        self.entries.clear()
@@ -0,0 +1,140 @@
+import math
+
+# Thick polyline generation for Assetto Corsa.
+# A polyline of width 2 * half_thickness is built as a strip: two vertices
+# per point, offset to both sides along the miter of the adjoining segments.
+# AC's GL bindings offer no triangle strip primitive, so consecutive pairs
+# of strip vertices are emitted as quads, which can share a batch with the
+# other quads of the app.
+
+# Max ratio of miter length to half thickness, sharper joins are clipped
+MITER_LIMIT = 2.0
+
+
+def _quad(vertices, ax, ay, bx, by, cx, cy, dx, dy):
+    """Append quad to a flat vertex list, in the winding order of the app.
+
+    Quads in the app have a negative signed area in window coordinates,
+    other quads are drawn back to front, as those would be culled.
+    """
+    area = ((ax * by - bx * ay) + (bx * cy - cx * by)
+            + (cx * dy - dx * cy) + (dx * ay - ax * dy))
+    if area > 0:
+        vertices.extend((dx, dy, cx, cy, bx, by, ax, ay))
+    else:
+        vertices.extend((ax, ay, bx, by, cx, cy, dx, dy))
+
+
+def thick_polyline(xs, ys, half_thickness, vertices=None):
+    """Build a thick polyline through a sequence of points as quads.
+
+    Joins are mitered. Where the miter would exceed MITER_LIMIT or reach
+    past one of the adjoining segments, the join is clipped at
+    half_thickness beyond the point instead. Both ends get a square cap,
+    extending half_thickness beyond the end points. The whole polyline is
+    rebuilt in one call, producing 2 strip vertices per point, emitted as
+    4 quad vertices per segment, plus 2 quads per clipped join.
+
+    Args:
+        xs (sequence): x coordinates of the points.
+        ys (sequence): y coordinates of the points.
+        half_thickness (float): Half of the line width in pixels.
+        vertices (list): Flat vertex list to append to.
+            Optional, defaults to a new list.
+
+    Returns:
+        list: Flat vertex list, [x0, y0, x1, y1, ...], 4 vertices per quad.
+    """
+    if vertices is None:
+        vertices = []
+    ht = half_thickness
+    count = len(xs)
+    if not count:
+        return vertices
+    if count == 1:
+        x = xs[0]
+        y = ys[0]
+        vertices.extend((x - ht, y + ht,
+                         x + ht, y + ht,
+                         x + ht, y - ht,
+                         x - ht, y - ht))
+        return vertices
+
+    # Direction, normal and length of the first segment
+    x0 = xs[0]
+    y0 = ys[0]
+    dx = xs[1] - x0
+    dy = ys[1] - y0
+    length = math.sqrt(dx * dx + dy * dy) or 1e-9
+    ux = dx / length
+    uy = dy / length
+
+    # Strip vertices on both sides of the start, square cap
+    sx = x0 - ux * ht
+    sy = y0 - uy * ht
+    ax = sx - uy * ht
+    ay = sy + ux * ht
+    bx = sx + uy * ht
+    by = sy - ux * ht
+
+    limit_squared = 4 / (MITER_LIMIT * MITER_LIMIT)
+    for i in range(1, count - 1):
+        x = xs[i]
+        y = ys[i]
+        dx = xs[i + 1] - x
+        dy = ys[i + 1] - y
+        next_length = math.sqrt(dx * dx + dy * dy) or 1e-9
+        vx = dx / next_length
+        vy = dy / next_length
+
+        # Sum of the unit normals of both segments, along the miter.
+        # Normal of direction (ux, uy) is (-uy, ux).
+        mx = -uy - vy
+        my = ux + vx
+        m_squared = mx * mx + my * my
+        # Miter offset, and how far it reaches along the segments
+        scale = 2 * ht / m_squared if m_squared else 0
+        px = mx * scale
+        py = my * scale
+        reach = abs(px * ux + py * uy)
+        if m_squared >= limit_squared and reach <= length and reach <= next_length:
+            # Miter join
+            _quad(vertices, ax, ay, x + px, y + py, x - px, y - py, bx, by)
+            ax = x + px
+            ay = y + py
+            bx = x - px
+            by = y - py
+        else:
+            # Clipped join: end the segment square, and fill the outer gap
+            # up to half_thickness beyond the point along both segments.
+            ex = -uy * ht
+            ey = ux * ht
+            fx = -vy * ht
+            fy = vx * ht
+            _quad(vertices, ax, ay, x + ex, y + ey, x - ex, y - ey, bx, by)
+            if ux * vy - uy * vx > 0:
+                # Turning towards the positive normal, outer side is negative
+                side = -1
+            else:
+                side = 1
+            px = x + side * ex
+            py = y + side * ey
+            qx = x + side * fx
+            qy = y + side * fy
+            _quad(vertices, x, y, px, py, qx, qy, qx, qy)
+            _quad(vertices, px, py, px + ux * ht, py + uy * ht,
+                  qx - vx * ht, qy - vy * ht, qx, qy)
+            ax = x + fx
+            ay = y + fy
+            bx = x - fx
+            by = y - fy
+
+        ux = vx
+        uy = vy
+        length = next_length
+
+    # Square cap at the end
+    ex = xs[-1] + ux * ht
+    ey = ys[-1] + uy * ht
+    _quad(vertices, ax, ay, ex - uy * ht, ey + ux * ht, ex + uy * ht, ey - ux * ht, bx, by)
+    return vertices
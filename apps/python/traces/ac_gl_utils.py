@@ -1,7 +1,12 @@
 import math
 
+from ac_gl_geometry import VertexArray
+from ac_gl_geometry import _xy
+
 # The classes below are used as building blocks for the OpenGL rendering of vector graphics in Assetto Corsa. 
 # All classes are based on the two dimensional cartesian coordinate system.
+# Shape coordinates are stored in flat VertexArray buffers (see ac_gl_geometry),
+# the shape classes below are thin views over that storage.
 
 class Point:
     """A point in a 2D cartesian coordinate system.
@@ -14,6 +19,8 @@ class Point:
         y (float): y coordinate.
             optional, defaults to 0
     """
+    __slots__ = ("x", "y")
+
     def __init__(self, x=0, y=0):
         self.x = float(x)
         self.y = float(y)
@@ -26,12 +33,9 @@ class Point:
                 Can be Point obj to add different values to x and y,
                 or a float to add same value to both x and y.
         """
-        # Check if p is a Point object
-        # If true, add x,y of p to respective x,y of Point
-        # If false, add p to both x and y of Point
-        if not isinstance(p, Point): p = Point(p, p)
-        self.x += p.x
-        self.y += p.y
+        dx, dy = _xy(p)
+        self.x += dx
+        self.y += dy
 
     def subtract(self, p):
         """Subtract value from Point.
@@ -41,14 +45,11 @@ class Point:
                 Can be Point obj to subtract different values from x and y,
                 or a float to subtract same value from both x and y.
         """
-        # Check if p is a Point object
-        # If true, subtract x,y of p from respective x,y of Point
-        # If false, subtract p from both x and y of Point        
-        if not isinstance(p, Point): p = Point(p, p)
-        self.x -= p.x
-        self.y -= p.y
-
-    def multiply(self, val):
+        dx, dy = _xy(p)
+        self.x -= dx
+        self.y -= dy
+
+    def multiply(self, p):
         """Multiply Point by value.
         
         Args:
@@ -56,14 +57,11 @@ class Point:
                 Can be Point obj to multiply different values with x and y,
                 or a float to multiply same value with both x and y.
         """ 
-        # Check if p is a Point object
-        # If true, multiply x,y of p with respective x,y of Point
-        # If false, multiply p with both x and y of Point        
-        if not isinstance(p, Point): p = Point(p, p)
-        self.x *= p.x
-        self.y *= p.y
-
-    def divide(self, val):
+        fx, fy = _xy(p)
+        self.x *= fx
+        self.y *= fy
+
+    def divide(self, p):
         """Divide Point by value.
         
         Args:
@@ -71,12 +69,9 @@ class Point:
                 Can be Point obj to divide different values with x and y,
                 or a float to divide same value with both x and y.
         """
-        # Check if p is a Point object
-        # If true, multiply x,y of p with respective x,y of Point
-        # If false, multiply p with both x and y of Point        
-        if not isinstance(p, Point): p = Point(p, p)
-        self.x /= p.x
-        self.y /= p.y
+        fx, fy = _xy(p)
+        self.x /= fx
+        self.y /= fy
 
     def rotate_rad(self, angle, cor=0):
         """Rotate Point in positive counterclockwise direction.
@@ -126,124 +121,159 @@ class Point:
         # Separate calculation of rotation from trig functions
         # because sine and cosine don't change for same rotation angle
         # Wasteful to recalculate mutiple times when rotating e.g. a quad.
-        p = Point(self.x, self.y)
 
         # Subtract center of rotation coords from Point, 
         # to rotate Point around origin (0,0).
         # After rotation is done, add back center of rotation coords.
-        p.subtract(cor)
+        cx, cy = _xy(cor)
+        x = self.x - cx
+        y = self.y - cy
 
         # Positive Counterclockwise Rotation
-        self.x = p.x * c - p.y * s 
-        self.y = p.x * s + p.y * c
-        self.add(cor)
+        self.x = x * c - y * s + cx
+        self.y = x * s + y * c + cy
 
     def copy(self):
         """Return a copy of object."""
         return Point(self.x, self.y)
 
 
-class Line:
-    """A line in a 2D cartesian coordinate system.
-    
-    Each line is described by a set of two points.
+class Shape:
+    """Base class for shapes described by a fixed number of points.
+
+    The coordinates of all points of the shape are stored in one VertexArray.
+    Transformations are applied as one batched operation on that storage.
+    A shape can also be a view into a larger vertex buffer holding
+    a whole collection of shapes, see Shape.view.
 
     Args:
-        p1 (obj:Point): Start point of the line.
-        p2 (obj:Point): End point of the line.
+        *points (obj:Point): Points of the shape, coordinates are copied.
     """
-    def __init__(self, p1=Point(), p2=Point()):
-        self.points = [p1, p2]
+    vertex_count = 0
+
+    def __init__(self, *points):
+        coords = []
+        for point in points:
+            coords.append(point.x)
+            coords.append(point.y)
+        self.vertices = VertexArray(data=coords)
+        self.start = 0
+
+    @classmethod
+    def view(cls, vertices, start=0):
+        """Create shape viewing into existing vertex storage.
+
+        Args:
+            vertices (obj:VertexArray): Vertex storage to view into.
+            start (int): Index of the first vertex of the shape.
+        """
+        shape = cls.__new__(cls)
+        shape.vertices = vertices
+        shape.start = start
+        return shape
+
+    @property
+    def points(self):
+        """List of Points with the current coordinates of the shape.
+
+        The Points are copies, changing them does not change the shape.
+        """
+        return [Point(*self.vertices.get(self.start + i))
+                for i in range(self.vertex_count)]
 
     def add(self, p):
-        """Add value to all points in Line.
+        """Add value to all points in shape.
 
         Args:
-            p (obj:Point/float): Value to add to points in Line.
+            p (obj:Point/float): Value to add to points in shape.
                 Can be Point obj to add different values to x and y of points,
                 or a float to add same value to both x and y of points.
         """
-        for point in self.points:
-            point.add(p)
+        dx, dy = _xy(p)
+        self.vertices.translate(dx, dy, self.start, self.vertex_count)
 
     def subtract(self, p):
-        """Subtract value from all points in Line.
+        """Subtract value from all points in shape.
 
         Args:
-            p (obj:Point/float): Value to subtract from points in Line.
+            p (obj:Point/float): Value to subtract from points in shape.
                 Can be Point obj to subtract different values from x and y of points,
                 or a float to subtract same value from both x and y of points.
         """
-        for point in self.points:
-            point.subtract(p)
+        dx, dy = _xy(p)
+        self.vertices.translate(-dx, -dy, self.start, self.vertex_count)
 
     def multiply(self, p):
-        """Multiply all points in Line with value.
+        """Multiply all points in shape with value.
 
         Args:
-            p (obj:Point/float): Value to multiply points in Line with.
+            p (obj:Point/float): Value to multiply points in shape with.
                 Can be Point obj to multiply different values with x and y of points,
                 or a float to multiply same value with both x and y of points.
-        """        
-        for point in self.points:
-            point.multiply(p)
+        """
+        fx, fy = _xy(p)
+        self.vertices.scale(fx, fy, 0, self.start, self.vertex_count)
 
     def divide(self, p):
-        """Divide all points in Line by value.
+        """Divide all points in shape by value.
 
         Args:
-            p (obj:Point/float): Value to divide points in Line by.
+            p (obj:Point/float): Value to divide points in shape by.
                 Can be Point obj to divide x and y of points with different values,
                 or a float to divide both x and y of points by the same value.
         """
-        for point in self.points:
-            point.divide(p)
+        fx, fy = _xy(p)
+        self.vertices.scale(1 / fx, 1 / fy, 0, self.start, self.vertex_count)
 
     def rotate_rad(self, angle, cor=0):
-        """Rotate Line in positive counterclockwise direction.
+        """Rotate shape in positive counterclockwise direction.
 
         Rotation is done in radians, optionally around a specified
         center of rotation. If no center of rotation is specified,
-        the Line is rotated around origin (0,0).
+        the shape is rotated around origin (0,0).
 
         Args:
             angle (float): Rotation in radians.
             cor (obj:Point): Center of rotation (x,y)
         """
-        # Calculate trig functions only once beforehand.
-        c = math.cos(angle)
-        s = math.sin(angle)
-
-        for points in self.points:
-            points._rotate(c, s, cor)
+        self.vertices.rotate_rad(angle, cor, self.start, self.vertex_count)
 
     def rotate_deg(self, angle, cor=0):
-        """Rotate Line in positive counterclockwise direction.
+        """Rotate shape in positive counterclockwise direction.
 
         Rotation is done in degrees, optionally around a specified
         center of rotation. If no center of rotation is specified,
-        the Line is rotated around origin (0,0).
+        the shape is rotated around origin (0,0).
 
         Args:
             angle (float): Rotation in degrees.
             cor (obj:Point): Center of rotation (x,y)
         """
-        # Convert degrees to radians
-        angle = angle * math.pi / 180
+        self.vertices.rotate_deg(angle, cor, self.start, self.vertex_count)
 
-        # Calculate trig functions
-        c = math.cos(angle)
-        s = math.sin(angle)
+    def copy(self):
+        """Return a copy of object with its own vertex storage."""
+        begin = 2 * self.start
+        end = begin + 2 * self.vertex_count
+        return self.view(VertexArray(data=self.vertices.data[begin:end]))
 
-        for points in self.points:
-            points._rotate(c, s, cor)
 
-    def copy(self):
-        """Return a copy of object."""
-        return Line(self.points[0].copy(), self.points[1].copy())
+class Line(Shape):
+    """A line in a 2D cartesian coordinate system.
+    
+    Each line is described by a set of two points.
+
+    Args:
+        p1 (obj:Point): Start point of the line.
+        p2 (obj:Point): End point of the line.
+    """
+    vertex_count = 2
+
+    def __init__(self, p1=Point(), p2=Point()):
+        Shape.__init__(self, p1, p2)
 
 
-class Triangle:
+class Triangle(Shape):
     """A triangle in a 2D cartesian coordinate system.
 
     Each triangle is described by a set of three points.
@@ -253,103 +283,16 @@ class Triangle:
         p2 (obj:Point): Second point of Triangle.
         p3 (obj:Point): Third point of Triangle.
     """
+    vertex_count = 3
+
     def __init__(self, 
                  p1=Point(), 
                  p2=Point(), 
                  p3=Point()):
-        self.points = [p1, p2, p3]
-
-    def add(self, p):
-        """Add value to all points in Triangle.
-
-        Args:
-            p (obj:Point/float): Value to add to points in Triangle.
-                Can be Point obj to add different values to x and y of points,
-                or a float to add same value to both x and y of points.
-        """
-        for point in self.points:
-            point.add(p)
-
-    def subtract(self, p):
-        """Subtract value from all points in Triangle.
-
-        Args:
-            p (obj:Point/float): Value to subtract from points in Triangle.
-                Can be Point obj to subtract different values from x and y of points,
-                or a float to subtract same value from both x and y of points.
-        """
-        for point in self.points:
-            point.subtract(p)
-
-    def multiply(self, p):
-        """Multiply all points in Triangle with value.
-
-        Args:
-            p (obj:Point/float): Value to multiply points in Triangle with.
-                Can be Point obj to multiply different values with x and y of points,
-                or a float to multiply same value with both x and y of points.
-        """   
-        for point in self.points:
-            point.multiply(p)
-
-    def divide(self, p):
-        """Divide all points in Triangle by value.
-
-        Args:
-            p (obj:Point/float): Value to divide points in Triangle by.
-                Can be Point obj to divide x and y of points with different values,
-                or a float to divide both x and y of points by the same value.
-        """
-        for point in self.points:
-            point.divide(p)
-
-    def rotate_rad(self, angle, cor=0):
-        """Rotate Triangle in positive counterclockwise direction.
-
-        Rotation is done in radians, optionally around a specified
-        center of rotation. If no center of rotation is specified,
-        the Triangle is rotated around origin (0,0).
-
-        Args:
-            angle (float): Rotation in radians.
-            cor (obj:Point): Center of rotation (x,y)
-        """
-        # Calculate trig functions only once beforehand.
-        c = math.cos(angle)
-        s = math.sin(angle)
-
-        for points in self.points:
-            points._rotate(c, s, cor)
-
-    def rotate_deg(self, angle, cor=0):
-        """Rotate Triangle in positive counterclockwise direction.
-
-        Rotation is done in degrees, optionally around a specified
-        center of rotation. If no center of rotation is specified,
-        the Triangle is rotated around origin (0,0).
-
-        Args:
-            angle (float): Rotation in degrees.
-            cor (obj:Point): Center of rotation (x,y)
-        """
-        # Convert degrees to radians
-        angle = angle * math.pi / 180
-
-        # Calculate trig functions
-        c = math.cos(angle)
-        s = math.sin(angle)
-
-        for points in self.points:
-            points._rotate(c, s, cor)
-
-    def copy(self):
-        """Return a copy of object."""
-        return Triangle(self.points[0].copy(),
-                        self.points[1].copy(),
-                        self.points[2].copy())
+        Shape.__init__(self, p1, p2, p3)
 
 
-class Quad:
+class Quad(Shape):
     """A quad in a 2D cartesian coordinate system.
 
     Each quad is described by a set of four points.
@@ -360,99 +303,11 @@ class Quad:
         p3 (obj:Point): Third point of Quad.
         p4 (obj:Point): Fourth point of Quad
     """
+    vertex_count = 4
+
     def __init__(self, 
                  p1=Point(), 
                  p2=Point(), 
                  p3=Point(),
                  p4=Point()):
-        self.points = [p1, p2, p3, p4]
-
-    def add(self, p):
-        """Add value to all points in Quad.
-
-        Args:
-            p (obj:Point/float): Value to add to points in Quad.
-                Can be Point obj to add different values to x and y of points,
-                or a float to add same value to both x and y of points.
-        """
-        for point in self.points:
-            point.add(p)
-
-    def subtract(self, p):
-        """Subtract value from all points in Quad.
-
-        Args:
-            p (obj:Point/float): Value to subtract from points in Quad.
-                Can be Point obj to subtract different values from x and y of points,
-                or a float to subtract same value from both x and y of points.
-        """
-        for point in self.points:
-            point.subtract(p)
-
-    def multiply(self, p):
-        """Multiply all points in Quad with value.
-
-        Args:
-            p (obj:Point/float): Value to multiply points in Quad with.
-                Can be Point obj to multiply different values with x and y of points,
-                or a float to multiply same value with both x and y of points.
-        """   
-        for point in self.points:
-            point.multiply(p)
-
-    def divide(self, p):
-        """Divide all points in Quad by value.
-
-        Args:
-            p (obj:Point/float): Value to divide points in Quad by.
-                Can be Point obj to divide x and y of points with different values,
-                or a float to divide both x and y of points by the same value.
-        """
-        for point in self.points:
-            point.divide(p)
-
-    def rotate_rad(self, angle, cor=0):
-        """Rotate Quad in positive counterclockwise direction.
-
-        Rotation is done in radians, optionally around a specified
-        center of rotation. If no center of rotation is specified,
-        the Quad is rotated around origin (0,0).
-
-        Args:
-            angle (float): Rotation in radians.
-            cor (obj:Point): Center of rotation (x,y)
-        """
-        # Calculate trig functions only once beforehand.
-        c = math.cos(angle)
-        s = math.sin(angle)
-
-        for points in self.points:
-            points._rotate(c, s, cor)
-
-    def rotate_deg(self, angle, cor=0):
-        """Rotate Quad in positive counterclockwise direction.
-
-        Rotation is done in degrees, optionally around a specified
-        center of rotation. If no center of rotation is specified,
-        the Quad is rotated around origin (0,0).
-
-        Args:
-            angle (float): Rotation in degrees.
-            cor (obj:Point): Center of rotation (x,y)
-        """
-        # Convert degrees to radians
-        angle = angle * math.pi / 180
-
-        # Calculate trig functions
-        c = math.cos(angle)
-        s = math.sin(angle)
-
-        for points in self.points:
-            points._rotate(c, s, cor)
-
-    def copy(self):
-        """Return a copy of object."""
-        return Quad(self.points[0].copy(),
-                    self.points[1].copy(),
-                    self.points[2].copy(),
-                    self.points[3].copy())
+        Shape.__init__(self, p1, p2, p3, p4)
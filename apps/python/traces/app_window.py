@@ -1,5 +1,9 @@
 import ac
 
+from ac_gl_batch import BatchMerger
+from ac_gl_batch import gl_stats
+from drawables import draw_batch
+
 class AppWindow:
     """Main window of the app.
     
@@ -24,15 +28,35 @@ class AppWindow:
         # Initialize empty list of drawable objects.
         self.drawables = []
 
+        # Merges vertex batches of drawables sharing a color into one draw call.
+        self.batch_merger = BatchMerger()
+
+        # Cached vertex batches of the drawables, and the drawable versions
+        # they were built from. Only drawables that changed since the
+        # previous frame are rebuilt.
+        self.batches = []
+        self.batch_versions = []
+        self.layout_changed = False
+
+        # Horizontal offset of scrolling batches, set between samples
+        # for smooth scrolling of the traces.
+        self.scroll_offset = 0
+
     def add_drawable(self, obj):
         """Add drawable object to list of drawables"""
         if obj not in self.drawables:
             self.drawables.append(obj)
+            self.batches.append(None)
+            self.batch_versions.append(None)
 
     def remove_drawable(self, obj):
         """Remove drawable object from list of drawables"""
         if obj in self.drawables:
-            self.drawables.remove(obj)
+            index = self.drawables.index(obj)
+            del self.drawables[index]
+            del self.batches[index]
+            del self.batch_versions[index]
+            self.layout_changed = True
 
     def render(self, deltaT):
         """Draw graphics elements on the app window.
@@ -41,13 +65,45 @@ class AppWindow:
             deltaT (float): Time delta since last tick in seconds.
                 Assetto Corsa passes this argument automatically.
 
-        This method calls the draw method on each object in the list of drawables.
+        Drawables expose their geometry as a vertex batch, together with a
+        version counter that increases whenever that geometry changes.
+        Batches are only rebuilt for drawables with a new version, on idle
+        frames the cached batches are drawn again as they are.
+        With batched drawing enabled, the batches of drawables sharing a
+        color are merged and drawn in a single glBegin/glEnd block.
+        Scrolling batches are moved by the scroll offset while emitted,
+        so smooth scrolling doesn't require rebuilding them.
         This method should be called on render callback of Assetto Corsa.
         """
         # When the user moves the window, the opacity is reset to default.
         # Therefore, opacity needs to be set to 0 every frame.
         ac.setBackgroundOpacity(self.id, 0)
+        gl_stats.new_frame()
+
+        try:
+            changed = self.update_batches()
+            if self.cfg.batch_draw:
+                if changed:
+                    self.batch_merger.merge(self.batches)
+                self.batch_merger.emit(self.scroll_offset)
+            else:
+                for batch in self.batches:
+                    draw_batch(self.cfg, batch, self.scroll_offset)
+        except Exception as e:
+            ac.log("{app_name} - Error: \n{error}".format(app_name=self.cfg.app_name, error=e))
 
-        for drawable in self.drawables:
-            drawable.draw()
+    def update_batches(self):
+        """Rebuild cached batches of drawables that changed.
 
+        Returns:
+            bool: True if any batch was rebuilt.
+        """
+        changed = self.layout_changed
+        self.layout_changed = False
+        versions = self.batch_versions
+        for i, drawable in enumerate(self.drawables):
+            if drawable.version != versions[i]:
+                versions[i] = drawable.version
+                self.batches[i] = drawable.fill_batch()
+                changed = True
+        return changed
@@ -0,0 +1,140 @@
+from array import array
+
+
+class InputCapture:
+    """Physics rate capture of input channels, resampled onto a time grid.
+
+    Every physics tick, the values of all channels are recorded with a
+    timestamp into a ring buffer. Samples are then produced on one shared
+    grid of exact times, spaced 1/sample_rate apart, by linear
+    interpolation between the recorded samples around each grid time.
+    All traces consume the same grid sample, so the channels line up.
+
+    With peak hold enabled, short events between two grid times are kept:
+    if a recorded sample in the interval deviates from the interpolated
+    line by more than peak_threshold, the most deviating sample is used
+    for that grid time instead.
+
+    Args:
+        channel_count (int): Number of channels per sample.
+        sample_rate (float): Grid samples per second.
+        peak_hold (bool): Preserve peaks between grid times.
+        size (int): Number of recorded samples to keep,
+            should cover at least one grid period at physics rate.
+            Optional, defaults to 512.
+    """
+    peak_threshold = 0.01
+
+    def __init__(self, channel_count, sample_rate, peak_hold, size=512):
+        self.channel_count = channel_count
+        self.period = 1 / sample_rate
+        self.peak_hold = peak_hold
+        self.size = size
+
+        # Ring buffers of timestamps and channel values.
+        # self.index points at the slot of the next recorded sample.
+        self.times = array('d', [0.0] * size)
+        self.values = [array('f', [0.0] * size) for _ in range(channel_count)]
+        self.index = 0
+        self.count = 0
+
+        # Capture clock, next grid time, and the grid sample output
+        self.time = 0.0
+        self.next_grid = None
+        self.output = [0.0] * channel_count
+        self.has_output = False
+
+    def clear(self):
+        """Drop all recorded samples and restart the grid."""
+        self.index = 0
+        self.count = 0
+        self.next_grid = None
+        self.has_output = False
+
+    def record(self, deltaT, values):
+        """Record the values of all channels.
+
+        Args:
+            deltaT (float): Time since the previous record in seconds.
+            values (sequence): Value of every channel.
+        """
+        self.time += deltaT
+        i = self.index
+        self.times[i] = self.time
+        for channel, value in zip(self.values, values):
+            channel[i] = value
+        self.index = i + 1 if i + 1 < self.size else 0
+        if self.count < self.size:
+            self.count += 1
+        if self.next_grid is None:
+            self.next_grid = self.time
+
+    def grid_phase(self):
+        """Return time since the newest grid sample, as a fraction of the grid period."""
+        if self.next_grid is None:
+            return 0.0
+        phase = (self.time - self.next_grid) / self.period + 1
+        return min(1.0, max(0.0, phase))
+
+    def resample(self):
+        """Produce the next grid sample, if recorded data reaches it.
+
+        Returns:
+            list: Value per channel at the next grid time, or None if no
+                new grid sample is available yet. The list is reused
+                between calls.
+        """
+        if not self.count or self.time < self.next_grid:
+            return None
+        grid = self.next_grid
+        interval_start = grid - self.period
+        times = self.times
+        size = self.size
+
+        # Walk back from the newest sample, to find the samples around the
+        # grid time and the samples within the interval since the previous grid time.
+        before = after = None
+        interval = []
+        i = self.index
+        for _ in range(self.count):
+            i = i - 1 if i > 0 else size - 1
+            t = times[i]
+            if t > grid:
+                after = i
+                continue
+            if before is None:
+                before = i
+            if t <= interval_start:
+                break
+            interval.append(i)
+
+        for c, channel in enumerate(self.values):
+            # Linear interpolation at the grid time
+            if before is None:
+                value = channel[after]
+            elif after is None:
+                value = channel[before]
+            else:
+                t0 = times[before]
+                t1 = times[after]
+                value = channel[before] + (channel[after] - channel[before]) * (grid - t0) / (t1 - t0)
+
+            if self.peak_hold and self.has_output and interval:
+                # Compare samples in the interval against the straight line
+                # from the previous grid sample to the current one.
+                previous = self.output[c]
+                peak = value
+                peak_deviation = self.peak_threshold
+                for j in interval:
+                    line = previous + (value - previous) * (times[j] - interval_start) / self.period
+                    deviation = abs(channel[j] - line)
+                    if deviation > peak_deviation:
+                        peak = channel[j]
+                        peak_deviation = deviation
+                value = peak
+
+            self.output[c] = value
+
+        self.has_output = True
+        self.next_grid = grid + self.period
+        return self.output
@@ -0,0 +1,164 @@
+import ac
+import acsys
+
+import math
+from array import array
+
+
+class CarHistory:
+    """Recent trace input history of every car in the session.
+
+    Keeps a ring buffer per car on the time grid of the traces, so that
+    when the focused car changes, the traces show the recent inputs of the
+    new car right away. All cars share one array per channel, sized once
+    from the memory budget in the config.
+
+    Cars are polled round-robin, a fixed number of cars per physics tick,
+    which keeps the polling cost per tick constant regardless of the
+    number of cars. Grid samples between two polls of a car are filled by
+    linear interpolation.
+
+    Args:
+        cfg (obj:Config): App configuration.
+        ac_global_data (obj:ACGlobalData): Object to retrieve Assetto Corsa
+            data that is non-car specific.
+    """
+    # Clutch, normalized steering, throttle and brake
+    channel_count = 4
+
+    def __init__(self, cfg, ac_global_data):
+        self.cfg = cfg
+        self.ac_global_data = ac_global_data
+
+        self.size = self.cfg.trace_time_window * self.cfg.trace_sample_rate
+        self.steering_cap = self.cfg.trace_steering_cap * math.pi / 180
+        self.cars_per_tick = self.cfg.car_history_cars_per_tick
+
+        # Number of cars fitting in the memory budget, 4 bytes per value
+        car_size = self.channel_count * self.size * 4
+        self.max_cars = max(1, self.cfg.car_history_memory * 1024 // car_size)
+        self.car_count = 1
+        # Cars in the session without history, logged once
+        self.cars_logged = False
+        self.next_car = 0
+
+        # Ring buffers of all cars, car N occupies values[N * size:(N + 1) * size].
+        # Grid sample with sequence number seq goes into slot seq % size.
+        self.values = [array('f', bytes(4 * self.max_cars * self.size))
+                       for _ in range(self.channel_count)]
+        # Sequence number of the first and last sample written per car,
+        # -1 if the car has no history
+        self.first_seq = [-1] * self.max_cars
+        self.last_seq = [-1] * self.max_cars
+        self.polled = [0.0] * self.channel_count
+
+        # Sequence number of the next grid sample
+        self.seq = 0
+
+    def clear(self):
+        """Drop the history of all cars."""
+        for car in range(self.max_cars):
+            self.first_seq[car] = -1
+            self.last_seq[car] = -1
+
+    def set_car_count(self, car_count):
+        """Set number of cars to poll, capped by the memory budget.
+
+        The memory per car grows with the trace time window, so with long
+        windows the budget may hold fewer cars than the session. Cars
+        beyond the budget get no history, which is logged once.
+        """
+        if car_count > self.max_cars and not self.cars_logged:
+            self.cars_logged = True
+            ac.log(("{app_name} - Input history kept for {cars} of {total} cars, "
+                    "{size} KB per car at a {window} second trace time window").format(
+                        app_name=self.cfg.app_name, cars=self.max_cars, total=car_count,
+                        size=self.channel_count * self.size * 4 // 1024,
+                        window=self.cfg.trace_time_window))
+        self.car_count = max(1, min(car_count, self.max_cars))
+        if self.next_car >= self.car_count:
+            self.next_car = 0
+
+    def advance(self):
+        """Move on to the next sample of the trace time grid."""
+        multiplier = self.ac_global_data.replay_time_multiplier
+        if multiplier > 0:
+            self.seq += 1
+        elif multiplier < 0:
+            # Traces are cleared when rewinding, do the same for the history
+            self.clear()
+
+    def poll(self):
+        """Poll the next cars in turn, run every physics tick."""
+        if self.car_count < 2 or not self.seq:
+            # Nothing to switch to, or no grid sample yet
+            return
+        for _ in range(min(self.cars_per_tick, self.car_count)):
+            car = self.next_car
+            self.next_car = car + 1 if car + 1 < self.car_count else 0
+            self.poll_car(car)
+
+    def poll_car(self, car):
+        """Read the inputs of a car and write them into its history."""
+        polled = self.polled
+        polled[0] = 1 - ac.getCarState(car, acsys.CS.Clutch)
+        steering = ac.getCarState(car, acsys.CS.Steer) * math.pi / 180
+        polled[1] = min(1, max(0, 0.5 - steering / (2 * self.steering_cap)))
+        polled[2] = ac.getCarState(car, acsys.CS.Gas)
+        polled[3] = ac.getCarState(car, acsys.CS.Brake)
+        self.write(car, polled)
+
+    def write(self, car, values):
+        """Write values as the newest grid sample of a car.
+
+        Grid samples since the previous write are interpolated.
+
+        Args:
+            car (int): Car ID number.
+            values (sequence): Value of every channel.
+        """
+        size = self.size
+        base = car * size
+        seq = self.seq - 1
+        last = self.last_seq[car]
+        if last < 0 or seq - last >= size:
+            # No recent history, start over
+            self.first_seq[car] = seq
+            last = seq - 1
+        gap = seq - last
+        for channel, value in zip(self.values, values):
+            if not gap:
+                # Polled again within the same grid sample
+                channel[base + seq % size] = value
+                continue
+            start = channel[base + last % size] if last >= self.first_seq[car] else value
+            for step in range(1, gap + 1):
+                channel[base + (last + step) % size] = start + (value - start) * step / gap
+        self.last_seq[car] = seq
+
+    def history(self, car, channel):
+        """Return recent samples of a channel of a car, oldest first.
+
+        Samples since the last poll of the car repeat the last polled value,
+        so that the newest sample lines up with the current grid time.
+
+        Args:
+            car (int): Car ID number.
+            channel (int): Channel index.
+
+        Returns:
+            list: Sample values, empty if the car has no history.
+        """
+        if car >= self.max_cars or self.last_seq[car] < 0:
+            return []
+        size = self.size
+        base = car * size
+        values = self.values[channel]
+        last = self.last_seq[car]
+        newest = self.seq - 1
+        if newest - last >= size:
+            return []
+        oldest = max(self.first_seq[car], newest - size + 1)
+        samples = [values[base + seq % size] for seq in range(oldest, last + 1)]
+        samples.extend([values[base + last % size]] * (newest - last))
+        return samples
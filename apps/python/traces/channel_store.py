@@ -0,0 +1,101 @@
+from array import array
+
+
+class ChannelStore:
+    """Ring buffer of trace samples of all channels, stored as columns.
+
+    All channels share one time base: one write index, one sample count
+    and one sequence number. The columns lie back to back in one flat
+    array, so a sample of all channels is written with a single extended
+    slice assignment, and adding a channel adds one column.
+
+    Args:
+        channel_count (int): Number of channels.
+        size (int): Number of samples per channel.
+    """
+    def __init__(self, channel_count, size):
+        self.channel_count = channel_count
+        self.size = size
+        self.flat = array('f', [0.0]) * (channel_count * size)
+
+        # Column views into the flat array, indexed by sample slot
+        view = memoryview(self.flat)
+        self.columns = [view[channel * size:(channel + 1) * size]
+                        for channel in range(channel_count)]
+
+        # self.write_index points at the slot the next sample goes into,
+        # self.count is the number of valid samples, at most self.capacity.
+        # self.total is the number of samples added since the last clear,
+        # which doubles as sequence number of the next sample.
+        # At a reduced sample rate, only every decimation-th sample of the
+        # configured rate is added, and fewer samples cover the time window.
+        self.write_index = 0
+        self.count = 0
+        self.total = 0
+        self.decimation = 1
+        self.capacity = size
+
+    def append(self, values):
+        """Add a sample of all channels.
+
+        Args:
+            values (sequence): Value of every channel.
+        """
+        self.flat[self.write_index::self.size] = array('f', values)
+        self.write_index += 1
+        if self.write_index == self.size:
+            self.write_index = 0
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+
+    def clear(self):
+        """Drop all samples."""
+        self.write_index = 0
+        self.count = 0
+        self.total = 0
+
+    def recent(self, channel, count):
+        """Return the newest samples of a channel, oldest first."""
+        count = min(count, self.count)
+        size = self.size
+        column = self.columns[channel]
+        return [column[seq % size] for seq in range(self.total - count, self.total)]
+
+    def load(self, columns):
+        """Replace the contents with samples of every channel.
+
+        Columns are aligned at their newest sample, missing older samples
+        of shorter columns are filled with 0.
+
+        Args:
+            columns (sequence): Samples per channel, oldest first.
+        """
+        self.clear()
+        length = min(self.capacity, max(len(column) for column in columns))
+        row = [0.0] * self.channel_count
+        for i in range(length - 1, -1, -1):
+            for channel, column in enumerate(columns):
+                row[channel] = column[-1 - i] if i < len(column) else 0.0
+            self.append(row)
+
+    def set_decimation(self, decimation):
+        """Change the sample rate, resampling the samples kept.
+
+        Args:
+            decimation (int): Add every n-th sample of the configured rate.
+        """
+        columns = [self.recent(channel, self.count) for channel in range(self.channel_count)]
+        ratio = decimation / self.decimation
+        self.decimation = decimation
+        self.capacity = (self.size - 1) // decimation + 1
+
+        resampled = [[] for _ in columns]
+        position = self.count - 1
+        while position > -0.5 and len(resampled[0]) < self.capacity:
+            for channel, column in enumerate(columns):
+                resampled[channel].append(column[int(position + 0.5)])
+            position -= ratio
+        for column in resampled:
+            column.reverse()
+        self.load(resampled)
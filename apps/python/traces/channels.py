@@ -0,0 +1,141 @@
+import ac
+
+from color_palette import Colors
+
+# Built-in channels, read from ACCarData, in the order of the trace sample:
+# name, color, attribute of ACCarData
+BUILTIN_CHANNELS = (
+    ("clutch", Colors.blue, "clutch"),
+    ("steering", Colors.light_grey, "steering_normalized"),
+    ("throttle", Colors.green, "throttle"),
+    ("brake", Colors.red, "brake"),
+)
+
+# Colors of configured channels without a color of their own, in turn
+EXTRA_COLORS = ("yellow", "orange", "purple", "white")
+
+
+class Channel:
+    """Traced channel.
+
+    Args:
+        name (str): Channel name, the field of the physics page for
+            configured channels, e.g. "wheelSlip[0]".
+        color (tuple): r,g,b,a on 0 to 1 scale.
+        displayed (bool): Show a trace of the channel.
+        builtin (bool): Read from ACCarData, for every car. Configured
+            channels are read from the physics page of the player car.
+    """
+    def __init__(self, name, color, displayed, builtin):
+        self.name = name
+        self.color = color
+        self.displayed = displayed
+        self.builtin = builtin
+
+
+class ChannelRegistry:
+    """Channels of the trace sample: the built-in inputs, then configured fields.
+
+    Any numeric field of the physics page, or an element of an array
+    field, can be traced through the trace_channels option, written as
+    field:min:max or field:min:max:color and separated by commas, e.g.
+    "rpms:0:9000, wheelSlip[0]:0:2:orange". Values are scaled from min
+    and max to 0 to 1 and clamped. Unknown fields are logged and skipped.
+    Fields are read from the physics snapshot of the telemetry source, so
+    they belong to the same physics step as the built-in channels.
+
+    Args:
+        cfg (obj:Config): App configuration.
+        source (obj:ACSource): Telemetry source, see telemetry_source.
+    """
+    def __init__(self, cfg, source):
+        self.cfg = cfg
+        self.source = source
+
+        displayed = (cfg.display_clutch, cfg.display_steering,
+                     cfg.display_throttle, cfg.display_brake)
+        self.channels = [Channel(name, color, shown, True) for (name, color, _), shown
+                         in zip(BUILTIN_CHANNELS, displayed)]
+        self.attributes = [attribute for _, _, attribute in BUILTIN_CHANNELS]
+
+        # Field name, array index or None, offset and scale per configured channel
+        self.fields = []
+        for spec in cfg.trace_channels.split(","):
+            spec = spec.strip()
+            if not spec:
+                continue
+            try:
+                self.add_field(spec)
+            except (ValueError, AttributeError, IndexError) as e:
+                ac.log("{app_name} - Skipped channel {spec}: {error}".format(
+                    app_name=cfg.app_name, spec=spec, error=e))
+
+        # Sample of all channels, reused between reads
+        self.values = [0.0] * len(self.channels)
+
+    def add_field(self, spec):
+        """Add a configured channel.
+
+        Args:
+            spec (str): field:min:max, optionally followed by :color.
+        """
+        parts = [part.strip() for part in spec.split(":")]
+        if len(parts) not in (3, 4):
+            raise ValueError("expected field:min:max or field:min:max:color")
+        name = parts[0]
+        minimum = float(parts[1])
+        maximum = float(parts[2])
+        if maximum == minimum:
+            raise ValueError("min and max are equal")
+
+        field, index = name, None
+        if name.endswith("]") and "[" in name:
+            field, index = name[:-1].split("[", 1)
+            index = int(index)
+        if field.startswith("_"):
+            raise ValueError("not a field of the physics page")
+        value = getattr(self.source.pages.physics, field)
+        if index is not None:
+            value = value[index]
+        float(value)
+
+        if len(parts) == 4:
+            color = getattr(Colors, parts[3])
+        else:
+            color = getattr(Colors, EXTRA_COLORS[len(self.fields) % len(EXTRA_COLORS)])
+        self.fields.append((field, index, minimum, 1 / (maximum - minimum)))
+        self.channels.append(Channel(name, color, True, False))
+
+    def read(self, car_data):
+        """Return the current sample of all channels.
+
+        Configured channels read 0 while another car than the player car
+        is focused, as the physics page only holds the player car.
+
+        Args:
+            car_data (obj:ACCarData): Current car data.
+
+        Returns:
+            list: Value per channel, reused between calls.
+        """
+        values = self.values
+        for i, attribute in enumerate(self.attributes):
+            values[i] = getattr(car_data, attribute)
+        i = len(self.attributes)
+        if car_data.car_id != 0:
+            for i in range(i, len(values)):
+                values[i] = 0.0
+            return values
+        physics = self.source.physics_snapshot()
+        for field, index, minimum, scale in self.fields:
+            value = getattr(physics, field)
+            if index is not None:
+                value = value[index]
+            value = (value - minimum) * scale
+            if value < 0:
+                value = 0.0
+            elif value > 1:
+                value = 1.0
+            values[i] = value
+            i += 1
+        return values
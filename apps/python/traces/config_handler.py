@@ -14,6 +14,8 @@ class Config:
         self.app_name = "Traces"
         self.app_aspect_ratio = 4.27
         self.app_padding = 0.1 # Fraction of app height
+        self.recordings_dir = os.path.join(self.app_dir, "recordings")
+        self.telemetry_dir = os.path.join(self.app_dir, "telemetry")
 
         # Load config
         self.update_cfg = False
@@ -37,6 +39,10 @@ class Config:
         # If option is missing, get option from defaults and replace. 
         self.getint('GENERAL', 'app_height')
         self.getbool('GENERAL', 'use_kmh')
+        self.getstr('GENERAL', 'telemetry_source')
+        self.migrate_use_shared_memory()
+        self.getbool('GENERAL', 'batch_draw')
+        self.getfloat('GENERAL', 'wheel_angle_resolution')
 
         self.getbool('TRACES', 'display_throttle')
         self.getbool('TRACES', 'display_brake')
@@ -46,6 +52,42 @@ class Config:
         self.getint('TRACES', 'trace_sample_rate')
         self.getfloat('TRACES', 'trace_thickness')
         self.getfloat('TRACES', 'trace_steering_cap')
+        self.getbool('TRACES', 'trace_capture')
+        self.getbool('TRACES', 'trace_peak_hold')
+        self.getfloat('TRACES', 'trace_lod_tolerance')
+        self.getbool('TRACES', 'trace_smooth_scroll')
+        self.getstr('TRACES', 'trace_backend')
+        self.getbool('TRACES', 'trace_ghost')
+        self.getint('TRACES', 'trace_ghost_bins')
+        self.getbool('TRACES', 'trace_history')
+        self.getstr('TRACES', 'trace_channels')
+
+        self.getbool('CARS', 'car_history')
+        self.getint('CARS', 'car_history_memory')
+        self.getint('CARS', 'car_history_cars_per_tick')
+
+        self.getbool('GOVERNOR', 'governor')
+        self.getfloat('GOVERNOR', 'governor_budget')
+        self.getint('GOVERNOR', 'governor_window')
+        self.getint('GOVERNOR', 'governor_min_sample_rate')
+        self.getfloat('GOVERNOR', 'governor_max_lod_tolerance')
+        self.getint('GOVERNOR', 'governor_min_traces')
+
+        self.getbool('STREAM', 'stream')
+        self.getint('STREAM', 'stream_port')
+        self.getint('STREAM', 'stream_batch')
+        self.getint('STREAM', 'stream_send_buffer')
+
+        self.getbool('STATS', 'stats')
+        self.getint('STATS', 'stats_window')
+
+        self.getbool('DEBUG', 'profiler')
+        self.getbool('DEBUG', 'profiler_overlay')
+        self.getint('DEBUG', 'profiler_window')
+
+        self.getbool('RECORDER', 'recorder')
+        self.getint('RECORDER', 'recorder_chunk_rows')
+        self.getint('RECORDER', 'recorder_queue_size')
 
         # Generate attributes derived from config options
         self.app_width = self.app_height * self.app_aspect_ratio
@@ -56,6 +98,29 @@ class Config:
             self.save()
         
 
+    def migrate_use_shared_memory(self):
+        """Replace the deprecated use_shared_memory option by telemetry_source.
+
+        use_shared_memory=True with telemetry_source=game meant reading
+        the shared memory physics page, which is now telemetry_source=shm.
+        The option is removed from the config file, and its name is kept
+        in deprecated_options to be reported.
+        """
+        self.deprecated_options = []
+        if not self.cfg_parser.has_option('GENERAL', 'use_shared_memory'):
+            return
+        try:
+            use_shared_memory = self.cfg_parser.getboolean('GENERAL', 'use_shared_memory')
+        except ValueError:
+            use_shared_memory = False
+        if use_shared_memory and self.telemetry_source == "game":
+            self.telemetry_source = "shm"
+            self.cfg_parser.set('GENERAL', 'telemetry_source', self.telemetry_source)
+        self.cfg_parser.remove_option('GENERAL', 'use_shared_memory')
+        self.deprecated_options.append('use_shared_memory')
+        self.update_cfg = True
+
+
     def save(self):
         """Save config file"""
         with open(self.cfg_file_path, 'w') as cfgfile:
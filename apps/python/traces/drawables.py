@@ -1,12 +1,20 @@
 import ac
 import acsys
 
+import math
 from collections import deque
 
+from ac_gl_batch import VertexBatch
+from ac_gl_geometry import ShapeArray
+from ac_gl_geometry import RotationCache
+from ac_gl_polyline import thick_polyline
 from ac_gl_utils import Point
 from ac_gl_utils import Line
 from ac_gl_utils import Triangle
 from ac_gl_utils import Quad
+from channel_store import ChannelStore
+from trace_lod import IncrementalSimplifier
+from trace_lod import MinMaxPyramid
 
 
 class Trace:
@@ -18,6 +26,10 @@ class Trace:
             data that is non-car specific.
         color (tuple): r,g,b,a on 0 to 1 scale.
     """
+    # Longest time window in seconds. Every quad of the trace is moved on
+    # each sample, which gets too slow for the long windows of RingTrace.
+    max_time_window = 10
+
     def __init__(self, cfg, ac_global_data, color):
         self.cfg = cfg
         self.ac_global_data = ac_global_data
@@ -39,108 +51,525 @@ class Trace:
         self.graph_height = self.cfg.app_height * (1 - 2 * self.cfg.app_padding) - self.thickness
         self.graph_width = self.cfg.app_height * 2.5 - self.thickness
 
-        # Set up render queue and points deques.
-        # self.render_queue is a deque of quads, iterated over to draw.
-        # (2*sample_size - 1) deque length because there are:
+        # Horizontal distance between two consecutive samples
+        self.x_step = self.graph_width / (self.sample_size - 1)
+
+        # Set up render queue and points deque.
+        # self.render_queue holds the quads to draw in one flat vertex buffer.
+        # (2*sample_size - 1) quads at most because there are:
         # N (sample size) data points and N-1 connecting lines between points
-        self.render_queue = deque(maxlen=(2 * self.sample_size - 1))
+        self.render_queue = ShapeArray(4)
+        self.max_quads = 2 * self.sample_size - 1
         
         # self.points is a deque of data points, the current and the lag data point.
         # This is used in calculating the quad connecting the data points.
         self.points = deque(maxlen=2)
 
+        # Disabled traces draw nothing and ignore new samples
+        self.enabled = True
+
+        # Vertex batch used for drawing, and version counter of the drawable.
+        # The version is increased whenever the geometry to draw changes.
+        self.batch = VertexBatch(acsys.GL.Quads, self.color)
+        self.batch.scrolls = self.cfg.trace_smooth_scroll
+        if self.batch.scrolls:
+            # Scrolled vertices stop at the left edge of the graph
+            self.batch.clip_x = self.cfg.app_height * self.cfg.app_padding
+        self.version = 0
+
     def update(self, data_point):
         """Update trace render queue.
 
         Args:
             data_point (float): New point to add to the trace.
         """
+        if not self.enabled:
+            return
         if self.ac_global_data.replay_time_multiplier > 0:
             # Update traces only if sim time multiplier is positive
+            self.append(data_point)
 
-            # Offset all points by one
-            for point in self.points:
-                point.x -= self.graph_width / (self.sample_size - 1)
-
-            # Move all quads in render queue left by one unit
-            for quad in self.render_queue:
-                quad.points[0].x -= self.graph_width / (self.sample_size - 1)
-                quad.points[1].x -= self.graph_width / (self.sample_size - 1)
-                quad.points[2].x -= self.graph_width / (self.sample_size - 1)
-                quad.points[3].x -= self.graph_width / (self.sample_size - 1)
-
-            # Add new point
-            p = Point(self.graph_origin.x + self.graph_width,
-                      self.graph_origin.y - (data_point * self.graph_height))
-            self.points.append(p.copy())
-
-            p_lag = self.points[0]
-            # Make connecting quad if previous point exists
-            # Checked by seeing if points deque is length of two...
-            if len(self.points) != 2:
-                pass
-            elif (p.x > p_lag.x) == (p.y > p_lag.y):
-                # If x and y are both greater or smaller than lag x and y
-                p1 = Point(p_lag.x + self.half_thickness,
-                           p_lag.y - self.half_thickness)
-                p2 = Point(p.x + self.half_thickness,
-                           p.y - self.half_thickness)
-                p3 = Point(p.x - self.half_thickness,
-                           p.y + self.half_thickness)
-                p4 = Point(p_lag.x - self.half_thickness,
-                           p_lag.y + self.half_thickness)
-                # Points of a triangle/quad must be passed in CCW order,
-                # as this defines the front facing side.
-                # Clockwise is back face, which gets culled.
-                conn_quad = Quad(p4, p3, p2, p1)
-                self.render_queue.append(conn_quad.copy())
-            else:
-                p1 = Point(p_lag.x - self.half_thickness,
-                           p_lag.y - self.half_thickness)
-                p2 = Point(p.x - self.half_thickness,
-                           p.y - self.half_thickness)
-                p3 = Point(p.x + self.half_thickness,
-                           p.y + self.half_thickness)
-                p4 = Point(p_lag.x + self.half_thickness,
-                           p_lag.y + self.half_thickness)
-                conn_quad = Quad(p4, p3, p2, p1)
-                self.render_queue.append(conn_quad.copy())
-
-            # Make a square around the data point
-            p1 = Point(p.x - self.half_thickness,
-                       p.y - self.half_thickness)
+        elif self.ac_global_data.replay_time_multiplier == 0:
+            # If sim time is paused, dont update traces, skip.
+            pass
+        else:
+            # If sim time multiplier is negative, clear traces to empty defaults
+            self.clear()
+
+    def append(self, data_point):
+        """Add data point to the render queue.
+
+        Args:
+            data_point (float): New point to add to the trace.
+        """
+        # Offset all points by one
+        for point in self.points:
+            point.x -= self.x_step
+
+        # Move all quads in render queue left by one unit,
+        # as one batched operation on the whole vertex buffer
+        self.render_queue.translate(-self.x_step, 0)
+
+        # Add new point
+        p = Point(self.graph_origin.x + self.graph_width,
+                  self.graph_origin.y - (data_point * self.graph_height))
+        self.points.append(p.copy())
+
+        p_lag = self.points[0]
+        # Make connecting quad if previous point exists
+        # Checked by seeing if points deque is length of two...
+        if len(self.points) != 2:
+            pass
+        elif (p.x > p_lag.x) == (p.y > p_lag.y):
+            # If x and y are both greater or smaller than lag x and y
+            p1 = Point(p_lag.x + self.half_thickness,
+                       p_lag.y - self.half_thickness)
             p2 = Point(p.x + self.half_thickness,
                        p.y - self.half_thickness)
-            p3 = Point(p.x + self.half_thickness,
+            p3 = Point(p.x - self.half_thickness,
                        p.y + self.half_thickness)
-            p4 = Point(p.x - self.half_thickness,
+            p4 = Point(p_lag.x - self.half_thickness,
+                       p_lag.y + self.half_thickness)
+            # Points of a triangle/quad must be passed in CCW order,
+            # as this defines the front facing side.
+            # Clockwise is back face, which gets culled.
+            conn_quad = Quad(p4, p3, p2, p1)
+            self.render_queue.add_shape(conn_quad)
+        else:
+            p1 = Point(p_lag.x - self.half_thickness,
+                       p_lag.y - self.half_thickness)
+            p2 = Point(p.x - self.half_thickness,
+                       p.y - self.half_thickness)
+            p3 = Point(p.x + self.half_thickness,
                        p.y + self.half_thickness)
-            square = Quad(p4, p3, p2, p1)
-            self.render_queue.append(square.copy())
+            p4 = Point(p_lag.x + self.half_thickness,
+                       p_lag.y + self.half_thickness)
+            conn_quad = Quad(p4, p3, p2, p1)
+            self.render_queue.add_shape(conn_quad)
+
+        # Make a square around the data point
+        p1 = Point(p.x - self.half_thickness,
+                   p.y - self.half_thickness)
+        p2 = Point(p.x + self.half_thickness,
+                   p.y - self.half_thickness)
+        p3 = Point(p.x + self.half_thickness,
+                   p.y + self.half_thickness)
+        p4 = Point(p.x - self.half_thickness,
+                   p.y + self.half_thickness)
+        square = Quad(p4, p3, p2, p1)
+        self.render_queue.add_shape(square)
+
+        # Drop the oldest quads once the time window is full
+        excess = self.render_queue.shape_count() - self.max_quads
+        if excess > 0:
+            self.render_queue.remove_shapes(excess)
+        self.version += 1
+
+    def clear(self):
+        """Empty the render queue."""
+        self.points.clear()
+        self.render_queue.clear()
+        self.version += 1
+
+    def set_enabled(self, enabled):
+        """Enable or disable the trace, a disabled trace is emptied."""
+        if enabled != self.enabled:
+            self.enabled = enabled
+            self.clear()
+
+    def load(self, samples):
+        """Replace the trace contents with a sequence of data points.
+
+        Args:
+            samples (sequence): Data points, oldest first.
+        """
+        self.clear()
+        for data_point in samples:
+            self.append(data_point)
+
+    def fill_batch(self):
+        """Fill vertex batch with all quads in the render queue.
+
+        Returns:
+            obj:VertexBatch: Batch of trace quads.
+        """
+        self.batch.color = self.color
+        self.batch.vertices = self.render_queue.data
+        return self.batch
+
+    def draw(self):
+        """Draw trace object"""
+        try:
+            draw_batch(self.cfg, self.fill_batch())
+        except Exception as e:
+            ac.log("{app_name} - Error: \n{error}".format(app_name=self.cfg.app_name, error=e))
+
+
+class RingTrace:
+    """Driver input trace drawable backed by a circular sample buffer.
+
+    Drop-in replacement for Trace. Instead of keeping a queue of quads
+    that gets shifted left on every sample, raw data points are stored in
+    a fixed-size ring buffer with a moving write index. The x coordinate
+    of each sample is derived from its age when drawing, which makes
+    appending a sample O(1) regardless of time window and sample rate.
+    The trace is drawn as a thick polyline with mitered joins.
+
+    The ring buffer is a column of a ChannelStore. Traces sharing a store
+    are not updated one by one: the owner of the store appends a sample
+    of all channels, and then advances every trace.
+
+    Args:
+        cfg (obj:Config): Object for app configuration.
+        ac_global_data (obj:ACGlobalData): Object to retrieve Assetto Corsa
+            data that is non-car specific.
+        color (tuple): r,g,b,a on 0 to 1 scale.
+        store (obj:ChannelStore): Shared sample store. Optional, the trace
+            has a store of its own by default.
+        column (int): Channel of the trace in the shared store.
+    """
+    # Min width of a min/max pyramid bucket in pixels
+    bucket_width = 2
+
+    def __init__(self, cfg, ac_global_data, color, store=None, column=0):
+        self.cfg = cfg
+        self.ac_global_data = ac_global_data
+
+        self.time_window = self.cfg.trace_time_window
+        self.sample_rate = self.cfg.trace_sample_rate
+        self.sample_size = self.time_window * self.sample_rate
+
+        self.color = color
+        self.thickness = self.cfg.trace_thickness
+        self.half_thickness = self.thickness / 2
+
+        # Trace line starting point
+        self.graph_origin = Point(
+            self.cfg.app_height * self.cfg.app_padding + self.half_thickness,
+            self.cfg.app_height * (1 - self.cfg.app_padding) - self.half_thickness)
+
+        # Trace graph dimensions
+        self.graph_height = self.cfg.app_height * (1 - 2 * self.cfg.app_padding) - self.thickness
+        self.graph_width = self.cfg.app_height * 2.5 - self.thickness
+
+        # Horizontal distance between two consecutive samples.
+        # At a reduced sample rate, only every decimation-th sample of the
+        # configured rate is added, and samples are spaced further apart.
+        self.base_x_step = self.graph_width / (self.sample_size - 1)
+        self.decimation = 1
+        self.x_step = self.base_x_step
+
+        # Circular buffer of raw data points, a column of the sample store
+        self.owns_store = store is None
+        if self.owns_store:
+            store = ChannelStore(1, self.sample_size)
+        self.store = store
+        self.samples = store.columns[column]
+        self.column = column
+
+        self.setup_lod(self.cfg.trace_lod_tolerance)
+
+        # Disabled traces draw nothing and ignore new samples
+        self.enabled = True
+
+        # Vertex batch used for drawing, and version counter of the drawable.
+        # The version is increased whenever the geometry to draw changes.
+        self.batch = VertexBatch(acsys.GL.Quads, self.color)
+        self.batch.scrolls = self.cfg.trace_smooth_scroll
+        if self.batch.scrolls:
+            # Scrolled vertices stop at the left edge of the graph
+            self.batch.clip_x = self.cfg.app_height * self.cfg.app_padding
+        self.version = 0
+
+    @property
+    def count(self):
+        """Number of valid samples in the buffer."""
+        return self.store.count
+
+    @property
+    def total(self):
+        """Number of samples added since the last clear."""
+        return self.store.total
+
+    @property
+    def capacity(self):
+        """Number of samples covering the time window."""
+        return self.store.capacity
+
+    def setup_lod(self, lod_tolerance):
+        """Set up the level of detail stage for the current sample spacing.
+
+        With more samples than pixels, the trace is drawn from a min/max
+        pyramid level with buckets of at least bucket_width pixels.
+        Otherwise an optional level of detail stage simplifies the trace
+        as samples arrive.
+
+        Args:
+            lod_tolerance (float): Simplification tolerance in pixels,
+                0 disables simplification.
+        """
+        self.lod_tolerance = lod_tolerance
+        self.lod = None
+        self.pyramid = None
+        self.pyramid_level = 0
+        if self.x_step < 1:
+            while self.x_step * (1 << self.pyramid_level) < self.bucket_width:
+                self.pyramid_level += 1
+            self.pyramid = MinMaxPyramid(self.pyramid_level, self.sample_size)
+        elif lod_tolerance > 0:
+            self.lod = IncrementalSimplifier(lod_tolerance, self.x_step)
+
+    def configure(self, decimation, lod_tolerance):
+        """Change sample rate and level of detail, keeping the samples in view.
+
+        Samples in the buffer are resampled to the new sample spacing.
+        A shared store is resampled by its owner beforehand.
+
+        Args:
+            decimation (int): Add every n-th sample of the configured rate.
+            lod_tolerance (float): Simplification tolerance in pixels.
+        """
+        if self.owns_store:
+            self.store.set_decimation(decimation)
+        self.decimation = decimation
+        self.x_step = self.base_x_step * decimation
+        self.setup_lod(lod_tolerance)
+        self.rebuild()
+
+    def set_enabled(self, enabled):
+        """Enable or disable the trace.
+
+        A disabled trace with a store of its own is emptied. Samples of a
+        shared store are kept, and shown again once the trace is enabled.
+        """
+        if enabled != self.enabled:
+            self.enabled = enabled
+            if self.owns_store:
+                self.clear()
+            else:
+                self.rebuild()
+
+    def recent(self, count):
+        """Return the newest samples in the buffer, oldest first."""
+        return self.store.recent(self.column, count)
+
+    def update(self, data_point):
+        """Add data point to the trace sample buffer.
+
+        Args:
+            data_point (float): New point to add to the trace.
+        """
+        if not self.enabled:
+            return
+        if self.ac_global_data.replay_time_multiplier > 0:
+            # Update traces only if sim time multiplier is positive
+            self.append(data_point)
 
         elif self.ac_global_data.replay_time_multiplier == 0:
             # If sim time is paused, dont update traces, skip.
             pass
         else:
             # If sim time multiplier is negative, clear traces to empty defaults
-            self.points.clear()
-            self.render_queue.clear()
-            
+            self.clear()
+
+    def append(self, data_point):
+        """Add data point to the sample buffer.
+
+        Args:
+            data_point (float): New point to add to the trace.
+        """
+        self.store.append((data_point,))
+        self.advance()
+
+    def advance(self):
+        """Take in the newest sample of the store."""
+        if not self.enabled:
+            return
+        seq = self.store.total - 1
+        data_point = self.samples[seq % self.sample_size]
+        if self.lod is not None:
+            self.lod.append(seq, data_point * self.graph_height)
+            self.lod.trim(seq - self.store.count + 1)
+        elif self.pyramid is not None:
+            self.pyramid.append(seq, data_point)
+        self.version += 1
+
+    def clear(self):
+        """Empty the sample buffer."""
+        if self.owns_store:
+            self.store.clear()
+        if self.lod is not None:
+            self.lod.clear()
+        elif self.pyramid is not None:
+            self.pyramid.clear()
+        self.version += 1
+
+    def rebuild(self):
+        """Take in all samples of the store again, e.g. after it was loaded."""
+        if self.lod is not None:
+            self.lod.clear()
+        elif self.pyramid is not None:
+            self.pyramid.clear()
+        self.version += 1
+        if not self.enabled:
+            return
+        store = self.store
+        samples = self.samples
+        size = self.sample_size
+        for seq in range(store.total - store.count, store.total):
+            data_point = samples[seq % size]
+            if self.lod is not None:
+                self.lod.append(seq, data_point * self.graph_height)
+            elif self.pyramid is not None:
+                self.pyramid.append(seq, data_point)
+
+    def load(self, samples):
+        """Replace the trace contents with a sequence of data points.
+
+        Args:
+            samples (sequence): Data points, oldest first.
+        """
+        self.clear()
+        for data_point in samples:
+            self.append(data_point)
+
+    def fill_batch(self):
+        """Build the trace as a thick polyline through the sample buffer.
+
+        With the level of detail stage enabled, only the key points of the
+        simplified trace are drawn, starting from the oldest sample in view on
+        the simplified segment that crosses it.
+
+        Returns:
+            obj:VertexBatch: Batch of trace quads.
+        """
+        if not self.enabled:
+            self.batch.vertices = []
+            return self.batch
+        samples = self.samples
+        size = self.sample_size
+        x_step = self.x_step
+        y_origin = self.graph_origin.y
+        height = self.graph_height
+
+        # Sequence numbers of the samples to draw.
+        # The newest sample always sits at the right edge of the graph.
+        newest = self.total - 1
+        oldest = self.total - self.count
+        first = None
+        if self.lod is None or not self.count:
+            sequence = range(oldest, self.total)
+        else:
+            sequence = list(self.lod.keys)
+            if sequence[0] > oldest:
+                # The simplified segment into view starts at a dropped key
+                # point, cut it at the oldest sample rather than bending it.
+                sequence.insert(0, oldest)
+                first = self.lod.value_at(oldest)
+        x_newest = self.graph_origin.x + self.graph_width
+
+        if self.pyramid is not None and self.count:
+            xs, ys = self.pyramid_points(oldest, newest, x_newest)
+        else:
+            xs = [x_newest - (newest - seq) * x_step for seq in sequence]
+            ys = [y_origin - samples[seq % size] * height for seq in sequence]
+            if first is not None:
+                ys[0] = y_origin - first
+
+        self.batch.color = self.color
+        self.batch.vertices = thick_polyline(xs, ys, self.half_thickness)
+        return self.batch
+
+    def pyramid_points(self, oldest, newest, x_newest):
+        """Return points of the trace drawn from the min/max pyramid.
+
+        Every bucket in view adds its min and max at the center of the
+        bucket, in the order closest to the previous point, so the line
+        sweeps over the full range of every bucket.
+
+        Args:
+            oldest (int): Sequence number of the oldest sample in view.
+            newest (int): Sequence number of the newest sample.
+            x_newest (float): x coordinate of the newest sample.
+
+        Returns:
+            tuple: Lists of x and y coordinates.
+        """
+        level = self.pyramid_level
+        bucket = self.pyramid.bucket
+        x_step = self.x_step
+        y_origin = self.graph_origin.y
+        height = self.graph_height
+        half_bucket = ((1 << level) - 1) / 2
+
+        xs = []
+        ys = []
+        y_lag = None
+        for index in range((oldest >> level), (newest >> level) + 1):
+            seq = (index << level) + half_bucket
+            if seq < oldest:
+                seq = oldest
+            elif seq > newest:
+                seq = newest
+            x = x_newest - (newest - seq) * x_step
+            minimum, maximum = bucket(level, index)
+            y_min = y_origin - minimum * height
+            y_max = y_origin - maximum * height
+            if y_lag is not None and abs(y_max - y_lag) < abs(y_min - y_lag):
+                y_min, y_max = y_max, y_min
+            xs.append(x)
+            ys.append(y_min)
+            if y_max != y_min:
+                xs.append(x)
+                ys.append(y_max)
+            y_lag = ys[-1]
+        return xs, ys
+
     def draw(self):
         """Draw trace object"""
-        set_color(self.color)
         try:
-            for quad in self.render_queue:
-                ac.glBegin(acsys.GL.Quads)
-                ac.glVertex2f(quad.points[0].x, quad.points[0].y)
-                ac.glVertex2f(quad.points[1].x, quad.points[1].y)
-                ac.glVertex2f(quad.points[2].x, quad.points[2].y)
-                ac.glVertex2f(quad.points[3].x, quad.points[3].y)
-                ac.glEnd()
+            draw_batch(self.cfg, self.fill_batch())
         except Exception as e:
             ac.log("{app_name} - Error: \n{error}".format(app_name=self.cfg.app_name, error=e))
 
 
+class GhostTrace(RingTrace):
+    """Reference lap trace drawable, shown behind a live trace.
+
+    Samples are looked up from the reference lap at the position on track
+    of every live sample, so both traces share the same time axis.
+    The ghost is drawn as a thinner, translucent line. As the reference
+    lap only serves as a guide, it is drawn at a coarser level of detail
+    than the live traces.
+
+    Args:
+        cfg (obj:Config): Object for app configuration.
+        ac_global_data (obj:ACGlobalData): Object to retrieve Assetto Corsa
+            data that is non-car specific.
+        color (tuple): r,g,b,a on 0 to 1 scale, of the live trace.
+        store (obj:ChannelStore): Shared sample store of the ghost traces.
+        column (int): Channel of the ghost trace in the shared store.
+    """
+    opacity = 0.4
+    # Min width of a min/max pyramid bucket, and min simplification tolerance in pixels
+    bucket_width = 4
+    min_lod_tolerance = 1.5
+
+    def __init__(self, cfg, ac_global_data, color, store, column):
+        RingTrace.__init__(self, cfg, ac_global_data, color[:3] + (self.opacity,),
+                           store, column)
+        self.half_thickness /= 2
+
+    def setup_lod(self, lod_tolerance):
+        """Set up the level of detail stage, at least as coarse as min_lod_tolerance.
+
+        Args:
+            lod_tolerance (float): Simplification tolerance of the live traces in pixels.
+        """
+        RingTrace.setup_lod(self, max(lod_tolerance, self.min_lod_tolerance))
+        self.lod_tolerance = lod_tolerance
+
+
 class PedalBar:
     """Driver pedal input bar drawable.
 
@@ -162,27 +591,38 @@ class PedalBar:
 
         self.pedal_input = 0
 
+        # Vertex batch used for drawing, and version counter of the drawable.
+        # The version is increased whenever the geometry to draw changes.
+        self.batch = VertexBatch(acsys.GL.Quads, self.color)
+        self.version = 0
+
     def update(self, pedal_input):
         """Update pedal input data.
         
         Args:
             pedal_input (float): Pedal input data to draw.
         """
-        self.pedal_input = pedal_input
+        if pedal_input != self.pedal_input or self.color != self.batch.color:
+            self.pedal_input = pedal_input
+            self.version += 1
+
+    def fill_batch(self):
+        """Build pedal bar quad.
+
+        Returns:
+            obj:VertexBatch: Batch with the pedal bar quad.
+        """
+        top = self.origin.y - (self.full_height * self.pedal_input)
+        self.batch.color = self.color
+        self.batch.vertices = [self.origin.x, self.origin.y,
+                               self.origin.x + self.width, self.origin.y,
+                               self.origin.x + self.width, top,
+                               self.origin.x, top]
+        return self.batch
 
     def draw(self):
         """Draw pedal bar"""
-        set_color(self.color)
-        ac.glBegin(acsys.GL.Quads)
-        ac.glVertex2f(self.origin.x, 
-                      self.origin.y)
-        ac.glVertex2f(self.origin.x + self.width,
-                      self.origin.y)
-        ac.glVertex2f(self.origin.x + self.width,
-                      self.origin.y - (self.full_height * self.pedal_input))
-        ac.glVertex2f(self.origin.x,
-                      self.origin.y - (self.full_height * self.pedal_input))
-        ac.glEnd()
+        draw_batch(self.cfg, self.fill_batch())
 
 
 class SteeringWheel:
@@ -217,8 +657,10 @@ class SteeringWheel:
         # and build a base renderqueue of quads from it.
         self.start_line = Line(self.center_p_inner, self.center_p_outer)
 
+        # Base quads are stored in one flat vertex buffer, so the whole
+        # indicator can be rotated with a single batched operation.
         self.line_list = []
-        self.base_quads = []
+        self.base_quads = ShapeArray(4)
         self.offsets = [-0.2, -0.15, -0.1, -0.05, 0, 0.05, 0.1, 0.15, 0.2]
         for i, offset in enumerate(self.offsets):
             line = self.start_line.copy()
@@ -235,10 +677,26 @@ class SteeringWheel:
                 p3 = Point(line_lag.points[1].x, line_lag.points[1].y)
                 p4 = Point(line_lag.points[0].x, line_lag.points[0].y)
                 quad = Quad(p1, p2, p3, p4)
-                self.base_quads.append(quad)
-
-        # Initialize empty renderqueue
-        self.render_queue = []
+                self.base_quads.add_shape(quad)
+
+        # Render queue holds the rotated copy of the base quads.
+        self.render_queue = self.base_quads.copy()
+        self.angle = 0
+
+        # Optionally serve rotated quads from a cache of quantized angles.
+        # Quantizing to a step of d radians moves the outer rim vertices by
+        # at most outer_radius * d / 2 pixels, so the step is capped to keep
+        # that error below one pixel at the configured app scale.
+        self.rotation_cache = None
+        if self.cfg.wheel_angle_resolution > 0:
+            resolution = min(self.cfg.wheel_angle_resolution * math.pi / 180,
+                             1.8 / self.outer_radius)
+            self.rotation_cache = RotationCache(self.base_quads, self.origin, resolution)
+
+        # Vertex batch used for drawing, and version counter of the drawable.
+        # The version is increased whenever the geometry to draw changes.
+        self.batch = VertexBatch(acsys.GL.Quads, self.color)
+        self.version = 0
 
     def update(self, angle):
         """Update steering wheel indicator.
@@ -246,31 +704,45 @@ class SteeringWheel:
         Args:
             angle (float): Steering wheel angle in radians.
         """
-        _render_queue = []
-
-        for quad in self.base_quads:
-            new_quad = quad.copy()
-            new_quad.rotate_rad(angle, self.origin)
-            _render_queue.append(new_quad)
-
-        self.render_queue = _render_queue
+        if self.rotation_cache is not None:
+            render_queue = self.rotation_cache.get(angle)
+            if render_queue is not self.render_queue:
+                self.render_queue = render_queue
+                self.version += 1
+        elif angle != self.angle:
+            self.base_quads.rotate_cs(math.cos(angle), math.sin(angle),
+                                      self.origin, out=self.render_queue)
+            self.version += 1
+        self.angle = angle
+
+    def fill_batch(self):
+        """Return batch with the rotated steering wheel quads.
+
+        Returns:
+            obj:VertexBatch: Batch of steering wheel quads.
+        """
+        self.batch.color = self.color
+        self.batch.vertices = self.render_queue.data
+        return self.batch
 
     def draw(self):
         """Draw steering wheel indicator"""
-        set_color(self.color)
-        for quad in self.render_queue:
-            ac.glBegin(acsys.GL.Quads)
-            ac.glVertex2f(quad.points[0].x, quad.points[0].y)
-            ac.glVertex2f(quad.points[1].x, quad.points[1].y)
-            ac.glVertex2f(quad.points[2].x, quad.points[2].y)
-            ac.glVertex2f(quad.points[3].x, quad.points[3].y)
-            ac.glEnd()
+        draw_batch(self.cfg, self.fill_batch())
+
 
+def draw_batch(cfg, batch, scroll_offset=0):
+    """Draw vertex batch of a drawable.
 
-def set_color(rgba):
-    """Apply RGBA color for GL drawing.
+    Args:
+        cfg (obj:Config): App configuration.
+        batch (obj:VertexBatch): Batch to draw.
+        scroll_offset (float): Horizontal offset, applied if the batch scrolls.
 
-    Agrs:
-        rgba (tuple): r,g,b,a on a 0-1 scale.
+    With batched drawing enabled, the whole batch is drawn in a single
+    glBegin/glEnd block. Otherwise each quad gets its own block.
     """
-    ac.glColor4f(rgba[0], rgba[1], rgba[2], rgba[3])
+    offset_x = scroll_offset if batch.scrolls else 0
+    if cfg.batch_draw:
+        batch.emit(offset_x)
+    else:
+        batch.emit_primitives(offset_x)
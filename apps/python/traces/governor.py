@@ -0,0 +1,100 @@
+from profiler import StageTimer
+
+
+class QualityGovernor:
+    """Adaptive trace quality, keeping the app within a time budget per frame.
+
+    The cost of a frame is the duration of app_render plus the durations
+    of all acUpdate calls since the previous frame. Once per window of
+    frames, the 90th percentile cost is compared to the budget. Over
+    budget, quality is lowered by one level. Under a fraction of the
+    budget, quality is raised by one level again. Measurements restart
+    after every change, so every decision is based on a full window
+    at the current level.
+
+    Quality levels, from best to cheapest:
+        - Simplification tolerance doubled, up to governor_max_lod_tolerance.
+        - Trace sample rate divided, down to governor_min_sample_rate.
+          Only with physics rate capture and the ring buffer backend.
+        - Trace groups switched off one by one, in the order given by
+          the app, keeping at least governor_min_traces.
+
+    Args:
+        cfg (obj:Config): App configuration.
+        sheddable (int): Number of trace groups that may be switched off.
+    """
+    # p90 frame cost below this fraction of the budget raises quality
+    recover_fraction = 0.5
+
+    def __init__(self, cfg, sheddable):
+        self.cfg = cfg
+        self.budget = self.cfg.governor_budget / 1000
+        self.window = self.cfg.governor_window
+        self.frames = StageTimer(self.window)
+        self.update_time = 0.0
+
+        # Quality levels as (lod tolerance, decimation, traces off)
+        tolerance = self.cfg.trace_lod_tolerance
+        self.levels = [(tolerance, 1, 0)]
+        ring = self.cfg.trace_backend != "quad"
+        if ring:
+            while tolerance < self.cfg.governor_max_lod_tolerance:
+                tolerance = min(self.cfg.governor_max_lod_tolerance,
+                                tolerance * 2 if tolerance else 0.5)
+                self.levels.append((tolerance, 1, 0))
+        decimation = 1
+        if ring and self.cfg.trace_capture:
+            while self.cfg.trace_sample_rate / (decimation + 1) >= self.cfg.governor_min_sample_rate:
+                decimation += 1
+                self.levels.append((tolerance, decimation, 0))
+        for off in range(1, sheddable + 1):
+            self.levels.append((tolerance, decimation, off))
+
+        self.level = 0
+        self.p90 = 0.0
+        # Set on every change of level, reset by the app once applied
+        self.changed = False
+
+    @property
+    def lod_tolerance(self):
+        return self.levels[self.level][0]
+
+    @property
+    def decimation(self):
+        return self.levels[self.level][1]
+
+    @property
+    def traces_off(self):
+        return self.levels[self.level][2]
+
+    def add_update(self, duration):
+        """Add duration of an acUpdate call in seconds."""
+        self.update_time += duration
+
+    def add_frame(self, duration):
+        """Add duration of an app_render call in seconds, closing the frame."""
+        self.frames.add(duration + self.update_time)
+        self.update_time = 0.0
+        if self.frames.count == self.window:
+            self.evaluate()
+
+    def evaluate(self):
+        """Change quality level based on the frames of the last window."""
+        self.p90 = self.frames.percentiles(0.9)[0]
+        self.frames.clear()
+        if self.p90 > self.budget and self.level < len(self.levels) - 1:
+            self.level += 1
+            self.changed = True
+        elif self.p90 < self.budget * self.recover_fraction and self.level > 0:
+            self.level -= 1
+            self.changed = True
+
+    def describe(self):
+        """Return current decisions of the governor as text."""
+        return ("level {level}/{last}: lod {lod:.1f} px, {rate:.1f} Hz, {off} traces off, "
+                "p90 {p90:.2f} ms of {budget:.2f} ms").format(
+                    level=self.level, last=len(self.levels) - 1,
+                    lod=self.lod_tolerance,
+                    rate=self.cfg.trace_sample_rate / self.decimation,
+                    off=self.traces_off,
+                    p90=self.p90 * 1000, budget=self.budget * 1000)
@@ -0,0 +1,235 @@
+from array import array
+
+# Compact history of trace channels.
+# Every channel is quantized to 8 or 16 bits and stored in blocks of a fixed
+# number of samples. Closed blocks are delta and run-length encoded per
+# channel into a byte string, with one token per change:
+#
+#   0xxxxxxx            zigzag encoded delta of 1 to 127
+#   10xxxxxx            run of 1 to 64 unchanged samples
+#   11xxxxxx xxxxxxxx   zigzag encoded delta of 128 to 16383
+#   00000000 xxxxxxxx xxxxxxxx
+#                       absolute value, little-endian, for larger changes
+#
+# Every block starts with an absolute value, so any block can be decoded
+# on its own, which gives random access by block index.
+
+MAX_RUN = 64
+
+
+def _zigzag(delta):
+    """Map signed delta to unsigned: 0, -1, 1, -2, 2 -> 0, 1, 2, 3, 4."""
+    return delta * 2 if delta >= 0 else -delta * 2 - 1
+
+
+def encode_block(values):
+    """Delta and run-length encode a sequence of quantized values.
+
+    Args:
+        values (sequence): Unsigned 16 bit integers.
+
+    Returns:
+        bytes: Encoded block.
+    """
+    out = bytearray()
+    previous = values[0]
+    out += b"\x00"
+    out.append(previous & 0xFF)
+    out.append(previous >> 8)
+    run = 0
+    for value in values[1:]:
+        if value == previous:
+            run += 1
+            if run == MAX_RUN:
+                out.append(0x80 | (run - 1))
+                run = 0
+            continue
+        if run:
+            out.append(0x80 | (run - 1))
+            run = 0
+        zigzag = _zigzag(value - previous)
+        if zigzag < 0x80:
+            out.append(zigzag)
+        elif zigzag < 0x4000:
+            out.append(0xC0 | (zigzag >> 8))
+            out.append(zigzag & 0xFF)
+        else:
+            out.append(0)
+            out.append(value & 0xFF)
+            out.append(value >> 8)
+        previous = value
+    if run:
+        out.append(0x80 | (run - 1))
+    return bytes(out)
+
+
+def decode_block(data, out):
+    """Decode a block written by encode_block.
+
+    Args:
+        data (bytes): Encoded block.
+        out (array): Array to append the quantized values to.
+
+    Returns:
+        array: The out array.
+    """
+    append = out.append
+    value = 0
+    i = 0
+    size = len(data)
+    while i < size:
+        token = data[i]
+        if token == 0:
+            value = data[i + 1] | (data[i + 2] << 8)
+            append(value)
+            i += 3
+        elif token < 0x80:
+            value += (token >> 1) if not token & 1 else -((token + 1) >> 1)
+            append(value)
+            i += 1
+        elif token < 0xC0:
+            out.extend([value] * ((token & 0x3F) + 1))
+            i += 1
+        else:
+            zigzag = ((token & 0x3F) << 8) | data[i + 1]
+            value += (zigzag >> 1) if not zigzag & 1 else -((zigzag + 1) >> 1)
+            append(value)
+            i += 2
+    return out
+
+
+class HistoryStore:
+    """Quantized, block encoded history of a set of channels.
+
+    Samples are appended to an open block of raw quantized values.
+    When the block is full, every channel is encoded into a byte string
+    and the open block is reused. Decoded blocks are cached, as reading
+    a window for display mostly touches the same few blocks.
+
+    Args:
+        channels (sequence): (minimum, maximum, bits) per channel,
+            bits is 8 or 16.
+        block_size (int): Samples per block. Optional, defaults to 256.
+        cache_size (int): Decoded blocks to keep per channel.
+            Optional, defaults to 4.
+    """
+    def __init__(self, channels, block_size=256, cache_size=4):
+        self.channels = list(channels)
+        self.block_size = block_size
+        self.cache_size = cache_size
+
+        # Quantization offset and scale per channel
+        self.minimum = [channel[0] for channel in self.channels]
+        self.levels = [(1 << channel[2]) - 1 for channel in self.channels]
+        self.scale = [levels / (channel[1] - channel[0])
+                      for channel, levels in zip(self.channels, self.levels)]
+
+        # Encoded blocks per channel, open block of raw values per channel
+        self.blocks = [[] for _ in self.channels]
+        self.open = [array('H') for _ in self.channels]
+        self.encoded_size = 0
+        self.count = 0
+
+        # Decoded blocks by (channel, block index), most recent last
+        self.cache = {}
+        self.cache_order = []
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """Drop all samples."""
+        for blocks, values in zip(self.blocks, self.open):
+            del blocks[:]
+            del values[:]
+        self.encoded_size = 0
+        self.count = 0
+        self.cache.clear()
+        del self.cache_order[:]
+
+    def append(self, values):
+        """Add one sample of every channel.
+
+        Args:
+            values (sequence): Value of every channel.
+        """
+        for c, value in enumerate(values):
+            q = int((value - self.minimum[c]) * self.scale[c] + 0.5)
+            if q < 0:
+                q = 0
+            elif q > self.levels[c]:
+                q = self.levels[c]
+            self.open[c].append(q)
+        self.count += 1
+
+        if len(self.open[0]) == self.block_size:
+            for blocks, values in zip(self.blocks, self.open):
+                data = encode_block(values)
+                blocks.append(data)
+                self.encoded_size += len(data)
+                del values[:]
+
+    def memory_size(self):
+        """Return number of bytes used by encoded and open blocks."""
+        return self.encoded_size + sum(2 * len(values) for values in self.open)
+
+    def block(self, channel, index):
+        """Return quantized values of a block of a channel.
+
+        Args:
+            channel (int): Channel index.
+            index (int): Block index, the open block comes after the encoded ones.
+
+        Returns:
+            array: Quantized values, not to be modified.
+        """
+        blocks = self.blocks[channel]
+        if index == len(blocks):
+            return self.open[channel]
+        key = (channel, index)
+        values = self.cache.get(key)
+        if values is None:
+            values = decode_block(blocks[index], array('H'))
+            self.cache[key] = values
+            self.cache_order.append(key)
+            if len(self.cache_order) > self.cache_size * len(self.channels):
+                del self.cache[self.cache_order.pop(0)]
+        return values
+
+    def read(self, channel, start, stop):
+        """Return values of a channel for a range of samples.
+
+        Args:
+            channel (int): Channel index.
+            start (int): Index of the first sample.
+            stop (int): Index after the last sample.
+
+        Returns:
+            list: Values, oldest first.
+        """
+        start = max(0, start)
+        stop = min(self.count, stop)
+        size = self.block_size
+        inverse = 1 / self.scale[channel]
+        minimum = self.minimum[channel]
+        result = []
+        index = start
+        while index < stop:
+            block = self.block(channel, index // size)
+            offset = index % size
+            end = min(size, offset + stop - index)
+            result.extend([minimum + q * inverse for q in block[offset:end]])
+            index += end - offset
+        return result
+
+    def window(self, channel, count):
+        """Return the newest values of a channel.
+
+        Args:
+            channel (int): Channel index.
+            count (int): Number of samples.
+
+        Returns:
+            list: Values, oldest first.
+        """
+        return self.read(channel, self.count - count, self.count)
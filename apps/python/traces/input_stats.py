@@ -0,0 +1,419 @@
+from collections import deque
+
+
+class RollingWindow:
+    """Time-weighted mean, minimum and maximum of a value over a sliding window.
+
+    Samples are kept in a deque with a running sum for the mean. Minimum
+    and maximum are the heads of two monotonic deques, which only hold
+    the samples that can still become the minimum or maximum of the
+    window, so every sample costs O(1) amortized. Samples need not cover
+    the window, e.g. a value only added while some condition holds is
+    averaged over the time it held.
+
+    Args:
+        duration (float): Window length in seconds.
+        extremes (bool): Keep minimum and maximum, besides the mean.
+    """
+    def __init__(self, duration, extremes=True):
+        self.duration = duration
+        self.extremes = extremes
+
+        # Samples as (time, duration, value * duration)
+        self.samples = deque()
+        # Candidates as (time, value), values increasing and decreasing
+        self.minima = deque()
+        self.maxima = deque()
+        self.sum = 0.0
+        self.span = 0.0
+
+    def clear(self):
+        """Drop all samples."""
+        self.samples.clear()
+        self.minima.clear()
+        self.maxima.clear()
+        self.sum = 0.0
+        self.span = 0.0
+
+    def add(self, time, dt, value):
+        """Add a sample held for dt seconds, ending at time."""
+        weighted = value * dt
+        self.samples.append((time, dt, weighted))
+        self.sum += weighted
+        self.span += dt
+        if self.extremes:
+            minima = self.minima
+            while minima and minima[-1][1] >= value:
+                minima.pop()
+            minima.append((time, value))
+            maxima = self.maxima
+            while maxima and maxima[-1][1] <= value:
+                maxima.pop()
+            maxima.append((time, value))
+
+        self.trim(time)
+
+    def trim(self, time):
+        """Drop samples that left the window at time."""
+        start = time - self.duration
+        samples = self.samples
+        while samples and samples[0][0] <= start:
+            _, dt, weighted = samples.popleft()
+            self.sum -= weighted
+            self.span -= dt
+        if not samples:
+            # No rounding residue of the running sums in an empty window
+            self.sum = 0.0
+            self.span = 0.0
+        if self.extremes:
+            while self.minima and self.minima[0][0] <= start:
+                self.minima.popleft()
+            while self.maxima and self.maxima[0][0] <= start:
+                self.maxima.popleft()
+
+    @property
+    def mean(self):
+        return self.sum / self.span if self.span > 0 else 0.0
+
+    @property
+    def minimum(self):
+        return self.minima[0][1] if self.minima else 0.0
+
+    @property
+    def maximum(self):
+        return self.maxima[0][1] if self.maxima else 0.0
+
+
+class DutyWindow:
+    """Fractions of time a number of conditions held over a sliding window.
+
+    One deque of samples with a bit per condition, and a running sum of
+    time per condition.
+
+    Args:
+        duration (float): Window length in seconds.
+        count (int): Number of conditions.
+    """
+    def __init__(self, duration, count):
+        self.duration = duration
+        self.samples = deque()
+        self.times = [0.0] * count
+        self.span = 0.0
+
+    def clear(self):
+        """Drop all samples."""
+        self.samples.clear()
+        self.times = [0.0] * len(self.times)
+        self.span = 0.0
+
+    def add(self, time, dt, flags):
+        """Add a sample held for dt seconds, ending at time.
+
+        Args:
+            time (float): Time at the end of the sample in seconds.
+            dt (float): Sample duration in seconds.
+            flags (int): Bit i set if condition i held.
+        """
+        self.samples.append((time, dt, flags))
+        self.span += dt
+        times = self.times
+        condition = 0
+        while flags >> condition:
+            if flags >> condition & 1:
+                times[condition] += dt
+            condition += 1
+
+        start = time - self.duration
+        samples = self.samples
+        while samples[0][0] <= start:
+            _, dt, flags = samples.popleft()
+            self.span -= dt
+            condition = 0
+            while flags >> condition:
+                if flags >> condition & 1:
+                    times[condition] -= dt
+                condition += 1
+
+    def fraction(self, condition):
+        """Return fraction of the window the condition held, 0 to 1."""
+        if self.span <= 0:
+            return 0.0
+        return max(0.0, min(1.0, self.times[condition] / self.span))
+
+
+class LapStats:
+    """Running totals of input statistics over one lap."""
+    def __init__(self):
+        self.time = 0.0
+        self.overlap_time = 0.0
+        self.full_throttle_time = 0.0
+        self.ffb_clip_time = 0.0
+        self.release_time = 0.0
+        self.release_travel = 0.0
+        self.release_peak = 0.0
+        self.reversals = 0
+        self.corners = 0
+        # Lap started at the line, rather than midway, e.g. after focusing the car
+        self.complete = False
+
+    @property
+    def full_throttle(self):
+        """Fraction of the lap at full throttle."""
+        return self.full_throttle_time / self.time if self.time > 0 else 0.0
+
+    @property
+    def ffb_clip(self):
+        """Fraction of the lap with clipping force feedback."""
+        return self.ffb_clip_time / self.time if self.time > 0 else 0.0
+
+    @property
+    def release_rate(self):
+        """Mean brake release rate while releasing, in pedal travel per second."""
+        return self.release_travel / self.release_time if self.release_time > 0 else 0.0
+
+    @property
+    def reversals_per_corner(self):
+        return self.reversals / self.corners if self.corners else 0.0
+
+
+# Conditions of the duty window
+OVERLAP = 0
+FULL_THROTTLE = 1
+FFB_CLIP = 2
+
+
+class InputStats:
+    """Online statistics of the driver inputs, per lap and over a rolling window.
+
+    Fed with the car data at the physics rate, every statistic is updated
+    in O(1) per sample:
+
+    - throttle and brake overlap: time both pedals are pressed,
+    - brake release rate: pedal travel per second while the brake is let off,
+    - full throttle: fraction of time at full throttle,
+    - steering reversals: changes of steering direction in corners,
+    - force feedback clipping: fraction of time the ffb is at or above 1.
+
+    Lap totals restart when the player car crosses the line. The rolling
+    window keeps the same statistics over the last stats_window seconds,
+    plus mean and peak force feedback. The release rate of the window is
+    averaged over the time spent releasing the brake, and reversals per
+    corner count the corners entered within the window, plus the corner
+    the car is in.
+
+    Args:
+        cfg (obj:Config): App configuration.
+    """
+    # Pedal input counted as pressed, and as fully pressed
+    pressed = 0.05
+    full = 0.98
+    # Steering angle in radians beyond which the car is taken to be in a corner,
+    # and the fraction of it below which the corner ends
+    corner_angle = 0.25
+    corner_exit = 0.5
+    # Steering change in radians against the current direction counted as a reversal
+    reversal_angle = 0.02
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.window = DutyWindow(self.cfg.stats_window, 3)
+        # Release rates, only added while releasing, over the time since the brake changed
+        self.release = RollingWindow(self.cfg.stats_window)
+        self.ffb = RollingWindow(self.cfg.stats_window)
+        self.reversal_times = deque()
+        self.corner_times = deque()
+        self.clear()
+
+    def clear(self):
+        """Start over, e.g. after switching cars or rewinding."""
+        self.time = 0.0
+        self.pending = 0.0
+        self.window.clear()
+        self.release.clear()
+        self.ffb.clear()
+        self.reversal_times.clear()
+        self.corner_times.clear()
+
+        # Brake at the last change, and the time since
+        self.brake = None
+        self.brake_dt = 0.0
+
+        # Steering extreme since the last reversal, its direction, and corner state
+        self.extreme = 0.0
+        self.direction = 0
+        self.in_corner = False
+        self.corner_time = 0.0
+
+        self.lap = LapStats()
+        self.last_lap = None
+        self.lap_count = None
+
+    def update(self, deltaT, car_data, fresh, lap_count=None):
+        """Take in the car data of a physics tick.
+
+        Args:
+            deltaT (float): Time since the previous tick in seconds.
+            car_data (obj:ACCarData): Current car data.
+            fresh (bool): Car data was read this tick. Otherwise the time
+                is added to the next sample.
+            lap_count (int): Completed laps of the car, None if unknown.
+        """
+        self.pending += deltaT
+        if not fresh:
+            return
+        dt = self.pending
+        self.pending = 0.0
+        if dt <= 0:
+            return
+        self.time += dt
+        time = self.time
+
+        if lap_count != self.lap_count:
+            if self.lap_count is not None and lap_count == self.lap_count + 1:
+                self.last_lap = self.lap
+                self.lap = LapStats()
+                self.lap.complete = True
+            else:
+                self.lap = LapStats()
+            self.lap_count = lap_count
+        lap = self.lap
+        lap.time += dt
+
+        throttle = car_data.throttle
+        brake = car_data.brake
+        ffb = car_data.ffb
+
+        flags = 0
+        if throttle > self.pressed and brake > self.pressed:
+            flags |= 1 << OVERLAP
+            lap.overlap_time += dt
+        if throttle >= self.full:
+            flags |= 1 << FULL_THROTTLE
+            lap.full_throttle_time += dt
+        if ffb >= 1:
+            flags |= 1 << FFB_CLIP
+            lap.ffb_clip_time += dt
+        self.window.add(time, dt, flags)
+        self.ffb.add(time, dt, ffb)
+
+        # Brake release rate, over the time since the brake last changed,
+        # as inputs may be read less often than every tick
+        self.brake_dt += dt
+        if self.brake is None:
+            self.brake = brake
+            self.brake_dt = 0.0
+        elif brake != self.brake:
+            if brake < self.brake:
+                travel = self.brake - brake
+                rate = travel / self.brake_dt
+                lap.release_travel += travel
+                lap.release_time += self.brake_dt
+                if rate > lap.release_peak:
+                    lap.release_peak = rate
+                self.release.add(time, self.brake_dt, rate)
+            self.brake = brake
+            self.brake_dt = 0.0
+        self.release.trim(time)
+
+        self.update_steering(time, car_data.steering)
+
+        start = time - self.cfg.stats_window
+        for times in (self.reversal_times, self.corner_times):
+            while times and times[0] <= start:
+                times.popleft()
+
+    def update_steering(self, time, steering):
+        """Count corners and steering reversals within corners.
+
+        Args:
+            time (float): Stats clock in seconds.
+            steering (float): Steering angle in radians.
+        """
+        magnitude = abs(steering)
+        if not self.in_corner and magnitude > self.corner_angle:
+            self.in_corner = True
+            self.corner_time = time
+            self.corner_times.append(time)
+            self.lap.corners += 1
+        elif self.in_corner and magnitude < self.corner_angle * self.corner_exit:
+            self.in_corner = False
+
+        # Direction changes by more than the reversal angle from the last extreme
+        if self.direction >= 0:
+            if steering > self.extreme:
+                self.extreme = steering
+            elif self.extreme - steering > self.reversal_angle:
+                if self.direction and self.in_corner:
+                    self.reversal(time)
+                self.direction = -1
+                self.extreme = steering
+        if self.direction < 0:
+            if steering < self.extreme:
+                self.extreme = steering
+            elif steering - self.extreme > self.reversal_angle:
+                if self.in_corner:
+                    self.reversal(time)
+                self.direction = 1
+                self.extreme = steering
+
+    def reversal(self, time):
+        self.lap.reversals += 1
+        self.reversal_times.append(time)
+
+    @property
+    def overlap(self):
+        """Fraction of the rolling window with throttle and brake overlap."""
+        return self.window.fraction(OVERLAP)
+
+    @property
+    def full_throttle(self):
+        """Fraction of the rolling window at full throttle."""
+        return self.window.fraction(FULL_THROTTLE)
+
+    @property
+    def ffb_clip(self):
+        """Fraction of the rolling window with clipping force feedback."""
+        return self.window.fraction(FFB_CLIP)
+
+    @property
+    def release_rate(self):
+        """Mean brake release rate in the rolling window while releasing, per second."""
+        return self.release.mean
+
+    @property
+    def release_peak(self):
+        """Peak brake release rate in the rolling window, per second."""
+        return self.release.maximum
+
+    @property
+    def reversals(self):
+        """Steering reversals in the rolling window."""
+        return len(self.reversal_times)
+
+    @property
+    def corners(self):
+        """Corners in the rolling window, including one entered before it."""
+        corners = len(self.corner_times)
+        if self.in_corner and self.corner_time <= self.time - self.cfg.stats_window:
+            corners += 1
+        return corners
+
+    @property
+    def reversals_per_corner(self):
+        """Steering reversals per corner in the rolling window."""
+        corners = self.corners
+        return len(self.reversal_times) / corners if corners else 0.0
+
+    def describe(self, lap=None):
+        """Return a short summary of a lap, for a label.
+
+        Args:
+            lap (obj:LapStats): Lap to describe. Optional, defaults to the current lap.
+        """
+        if lap is None:
+            lap = self.lap
+        return ("Overlap {overlap:.1f}s  Full {full:.0f}%  Clip {clip:.0f}%  "
+                "Release {release:.1f}/s  Reversals {reversals:.1f}/corner").format(
+                    overlap=lap.overlap_time, full=lap.full_throttle * 100,
+                    clip=lap.ffb_clip * 100, release=lap.release_rate,
+                    reversals=lap.reversals_per_corner)
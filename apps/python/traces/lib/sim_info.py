@@ -1,3 +1,5 @@
+import os
+import sys
 import mmap
 import functools
 import ctypes
@@ -177,18 +179,42 @@ class SPageFileStatic(ctypes.Structure):
     ]
 
 class SimInfo:
-    def __init__(self):
-        self._acpmf_physics = mmap.mmap(0, ctypes.sizeof(SPageFilePhysics), "acpmf_physics")
-        self._acpmf_graphics = mmap.mmap(0, ctypes.sizeof(SPageFileGraphic), "acpmf_graphics")
-        self._acpmf_static = mmap.mmap(0, ctypes.sizeof(SPageFileStatic), "acpmf_static")
+    # Pages are the named mappings of the sim on Windows. With a directory,
+    # every page is a file of the same size and layout in that directory,
+    # which another process can fill like the sim does. Without a directory
+    # on other platforms, pages are anonymous memory.
+    def __init__(self, directory=None):
+        self._files = []
+        self._acpmf_physics = self._map(SPageFilePhysics, "acpmf_physics", directory)
+        self._acpmf_graphics = self._map(SPageFileGraphic, "acpmf_graphics", directory)
+        self._acpmf_static = self._map(SPageFileStatic, "acpmf_static", directory)
         self.physics = SPageFilePhysics.from_buffer(self._acpmf_physics)
         self.graphics = SPageFileGraphic.from_buffer(self._acpmf_graphics)
         self.static = SPageFileStatic.from_buffer(self._acpmf_static)
 
+    def _map(self, struct, tagname, directory):
+        size = ctypes.sizeof(struct)
+        if directory is None:
+            if sys.platform == "win32":
+                return mmap.mmap(0, size, tagname)
+            return mmap.mmap(-1, size)
+        path = os.path.join(directory, tagname)
+        page_file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        if os.path.getsize(path) < size:
+            page_file.truncate(size)
+        self._files.append(page_file)
+        return mmap.mmap(page_file.fileno(), size)
+
     def close(self):
+        # Structures export the mapped buffers, release them first
+        self.physics = None
+        self.graphics = None
+        self.static = None
         self._acpmf_physics.close()
         self._acpmf_graphics.close()
         self._acpmf_static.close()
+        for page_file in self._files:
+            page_file.close()
 
     def __del__(self):
         self.close()
@@ -0,0 +1,156 @@
+import time
+from array import array
+
+from ac_gl_batch import gl_stats
+from ac_gl_utils import Point
+from ac_label import ACLabel
+from color_palette import Colors
+
+
+class StageTimer:
+    """Rolling history of durations of one instrumented stage.
+
+    Args:
+        size (int): Number of most recent durations to keep.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.durations = array('f', [0.0] * size)
+        self.index = 0
+        self.count = 0
+
+    def add(self, duration):
+        """Add duration in seconds."""
+        self.durations[self.index] = duration
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+        if self.count < self.size:
+            self.count += 1
+
+    def clear(self):
+        """Drop all durations."""
+        self.index = 0
+        self.count = 0
+
+    def percentiles(self, *fractions):
+        """Return durations at given fractions (0-1) of the sorted history."""
+        if not self.count:
+            return [0.0 for _ in fractions]
+        ordered = sorted(self.durations[:self.count])
+        last = self.count - 1
+        return [ordered[int(round(fraction * last))] for fraction in fractions]
+
+
+class Profiler:
+    """Optional timing instrumentation of app callbacks and drawables.
+
+    Stages are instrumented by wrapping functions or instance methods
+    only when profiling is enabled, so there is no cost when disabled.
+
+    Args:
+        cfg (obj:Config): App configuration.
+    """
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.stages = {}
+        self.labels = []
+        self.timer_overlay = 0
+
+    def stage(self, name):
+        """Return timer of a stage, creating it on first use."""
+        timer = self.stages.get(name)
+        if timer is None:
+            timer = StageTimer(self.cfg.profiler_window)
+            self.stages[name] = timer
+        return timer
+
+    def call(self, name, func, *args):
+        """Call function and record its duration under a stage name."""
+        timer = self.stage(name)
+        start = time.perf_counter()
+        result = func(*args)
+        timer.add(time.perf_counter() - start)
+        return result
+
+    def instrument(self, obj, method, name):
+        """Replace a method of an object with a timed version.
+
+        Args:
+            obj (object): Object owning the method, e.g. a drawable.
+            method (str): Name of the method.
+            name (str): Stage name to record durations under.
+        """
+        func = getattr(obj, method)
+        timer = self.stage(name)
+        perf_counter = time.perf_counter
+
+        def timed(*args):
+            start = perf_counter()
+            result = func(*args)
+            timer.add(perf_counter() - start)
+            return result
+        setattr(obj, method, timed)
+
+    def stage_groups(self):
+        """Return stage timers grouped by stage type, sorted by type.
+
+        The type of a stage is the part of its name after the last dot,
+        e.g. all drawables share the "update" and "fill_batch" types.
+        """
+        groups = {}
+        for name, timer in self.stages.items():
+            groups.setdefault(name.rsplit(".", 1)[-1], []).append(timer)
+        return sorted(groups.items())
+
+    def setup_overlay(self, window_id):
+        """Create text labels showing stage timings on the app window.
+
+        The overlay shows one line per stage type, and as many lines
+        as fit the height of the app window.
+
+        Args:
+            window_id (obj:Renderer.id): App window to add the labels to.
+        """
+        line_height = 28 * self.cfg.app_scale
+        max_lines = max(1, int(self.cfg.app_height // line_height))
+        for i in range(min(len(self.stage_groups()) + 1, max_lines)):
+            label = ACLabel(window_id, color=Colors.yellow)
+            label.set_font_size(0.8 * line_height)
+            label.set_position(Point(self.cfg.app_height * self.cfg.app_padding,
+                                     i * line_height))
+            self.labels.append(label)
+
+    def update_overlay(self, deltaT):
+        """Refresh overlay labels twice a second.
+
+        Timings of stages of the same type are summed.
+
+        Args:
+            deltaT (float): Time delta since last call in seconds.
+        """
+        if not self.labels:
+            return
+        self.timer_overlay += deltaT
+        if self.timer_overlay < 0.5:
+            return
+        self.timer_overlay = 0
+
+        self.labels[0].set_text("GL vertices/frame {}  glBegin/frame {}".format(
+            gl_stats.last_vertices, gl_stats.last_begins))
+        for label, (stage_type, timers) in zip(self.labels[1:], self.stage_groups()):
+            p50 = p99 = 0.0
+            for timer in timers:
+                timer_p50, timer_p99 = timer.percentiles(0.5, 0.99)
+                p50 += timer_p50
+                p99 += timer_p99
+            label.set_text("{} x{} p50 {:.0f} us  p99 {:.0f} us".format(
+                stage_type, len(timers), p50 * 1e6, p99 * 1e6))
+
+    def summary(self):
+        """Return multi-line text with p50/p99 of every stage."""
+        lines = []
+        for name, timer in sorted(self.stages.items()):
+            p50, p99 = timer.percentiles(0.5, 0.99)
+            lines.append("{}: p50 {:.1f} us, p99 {:.1f} us".format(name, p50 * 1e6, p99 * 1e6))
+        return "\n".join(lines)
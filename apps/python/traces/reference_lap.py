@@ -0,0 +1,140 @@
+from array import array
+
+
+class ReferenceLap:
+    """Input channels of the best lap, binned by position on track.
+
+    While driving, the values of all channels are written into a table
+    with one bin per fraction of the lap, indexed by normalized car
+    position. When a lap is completed and it is the new best lap, the
+    table of that lap is swapped in as reference and the table of the
+    previous reference is reused for the next lap. Bins the car skipped
+    between two samples are filled by linear interpolation once, on
+    completion of the lap. Lookups take constant time.
+
+    Args:
+        channel_count (int): Number of channels per sample.
+        bins (int): Number of position bins per lap.
+        min_coverage (float): Fraction of bins that must have been recorded
+            for a lap to be used as reference, which rejects out laps
+            and laps joined halfway. Optional, defaults to 0.9.
+    """
+    def __init__(self, channel_count, bins, min_coverage=0.9):
+        self.channel_count = channel_count
+        self.bins = bins
+        self.min_coverage = min_coverage
+
+        # Table of the lap being driven, with a flag per recorded bin,
+        # and table of the reference lap
+        self.lap = self.new_table()
+        self.recorded = array('B', bytes(bins))
+        self.recorded_count = 0
+        self.best = self.new_table()
+        self.has_best = False
+
+        # Lap count and best lap time seen last, in ms
+        self.completed_laps = None
+        self.best_time = 0
+
+    def new_table(self):
+        """Allocate one array of bins per channel."""
+        return [array('f', bytes(4 * self.bins)) for _ in range(self.channel_count)]
+
+    def bin(self, position):
+        """Return bin index of a normalized position on track."""
+        index = int(position * self.bins)
+        if index < 0:
+            return 0
+        if index >= self.bins:
+            return self.bins - 1
+        return index
+
+    def clear_lap(self):
+        """Discard the recording of the lap being driven."""
+        for i in range(self.bins):
+            self.recorded[i] = 0
+        self.recorded_count = 0
+
+    def update(self, ac_global_data, values):
+        """Record channel values at the current position on track.
+
+        Checks for a completed lap first, so that values recorded right
+        after crossing the line go into the table of the new lap.
+
+        Args:
+            ac_global_data (obj:ACGlobalData): Lap count, times and position.
+            values (sequence): Value of every channel.
+        """
+        completed_laps = ac_global_data.completed_laps
+        if completed_laps != self.completed_laps:
+            if self.completed_laps is not None and completed_laps == self.completed_laps + 1:
+                self.complete_lap(ac_global_data.last_time, ac_global_data.best_time)
+            else:
+                # Session restart or jump in a replay
+                self.clear_lap()
+            self.completed_laps = completed_laps
+
+        index = self.bin(ac_global_data.lap_position)
+        for channel, value in zip(self.lap, values):
+            channel[index] = value
+        if not self.recorded[index]:
+            self.recorded[index] = 1
+            self.recorded_count += 1
+
+    def complete_lap(self, last_time, best_time):
+        """Swap in the recorded lap if it improved the best lap time.
+
+        Args:
+            last_time (int): Time of the completed lap in ms.
+            best_time (int): Best lap time of the session in ms.
+        """
+        improved = (0 < best_time and last_time == best_time
+                    and (not self.has_best or best_time < self.best_time))
+        if improved and self.recorded_count >= self.min_coverage * self.bins:
+            self.fill_gaps()
+            self.lap, self.best = self.best, self.lap
+            self.best_time = best_time
+            self.has_best = True
+        self.clear_lap()
+
+    def fill_gaps(self):
+        """Fill bins that weren't recorded by interpolating their neighbours.
+
+        Gaps at the start or end of the lap take the nearest recorded value.
+        """
+        recorded = self.recorded
+        bins = self.bins
+        previous = None
+        for i in range(bins):
+            if not recorded[i]:
+                continue
+            start = 0 if previous is None else previous + 1
+            for channel in self.lap:
+                first = channel[i] if previous is None else channel[previous]
+                span = i - start + 1
+                for j in range(start, i):
+                    channel[j] = first + (channel[i] - first) * (j - start + 1) / span
+            previous = i
+        if previous is not None:
+            for channel in self.lap:
+                for j in range(previous + 1, bins):
+                    channel[j] = channel[previous]
+
+    def value(self, channel, position):
+        """Return reference value of a channel at a normalized position.
+
+        Interpolates linearly between the two nearest bins.
+
+        Args:
+            channel (int): Channel index.
+            position (float): Normalized position on track, 0 to 1.
+        """
+        values = self.best[channel]
+        x = position * self.bins - 0.5
+        index = int(x)
+        if x <= 0:
+            return values[0]
+        if index >= self.bins - 1:
+            return values[self.bins - 1]
+        value = values[index]
+        return value + (values[index + 1] - value) * (x - index)
@@ -0,0 +1,54 @@
+class Scheduler:
+    """Decide whether the periodic app work should run.
+
+    Work is suspended while the app window is hidden, and while the sim
+    is not running (off, paused or a paused replay). When the app window
+    is shown again after being hidden, a reset is requested, as the data
+    of the drawables gathered before hiding is outdated. Work that has to
+    follow sim time without gaps, such as recording, can keep going
+    while hidden by checking sim_tick on its own.
+
+    Args:
+        ac_global_data (obj:ACGlobalData): Object to retrieve Assetto Corsa
+            data that is non-car specific.
+        track_visibility (bool): Suspend work while the app window is hidden.
+            Optional, defaults to True. Off when the output of the app is
+            not the app window, e.g. while streaming to a viewer.
+    """
+    def __init__(self, ac_global_data, track_visibility=True):
+        self.ac_global_data = ac_global_data
+        self.track_visibility = track_visibility
+
+        self.visible = True
+        self.running = True
+        self.reset_pending = False
+
+    def on_activated(self):
+        """Handle app window being shown."""
+        if not self.visible and self.track_visibility:
+            self.reset_pending = True
+        self.visible = True
+
+    def on_dismissed(self):
+        """Handle app window being hidden."""
+        self.visible = False
+
+    def tick(self):
+        """Check whether to run the work of this physics tick.
+
+        Returns:
+            bool: True if the app should update.
+        """
+        if not self.visible and self.track_visibility:
+            return False
+        return self.sim_tick()
+
+    def sim_tick(self):
+        """Check whether sim time runs this physics tick, whether hidden or not.
+
+        Returns:
+            bool: True if the sim is running.
+        """
+        self.ac_global_data.update_status()
+        self.running = self.ac_global_data.sim_running()
+        return self.running
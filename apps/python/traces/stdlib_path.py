@@ -0,0 +1,27 @@
+import os
+import sys
+import platform
+
+# Import Assetto Corsa shared memory library.
+# It has a dependency on ctypes, which is not included in AC python version.
+# Point to correct ctypes module based on platform architecture.
+
+
+def add_stdlib_path():
+    """Put the standard library modules shipped with the app on sys.path.
+
+    Must be called before importing ctypes or lib.sim_info. Adds the
+    directory matching the platform architecture once, later calls do
+    nothing.
+    """
+    # First, get directory of the app, then add correct folder to sys.path.
+    app_dir = os.path.dirname(__file__)
+    if platform.architecture()[0] == "64bit":
+        sysdir = os.path.join(app_dir, 'dll', 'stdlib64')
+    else:
+        sysdir = os.path.join(app_dir, 'dll', 'stdlib')
+    if sysdir in sys.path:
+        return
+    # Python looks in sys.path for modules to load, insert new dir first in line.
+    sys.path.insert(0, sysdir)
+    os.environ['PATH'] = os.environ['PATH'] + ";."
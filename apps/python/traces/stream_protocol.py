@@ -0,0 +1,108 @@
+import struct
+
+# Wire format of the sample stream to an out-of-process viewer.
+# Every datagram holds a header followed by a batch of samples,
+# all little-endian:
+#
+#   header  magic (4s), version (B), sample count (B),
+#           trace sample rate in Hz (H), datagram sequence number (I)
+#   sample  flags (B), clutch, normalized steering, throttle, brake (4 x H),
+#           steering angle in mrad (h), ffb (H), speed in 0.01 km/h (H),
+#           gear (b)
+#
+# Pedals and normalized steering are scaled from 0-1 to 0-65535, ffb from
+# 0-2 to 0-65535, so clipping above 1 still shows. Viewers drop datagrams
+# with an unknown magic or version. Sequence numbers let the viewer count
+# lost datagrams.
+
+MAGIC = b"TRST"
+VERSION = 1
+
+HEADER = struct.Struct("<4sBBHI")
+SAMPLE = struct.Struct("<BHHHHhHHb")
+
+# Sample flags.
+# GRID samples are on the trace time grid and go into the traces,
+# other samples only update the pedal bars, ffb bar and wheel.
+# CLEAR empties the traces before the sample is applied.
+GRID = 1
+CLEAR = 2
+
+# Samples per datagram, bounded by the one byte sample count
+MAX_SAMPLES = 255
+
+UNIT_SCALE = 65535
+FFB_SCALE = 65535 / 2
+
+
+def _scale(value, scale, limit):
+    """Quantize value to an unsigned integer, clamped at 0 and limit."""
+    q = int(value * scale + 0.5)
+    if q < 0:
+        return 0
+    if q > limit:
+        return limit
+    return q
+
+
+def pack_sample(buffer, offset, flags, clutch, steering_normalized, throttle,
+                brake, steering, ffb, speed_kmh, gear):
+    """Pack one sample into a buffer.
+
+    Args:
+        buffer (bytearray): Datagram buffer.
+        offset (int): Byte offset of the sample.
+        flags (int): GRID and CLEAR flags.
+        clutch, steering_normalized, throttle, brake (float): 0-1.
+        steering (float): Steering angle in radians.
+        ffb (float): Force feedback, clipped at 2.
+        speed_kmh (float): Speed in km/h.
+        gear (int): Gear, 0 is reverse, 1 neutral.
+    """
+    steering_mrad = int(round(steering * 1000))
+    if steering_mrad > 32767:
+        steering_mrad = 32767
+    elif steering_mrad < -32767:
+        steering_mrad = -32767
+    SAMPLE.pack_into(buffer, offset, flags,
+                     _scale(clutch, UNIT_SCALE, 65535),
+                     _scale(steering_normalized, UNIT_SCALE, 65535),
+                     _scale(throttle, UNIT_SCALE, 65535),
+                     _scale(brake, UNIT_SCALE, 65535),
+                     steering_mrad,
+                     _scale(ffb, FFB_SCALE, 65535),
+                     _scale(speed_kmh, 100, 65535),
+                     max(-128, min(127, gear)))
+
+
+def decode_datagram(data):
+    """Decode a datagram of the sample stream.
+
+    Args:
+        data (bytes): Received datagram.
+
+    Returns:
+        tuple: Sequence number, trace sample rate and a list of samples as
+            (flags, clutch, steering_normalized, throttle, brake,
+            steering, ffb, speed_kmh, gear).
+
+    Raises:
+        ValueError: Not a datagram of a supported version, or truncated.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("datagram too short")
+    magic, version, count, rate, sequence = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("unsupported datagram, version {}".format(version))
+    if len(data) < HEADER.size + count * SAMPLE.size:
+        raise ValueError("datagram truncated")
+    samples = []
+    offset = HEADER.size
+    for _ in range(count):
+        (flags, clutch, steering_normalized, throttle, brake,
+         steering, ffb, speed, gear) = SAMPLE.unpack_from(data, offset)
+        samples.append((flags, clutch / UNIT_SCALE, steering_normalized / UNIT_SCALE,
+                        throttle / UNIT_SCALE, brake / UNIT_SCALE, steering / 1000,
+                        ffb / FFB_SCALE, speed / 100, gear))
+        offset += SAMPLE.size
+    return sequence, rate, samples
@@ -0,0 +1,80 @@
+import socket
+
+from stream_protocol import MAGIC, VERSION, HEADER, SAMPLE, MAX_SAMPLES
+from stream_protocol import CLEAR, pack_sample
+
+
+class SampleStreamer:
+    """Non-blocking sender of sample batches to an out-of-process viewer.
+
+    Samples are packed straight into a preallocated datagram buffer.
+    A full batch is sent as one UDP datagram to the viewer on localhost.
+    The socket never blocks: when its bounded send buffer is full, or no
+    viewer is listening, the datagram is dropped and counted.
+
+    Args:
+        cfg (obj:Config): App configuration.
+    """
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.address = ("127.0.0.1", self.cfg.stream_port)
+        self.batch_size = max(1, min(MAX_SAMPLES, self.cfg.stream_batch))
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.cfg.stream_send_buffer)
+        self.socket.setblocking(False)
+
+        self.buffer = bytearray(HEADER.size + self.batch_size * SAMPLE.size)
+        self.count = 0
+        self.sequence = 0
+        # Flags to add to the next sample
+        self.pending_flags = 0
+
+        self.datagrams_sent = 0
+        self.datagrams_dropped = 0
+
+    def clear(self):
+        """Have the viewer empty its traces before the next sample."""
+        self.pending_flags |= CLEAR
+
+    def add(self, flags, car_data, sample=None):
+        """Add a sample, sending the batch once it is full.
+
+        Args:
+            flags (int): stream_protocol.GRID for samples on the trace grid.
+            car_data (obj:ACCarData): Current car data.
+            sample (sequence): Clutch, normalized steering, throttle and brake
+                on the trace grid. Optional, taken from car_data by default.
+        """
+        if sample is None:
+            sample = (car_data.clutch, car_data.steering_normalized,
+                      car_data.throttle, car_data.brake)
+        pack_sample(self.buffer, HEADER.size + self.count * SAMPLE.size,
+                    flags | self.pending_flags,
+                    sample[0], sample[1], sample[2], sample[3],
+                    car_data.steering, car_data.ffb, car_data.speed_kmh, car_data.gear)
+        self.pending_flags = 0
+        self.count += 1
+        if self.count == self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Send the samples added so far as one datagram."""
+        if not self.count:
+            return
+        HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, self.count,
+                         self.cfg.trace_sample_rate, self.sequence & 0xFFFFFFFF)
+        size = HEADER.size + self.count * SAMPLE.size
+        self.sequence += 1
+        self.count = 0
+        try:
+            self.socket.sendto(memoryview(self.buffer)[:size], self.address)
+            self.datagrams_sent += 1
+        except (BlockingIOError, OSError):
+            # Send buffer full or no viewer listening
+            self.datagrams_dropped += 1
+
+    def close(self):
+        """Send remaining samples and close the socket."""
+        self.flush()
+        self.socket.close()
@@ -0,0 +1,271 @@
+import sys
+import math
+import mmap
+import bisect
+from array import array
+
+from telemetry_recorder import FILE_MAGIC, CHUNK_MAGIC, FORMAT_VERSION
+from telemetry_recorder import FILE_HEADER, COLUMN_HEADER, CHUNK_HEADER
+from telemetry_recorder import padded_size
+
+# Steering lock used to express recorded steering angles as the
+# normalized steering input of the shared memory physics page.
+REPLAY_STEERING_LOCK = 450.0
+
+
+class TelemetryReader:
+    """Memory-mapped reader of recorded session telemetry.
+
+    Opening a file only reads the file header and hops over the chunk
+    headers to build a sparse index of row, time and lap ranges per chunk.
+    Column data is exposed as memoryviews into the mapped file, without
+    copying. Files are little-endian, on big-endian hosts columns are
+    byteswapped copies instead. Seeking by time or lap is a binary search over the chunk
+    index followed by a binary search within one chunk.
+
+    Args:
+        path (str): Path to a file written by TelemetryRecorder.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+
+        magic, version, column_count = FILE_HEADER.unpack_from(self.map, 0)
+        if magic != FILE_MAGIC or version != FORMAT_VERSION:
+            raise ValueError("{} is not a supported telemetry file".format(path))
+
+        # Column names, typecodes, scales and byte offsets within a chunk
+        self.columns = {}
+        self.column_names = []
+        offset = FILE_HEADER.size
+        for i in range(column_count):
+            name, typecode, scale = COLUMN_HEADER.unpack_from(self.map, offset)
+            name = name.rstrip(b"\0").decode("ascii")
+            typecode = typecode.decode("ascii")
+            self.columns[name] = (i, typecode, array(typecode).itemsize, scale)
+            self.column_names.append(name)
+            offset += COLUMN_HEADER.size
+
+        # Sparse chunk index
+        self.chunk_offsets = []
+        self.chunk_rows = []
+        self.chunk_first_row = []
+        self.chunk_first_time = []
+        self.chunk_last_time = []
+        self.chunk_first_lap = []
+        self.chunk_last_lap = []
+        self.rows = 0
+        self.build_index(offset)
+
+        # Column views created so far, by column name and chunk index
+        self.views = {}
+
+    def build_index(self, offset):
+        """Hop over the chunk headers, from a byte offset to the end of the file.
+
+        An incomplete chunk at the end, e.g. after a crash, is ignored.
+        """
+        size = len(self.map)
+        while offset + CHUNK_HEADER.size <= size:
+            magic, rows, first_time, last_time, first_lap, last_lap = \
+                CHUNK_HEADER.unpack_from(self.map, offset)
+            if magic != CHUNK_MAGIC:
+                break
+            chunk_size = CHUNK_HEADER.size
+            for name in self.column_names:
+                chunk_size += padded_size(rows * self.columns[name][2])
+            if offset + chunk_size > size:
+                break
+            self.chunk_offsets.append(offset)
+            self.chunk_rows.append(rows)
+            self.chunk_first_row.append(self.rows)
+            self.chunk_first_time.append(first_time)
+            self.chunk_last_time.append(last_time)
+            self.chunk_first_lap.append(first_lap)
+            self.chunk_last_lap.append(last_lap)
+            self.rows += rows
+            offset += chunk_size
+
+    def __len__(self):
+        return self.rows
+
+    def close(self):
+        """Release the mapping and close the file."""
+        for view in self.views.values():
+            if isinstance(view, memoryview):
+                view.release()
+        self.views.clear()
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+    def column(self, name, chunk):
+        """Return zero-copy view on the raw values of a column in a chunk.
+
+        Args:
+            name (str): Column name.
+            chunk (int): Chunk index.
+
+        Returns:
+            memoryview: Raw, unscaled column values. An array copy
+                in native byte order on big-endian hosts.
+        """
+        view = self.views.get((name, chunk))
+        if view is None:
+            index, typecode, itemsize, scale = self.columns[name]
+            rows = self.chunk_rows[chunk]
+            offset = self.chunk_offsets[chunk] + CHUNK_HEADER.size
+            for other in self.column_names[:index]:
+                offset += padded_size(rows * self.columns[other][2])
+            view = self.view[offset:offset + rows * itemsize]
+            if sys.byteorder == "little":
+                view = view.cast(typecode)
+            else:
+                view = array(typecode, view.tobytes())
+                view.byteswap()
+            self.views[(name, chunk)] = view
+        return view
+
+    def locate(self, row):
+        """Return chunk index and row within chunk of a file row."""
+        chunk = bisect.bisect_right(self.chunk_first_row, row) - 1
+        return chunk, row - self.chunk_first_row[chunk]
+
+    def value(self, name, row):
+        """Return scaled value of a column at a file row."""
+        chunk, chunk_row = self.locate(row)
+        scale = self.columns[name][3]
+        return self.column(name, chunk)[chunk_row] / scale
+
+    def seek_time(self, time_ms):
+        """Return first row at or after a time since start of recording.
+
+        Args:
+            time_ms (int): Time in milliseconds.
+        """
+        chunk = bisect.bisect_left(self.chunk_last_time, time_ms)
+        if chunk >= len(self.chunk_offsets):
+            return max(0, self.rows - 1)
+        times = self.column("time_ms", chunk)
+        return self.chunk_first_row[chunk] + bisect.bisect_left(times, time_ms)
+
+    def seek_lap(self, lap):
+        """Return first row of a lap, or the last row if the lap isn't recorded.
+
+        Args:
+            lap (int): Lap number, as completed laps count.
+        """
+        chunk = bisect.bisect_left(self.chunk_last_lap, lap)
+        if chunk >= len(self.chunk_offsets):
+            return max(0, self.rows - 1)
+        laps = self.column("lap", chunk)
+        return self.chunk_first_row[chunk] + bisect.bisect_left(laps, lap)
+
+
+class _Page:
+    """Attribute container standing in for a shared memory page."""
+    pass
+
+
+class ReplaySource:
+    """Play back recorded telemetry as a stand-in for the AC data sources.
+
+    Offers getCarState and getFocusedCar like the ac module, and
+    physics and graphics pages like lib.sim_info.info, fed from a
+    recording instead of the sim.
+
+    Args:
+        reader (obj:TelemetryReader): Recording to play back.
+        cs (class): acsys.CS, for the car state identifiers.
+            Optional, imported from acsys by default.
+    """
+    def __init__(self, reader, cs=None):
+        if cs is None:
+            import acsys
+            cs = acsys.CS
+        self.reader = reader
+        self.cs = cs
+
+        self.time = 0.0
+        self.row = 0
+        self.state = {}
+
+        self.physics = _Page()
+        self.physics.packetId = 0
+        self.graphics = _Page()
+        self.graphics.status = 2  # AC_LIVE
+        self.load_row()
+
+    def seek_time(self, seconds):
+        """Jump to a time since start of the recording."""
+        self.time = seconds
+        self.row = self.reader.seek_time(int(seconds * 1000))
+        self.load_row()
+
+    def seek_lap(self, lap):
+        """Jump to the start of a lap."""
+        self.row = self.reader.seek_lap(lap)
+        self.time = self.reader.value("time_ms", self.row) / 1000
+        self.load_row()
+
+    def advance(self, deltaT):
+        """Move playback forward.
+
+        Args:
+            deltaT (float): Time step in seconds.
+        """
+        self.time += deltaT
+        reader = self.reader
+        time_ms = self.time * 1000
+        row = self.row
+        while row + 1 < len(reader) and reader.value("time_ms", row + 1) <= time_ms:
+            row += 1
+        if row != self.row:
+            self.row = row
+            self.load_row()
+
+    def load_row(self):
+        """Load values of the current row into the car state and pages."""
+        reader = self.reader
+        if not len(reader):
+            return
+        row = self.row
+        cs = self.cs
+        value = reader.value
+        steering_deg = value("steering", row) * 180 / math.pi
+        speed = value("speed", row)
+        self.state = {
+            cs.Gas: value("throttle", row),
+            cs.Brake: value("brake", row),
+            cs.Clutch: 1 - value("clutch", row),
+            cs.Steer: steering_deg,
+            cs.LastFF: value("ffb", row),
+            cs.Gear: int(value("gear", row)),
+            cs.SpeedKMH: speed,
+            cs.SpeedMPH: speed * 0.621371,
+        }
+
+        physics = self.physics
+        physics.packetId += 1
+        physics.gas = self.state[cs.Gas]
+        physics.brake = self.state[cs.Brake]
+        physics.clutch = self.state[cs.Clutch]
+        physics.steerAngle = steering_deg / REPLAY_STEERING_LOCK
+        physics.finalFF = self.state[cs.LastFF]
+        physics.gear = self.state[cs.Gear]
+        physics.speedKmh = speed
+
+        graphics = self.graphics
+        graphics.replayTimeMultiplier = value("time_multiplier", row)
+        graphics.normalizedCarPosition = value("lap_position", row)
+        graphics.completedLaps = int(value("lap", row))
+
+    def getCarState(self, car_id, info, *args):
+        """Stand-in for ac.getCarState, for the recorded car only."""
+        return self.state.get(info, 0)
+
+    def getFocusedCar(self):
+        """Stand-in for ac.getFocusedCar."""
+        return 0
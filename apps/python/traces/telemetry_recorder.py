@@ -0,0 +1,269 @@
+import os
+import sys
+import queue
+import struct
+import threading
+from array import array
+
+# Session telemetry file format.
+#
+# All values are little-endian. A file starts with a header, followed by
+# a description of every column, followed by any number of chunks:
+#
+#   header:  magic "TRCS", format version (u16), column count (u16)
+#   column:  name (16 bytes, ascii, null padded), array typecode (1 byte),
+#            padding (3 bytes), scale (f32)
+#   chunk:   magic "CHNK", row count (u32), first time ms (u32),
+#            last time ms (u32), first lap (u32), last lap (u32),
+#            followed by the values of every column for all rows,
+#            each column padded to a multiple of 8 bytes.
+#
+# Stored values are the recorded value multiplied by the column scale,
+# which quantizes pedal inputs to 16 bits. Speed is always stored in km/h.
+# With input statistics enabled, the rolling statistics follow as extra
+# columns, quantizing fractions of time to 16 bits, and then the running
+# totals of the current lap. The last row of a lap holds its totals.
+
+FILE_MAGIC = b"TRCS"
+CHUNK_MAGIC = b"CHNK"
+FORMAT_VERSION = 1
+
+# Longest column name, in bytes
+COLUMN_NAME_SIZE = 16
+
+FILE_HEADER = struct.Struct("<4sHH")
+COLUMN_HEADER = struct.Struct("<{}sc3xf".format(COLUMN_NAME_SIZE))
+CHUNK_HEADER = struct.Struct("<4sIIIII")
+
+PEDAL_SCALE = 65535.0
+MPH_TO_KMH = 1.609344
+
+# Column name, array typecode, scale
+COLUMNS = (
+    ("time_ms", "I", 1.0),
+    ("throttle", "H", PEDAL_SCALE),
+    ("brake", "H", PEDAL_SCALE),
+    ("clutch", "H", PEDAL_SCALE),
+    ("steering", "f", 1.0),
+    ("ffb", "f", 1.0),
+    ("gear", "b", 1.0),
+    ("speed", "f", 1.0),
+    ("time_multiplier", "f", 1.0),
+    ("lap_position", "f", 1.0),
+    ("lap", "H", 1.0),
+)
+
+# Rolling input statistics and lap totals: column name, array typecode, scale
+STATS_COLUMNS = (
+    ("overlap", "H", PEDAL_SCALE),
+    ("full_throttle", "H", PEDAL_SCALE),
+    ("ffb_clip", "H", PEDAL_SCALE),
+    ("ffb_mean", "f", 1.0),
+    ("ffb_peak", "f", 1.0),
+    ("release_peak", "f", 1.0),
+    ("reversals", "H", 1.0),
+    ("release_rate", "f", 1.0),
+    ("corners", "H", 1.0),
+    ("lap_overlap", "f", 1.0),
+    ("lap_full", "H", PEDAL_SCALE),
+    ("lap_ffb_clip", "H", PEDAL_SCALE),
+    ("lap_release_rate", "f", 1.0),
+    ("lap_reversals", "H", 1.0),
+    ("lap_corners", "H", 1.0),
+)
+
+
+def padded_size(size):
+    """Round byte size up to a multiple of 8."""
+    return (size + 7) & ~7
+
+
+class TelemetryRecorder:
+    """Record session telemetry to a compact columnar binary file.
+
+    Samples are written into preallocated array chunks. Full chunks are
+    handed to a background thread through a bounded queue, which writes
+    them to disk. Recording never blocks the caller: when the disk can't
+    keep up and the queue is full, the full chunk is dropped and reused,
+    and the number of dropped rows is counted. Rows dropped by the caller
+    and rows the writer thread failed to write are counted separately,
+    so each counter is only ever changed by one thread.
+
+    Args:
+        cfg (obj:Config): App configuration.
+        path (str): File path to record to.
+        stats (obj:InputStats): Input statistics to record. Optional.
+    """
+    def __init__(self, cfg, path, stats=None):
+        self.cfg = cfg
+        self.path = path
+        self.chunk_rows = self.cfg.recorder_chunk_rows
+        self.stats = stats
+        self.columns = COLUMNS + (STATS_COLUMNS if stats is not None else ())
+        for name, typecode, scale in self.columns:
+            # Longer names would be cut silently by the column header
+            if len(name.encode("ascii")) > COLUMN_NAME_SIZE:
+                raise ValueError("column name {} is longer than {} bytes".format(
+                    name, COLUMN_NAME_SIZE))
+
+        self.rows_recorded = 0
+        self.rows_discarded = 0
+        self.rows_failed = 0
+        # Session time of the next sample, in sim time rather than wall clock
+        self.time = None
+
+        # Chunks waiting to be written, and written chunks ready for reuse.
+        # Together with the chunk being filled, at most queue size + 2 chunks exist.
+        self.write_queue = queue.Queue(maxsize=self.cfg.recorder_queue_size)
+        self.free_chunks = queue.Queue()
+        self.chunk = self.new_chunk()
+        self.row = 0
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.file = open(self.path, "wb")
+        self.write_header()
+
+        self.thread = threading.Thread(target=self.writer, name="TracesRecorder")
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def rows_dropped(self):
+        """Number of rows that did not make it to disk."""
+        return self.rows_discarded + self.rows_failed
+
+    def new_chunk(self):
+        """Allocate arrays for one chunk of every column."""
+        return [array(typecode, bytes(array(typecode).itemsize * self.chunk_rows))
+                for name, typecode, scale in self.columns]
+
+    def write_header(self):
+        """Write file header and column descriptions."""
+        self.file.write(FILE_HEADER.pack(FILE_MAGIC, FORMAT_VERSION, len(self.columns)))
+        for name, typecode, scale in self.columns:
+            self.file.write(COLUMN_HEADER.pack(name.encode("ascii"), typecode.encode("ascii"), scale))
+
+    def record(self, deltaT, ac_car_data, ac_global_data):
+        """Add one sample to the recording.
+
+        Sample times add up the time deltas of the app updates rather than
+        reading the wall clock, so they follow the clock the traces are
+        updated with.
+
+        Args:
+            deltaT (float): Time since the previous sample in seconds,
+                ignored for the first sample.
+            ac_car_data (obj:ACCarData): Car data to record.
+            ac_global_data (obj:ACGlobalData): Global data to record.
+        """
+        if self.time is None:
+            self.time = 0.0
+        else:
+            self.time += deltaT
+
+        chunk = self.chunk
+        row = self.row
+        chunk[0][row] = int(self.time * 1000)
+        chunk[1][row] = int(min(1, max(0, ac_car_data.throttle)) * PEDAL_SCALE)
+        chunk[2][row] = int(min(1, max(0, ac_car_data.brake)) * PEDAL_SCALE)
+        chunk[3][row] = int(min(1, max(0, ac_car_data.clutch)) * PEDAL_SCALE)
+        chunk[4][row] = ac_car_data.steering
+        chunk[5][row] = ac_car_data.ffb
+        chunk[6][row] = max(-128, min(127, ac_car_data.gear))
+        if self.cfg.use_kmh:
+            chunk[7][row] = ac_car_data.speed
+        else:
+            chunk[7][row] = ac_car_data.speed * MPH_TO_KMH
+        chunk[8][row] = ac_global_data.replay_time_multiplier
+        chunk[9][row] = ac_global_data.lap_position
+        chunk[10][row] = min(65535, ac_global_data.completed_laps)
+
+        stats = self.stats
+        if stats is not None:
+            chunk[11][row] = int(stats.overlap * PEDAL_SCALE)
+            chunk[12][row] = int(stats.full_throttle * PEDAL_SCALE)
+            chunk[13][row] = int(stats.ffb_clip * PEDAL_SCALE)
+            chunk[14][row] = stats.ffb.mean
+            chunk[15][row] = stats.ffb.maximum
+            chunk[16][row] = stats.release_peak
+            chunk[17][row] = min(65535, stats.reversals)
+            chunk[18][row] = stats.release_rate
+            chunk[19][row] = min(65535, stats.corners)
+            lap = stats.lap
+            chunk[20][row] = lap.overlap_time
+            chunk[21][row] = int(lap.full_throttle * PEDAL_SCALE)
+            chunk[22][row] = int(lap.ffb_clip * PEDAL_SCALE)
+            chunk[23][row] = lap.release_rate
+            chunk[24][row] = min(65535, lap.reversals)
+            chunk[25][row] = min(65535, lap.corners)
+
+        self.row = row + 1
+        self.rows_recorded += 1
+        if self.row == self.chunk_rows:
+            self.hand_off()
+
+    def hand_off(self):
+        """Queue the current chunk for writing and start a new one.
+
+        If the write queue is full, the current chunk is dropped and reused.
+        """
+        try:
+            self.write_queue.put_nowait((self.chunk, self.row))
+        except queue.Full:
+            self.rows_discarded += self.row
+            self.row = 0
+            return
+        try:
+            self.chunk = self.free_chunks.get_nowait()
+        except queue.Empty:
+            self.chunk = self.new_chunk()
+        self.row = 0
+
+    def writer(self):
+        """Background thread writing queued chunks to disk."""
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                break
+            chunk, rows = item
+            try:
+                self.write_chunk(chunk, rows)
+            except Exception:
+                self.rows_failed += rows
+            self.free_chunks.put(chunk)
+        self.file.close()
+
+    def write_chunk(self, chunk, rows):
+        """Write one chunk of rows to the file."""
+        times = chunk[0]
+        laps = chunk[10]
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, rows, times[0], times[rows - 1],
+                                          laps[0], laps[rows - 1]))
+        for column in chunk:
+            values = column[:rows]
+            if sys.byteorder != "little":
+                values.byteswap()
+            data = values.tobytes()
+            self.file.write(data)
+            self.file.write(bytes(padded_size(len(data)) - len(data)))
+        self.file.flush()
+
+    def close(self, timeout=2.0):
+        """Flush remaining rows and stop the writer thread.
+
+        Args:
+            timeout (float): Max seconds to wait for pending writes.
+        """
+        if self.row:
+            try:
+                self.write_queue.put((self.chunk, self.row), timeout=timeout)
+            except queue.Full:
+                self.rows_discarded += self.row
+            self.row = 0
+        try:
+            self.write_queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
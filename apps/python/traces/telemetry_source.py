@@ -0,0 +1,278 @@
+import ac
+import acsys
+
+import os
+import math
+import time
+
+from stdlib_path import add_stdlib_path
+add_stdlib_path()
+
+import ctypes
+
+from lib.sim_info import info, SimInfo
+from lib.sim_info import SPageFilePhysics, SPageFileGraphic, SPageFileStatic
+from lib.sim_info import AC_LIVE
+
+# Steering lock in degrees of the file-backed and synthetic pages.
+# Without the in-game API to calibrate against, steering input of the
+# physics page is taken as a fraction of this lock.
+PAGE_STEERING_LOCK = 450.0
+
+# Rate at which the sim writes the physics page
+PHYSICS_RATE = 333
+
+
+class ACSource:
+    """Car telemetry read through the in-game ac API.
+
+    All sources fill the same snapshot attributes of a car data object:
+    throttle, brake, clutch, ffb, steering in radians, gear and speed_kmh.
+
+    Args:
+        pages (obj:SimInfo): Shared memory pages, for session data.
+    """
+    def __init__(self, pages):
+        self.pages = pages
+
+    def focused_car(self):
+        """Return ID of the car in focus."""
+        return ac.getFocusedCar()
+
+    def reset(self):
+        """Forget the previous snapshot, e.g. after switching cars."""
+        pass
+
+    def calibrate(self, car_id):
+        """Calibrate decoding of the pages, run at low rate."""
+        pass
+
+    def physics_snapshot(self):
+        """Return the physics page the last read of the player car saw.
+
+        Without snapshots, this is the live page of the sim.
+        """
+        return self.pages.physics
+
+    def read(self, car_id, car):
+        """Read a snapshot of the telemetry of a car.
+
+        Args:
+            car_id (int): Car ID number.
+            car (obj:ACCarData): Car data to fill in.
+
+        Returns:
+            bool: True if the data may have changed since the previous read.
+        """
+        car.throttle = ac.getCarState(car_id, acsys.CS.Gas)
+        car.brake = ac.getCarState(car_id, acsys.CS.Brake)
+        car.clutch = 1 - ac.getCarState(car_id, acsys.CS.Clutch)
+        car.ffb = ac.getCarState(car_id, acsys.CS.LastFF)
+        car.steering = ac.getCarState(car_id, acsys.CS.Steer) * math.pi / 180
+        car.gear = ac.getCarState(car_id, acsys.CS.Gear)
+        car.speed_kmh = ac.getCarState(car_id, acsys.CS.SpeedKMH)
+        return True
+
+
+class SharedMemorySource(ACSource):
+    """Player car telemetry read from the shared memory physics page.
+
+    Other cars are read through the ac API. The physics page holds
+    steering input as a fraction of full lock. Unless a steering lock is
+    given, the lock is calibrated against the ac API: a least squares fit
+    of the steering angle of the ac API to the steering input of the
+    page, over calibration_samples reads with the wheel turned. Both are
+    not read at the same instant, so single reads can be off by a few
+    degrees. Until the fit settles, which takes a couple of seconds of
+    steering, the player car is read through the ac API, at the rate of
+    the app updates rather than the physics rate.
+
+    Args:
+        pages (obj:SimInfo): Shared memory pages.
+        steering_lock (float): Steering lock in degrees.
+            Optional, calibrated by default.
+    """
+    # Reads with steering input beyond calibration_input, as a fraction of
+    # full lock, needed to settle the steering lock
+    calibration_samples = 20
+    calibration_input = 0.05
+
+    def __init__(self, pages, steering_lock=None):
+        ACSource.__init__(self, pages)
+        self.steering_lock = steering_lock
+        self.calibrate_lock = steering_lock is None
+
+        # Sums of the least squares fit of the steering lock
+        self.lock_products = 0.0
+        self.lock_squares = 0.0
+        self.lock_samples = 0
+
+        # Snapshot of the physics page
+        self.physics = SPageFilePhysics()
+        self.physics_size = ctypes.sizeof(SPageFilePhysics)
+        self.packet_id = None
+        self.torn_reads = 0
+
+    def reset(self):
+        self.packet_id = None
+
+    def physics_snapshot(self):
+        if self.packet_id is None:
+            # No consistent snapshot read yet, e.g. while calibrating
+            return self.pages.physics
+        return self.physics
+
+    def calibrate(self, car_id):
+        """Calibrate steering lock against the steering angle of the ac API.
+
+        Reads with the wheel near center are skipped, as the ratio of both
+        is dominated by noise there. The lock is fixed once settled.
+        """
+        if not self.calibrate_lock or car_id != 0:
+            return
+        steer_input = self.pages.physics.steerAngle
+        if abs(steer_input) < self.calibration_input:
+            return
+        self.lock_products += ac.getCarState(car_id, acsys.CS.Steer) * steer_input
+        self.lock_squares += steer_input * steer_input
+        self.lock_samples += 1
+        if self.lock_samples >= self.calibration_samples:
+            self.steering_lock = self.lock_products / self.lock_squares
+            self.calibrate_lock = False
+
+    def read_snapshot(self):
+        """Copy a consistent snapshot of the shared memory physics page.
+
+        The packet ID is read before and after copying. If it changed,
+        the sim wrote to the page during the copy and the read is retried.
+
+        Returns:
+            bool: True if a new, consistent snapshot was read.
+        """
+        source = self.pages.physics
+        for _ in range(3):
+            packet_id = source.packetId
+            if packet_id == self.packet_id:
+                # Nothing changed since previous snapshot
+                return False
+            ctypes.memmove(ctypes.addressof(self.physics), ctypes.addressof(source), self.physics_size)
+            if source.packetId == packet_id and self.physics.packetId == packet_id:
+                self.packet_id = packet_id
+                return True
+            self.torn_reads += 1
+        return False
+
+    def read(self, car_id, car):
+        if car_id != 0 or self.steering_lock is None:
+            return ACSource.read(self, car_id, car)
+        if not self.read_snapshot():
+            return False
+        physics = self.physics
+        car.throttle = physics.gas
+        car.brake = physics.brake
+        car.clutch = 1 - physics.clutch
+        car.ffb = physics.finalFF
+        car.steering = physics.steerAngle * self.steering_lock * math.pi / 180
+        car.gear = physics.gear
+        car.speed_kmh = physics.speedKmh
+        return True
+
+
+class FileSource(SharedMemorySource):
+    """Player car telemetry read from file-backed shared memory pages.
+
+    The pages are files in a directory, laid out like the named mappings
+    of the sim and filled by another process, e.g. a load test writing
+    at the physics rate. Only the player car is available.
+
+    Args:
+        directory (str): Directory of the page files.
+    """
+    def __init__(self, directory):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        SharedMemorySource.__init__(self, SimInfo(directory), PAGE_STEERING_LOCK)
+
+    def focused_car(self):
+        return 0
+
+
+class _Pages:
+    """Shared memory pages held in process memory."""
+    def __init__(self):
+        self.physics = SPageFilePhysics()
+        self.graphics = SPageFileGraphic()
+        self.static = SPageFileStatic()
+
+
+class SyntheticSource(SharedMemorySource):
+    """Player car telemetry generated as a function of time.
+
+    Fills in-process pages with synthetic signals at the physics rate,
+    which are then decoded like the pages of the sim. Only the player
+    car is available.
+
+    Args:
+        lap_time (float): Length of one synthetic lap in seconds.
+            Optional, defaults to 60.
+    """
+    def __init__(self, lap_time=60.0):
+        SharedMemorySource.__init__(self, _Pages(), PAGE_STEERING_LOCK)
+        self.lap_time = lap_time
+        self.start = time.perf_counter()
+        self.tick = -1
+        self.pages.graphics.status = AC_LIVE
+        self.pages.graphics.replayTimeMultiplier = 1.0
+        self.pages.static.numCars = 1
+
+    def focused_car(self):
+        return 0
+
+    def read(self, car_id, car):
+        tick = int((time.perf_counter() - self.start) * PHYSICS_RATE)
+        if tick != self.tick:
+            self.tick = tick
+            self.generate(tick / PHYSICS_RATE)
+        return SharedMemorySource.read(self, car_id, car)
+
+    def generate(self, t):
+        """Write the signals at a time in seconds into the pages.
+
+        Throttle and brake alternate like straights and braking zones,
+        with a clutch kick every few seconds.
+        """
+        phase = (t % self.lap_time) / self.lap_time
+        wave = math.sin(2 * math.pi * 8 * phase)
+        speed = 60 + 180 * (0.5 + 0.5 * math.sin(2 * math.pi * 8 * phase - 1))
+
+        physics = self.pages.physics
+        physics.packetId += 1
+        physics.gas = min(1.0, max(0.0, 0.2 + wave))
+        physics.brake = min(1.0, max(0.0, -wave - 0.3))
+        physics.clutch = 1.0 if (t % 4.0) > 0.15 else 0.0
+        physics.steerAngle = 0.3 * math.sin(2 * math.pi * 11 * phase) * (0.5 + 0.5 * math.cos(t))
+        physics.finalFF = 0.6 + 0.5 * abs(wave)
+        physics.speedKmh = speed
+        physics.gear = 2 + int(speed // 45)
+
+        graphics = self.pages.graphics
+        laps = int(t // self.lap_time)
+        graphics.normalizedCarPosition = phase
+        graphics.completedLaps = laps
+        graphics.iLastTime = int(self.lap_time * 1000) if laps else 0
+        graphics.iBestTime = graphics.iLastTime
+
+
+def create_source(cfg):
+    """Return the telemetry source selected in the config.
+
+    Args:
+        cfg (obj:Config): App configuration.
+    """
+    if cfg.telemetry_source == "file":
+        return FileSource(cfg.telemetry_dir)
+    if cfg.telemetry_source == "synthetic":
+        return SyntheticSource()
+    if cfg.telemetry_source == "shm":
+        return SharedMemorySource(info)
+    return ACSource(info)
@@ -0,0 +1,189 @@
+from array import array
+from collections import deque
+
+# Level of detail stage for traces.
+# Samples are simplified as they arrive, so that runs of (nearly) collinear
+# samples are drawn as one segment. The amount of geometry to draw then
+# scales with how much the input varies, rather than with the sample count.
+# For long time windows with more samples than pixels, a min/max pyramid
+# bounds the geometry by the graph width instead.
+
+INF = float("inf")
+
+
+class IncrementalSimplifier:
+    """Incremental polyline simplification of an evenly sampled trace.
+
+    Streaming equivalent of Ramer-Douglas-Peucker using the sleeve
+    (cone intersection) method. From the last committed key point, the
+    anchor, the range of slopes is tracked for which a straight segment
+    passes within tolerance of every sample since the anchor. As long as
+    the newest sample lies within that range, it replaces the provisional
+    last key point. Otherwise the provisional point is committed as new
+    anchor. Every append is O(1).
+
+    Deviation is measured vertically, which for a time series is never
+    less than the perpendicular distance to the segment.
+
+    Args:
+        tolerance (float): Max deviation of a dropped sample from the
+            simplified polyline, in pixels.
+        x_step (float): Horizontal distance between samples in pixels.
+    """
+    def __init__(self, tolerance, x_step):
+        self.tolerance = tolerance
+        self.x_step = x_step
+
+        # Sample sequence numbers and values of the key points, oldest first.
+        # The last key point is always the newest sample.
+        self.keys = deque()
+        self.values = deque()
+        self.clear()
+
+    def clear(self):
+        """Drop all key points."""
+        self.keys.clear()
+        self.values.clear()
+        # Newest key point dropped by trim, as (seq, y), to interpolate from
+        self.dropped = None
+        self.anchor_seq = None
+        self.anchor_y = 0
+        self.tail_y = 0
+        self.slope_min = -INF
+        self.slope_max = INF
+
+    def append(self, seq, y):
+        """Add sample to the simplified polyline.
+
+        Args:
+            seq (int): Sequence number of the sample, increasing by one per sample.
+            y (float): Sample value in pixels.
+        """
+        keys = self.keys
+        values = self.values
+        if not keys:
+            keys.append(seq)
+            values.append(y)
+            self.anchor_seq = seq
+            self.anchor_y = y
+            self.tail_y = y
+            return
+
+        dx = (seq - self.anchor_seq) * self.x_step
+        dy = y - self.anchor_y
+        if keys[-1] == self.anchor_seq:
+            # No provisional point since the anchor yet
+            keys.append(seq)
+            values.append(y)
+        elif self.slope_min <= dy / dx <= self.slope_max:
+            # Segment from anchor to new sample covers all samples in between
+            keys[-1] = seq
+            values[-1] = y
+        else:
+            # Commit provisional point as new anchor, start a new segment
+            self.anchor_seq = keys[-1]
+            self.anchor_y = self.tail_y
+            self.slope_min = -INF
+            self.slope_max = INF
+            keys.append(seq)
+            values.append(y)
+            dx = (seq - self.anchor_seq) * self.x_step
+            dy = y - self.anchor_y
+
+        # Narrow the sleeve, so that later segments pass within tolerance of this sample
+        slope_min = (dy - self.tolerance) / dx
+        slope_max = (dy + self.tolerance) / dx
+        if slope_min > self.slope_min:
+            self.slope_min = slope_min
+        if slope_max < self.slope_max:
+            self.slope_max = slope_max
+        self.tail_y = y
+
+    def trim(self, oldest_seq):
+        """Drop key points older than a sequence number.
+
+        Args:
+            oldest_seq (int): Sequence number of the oldest sample to keep.
+        """
+        keys = self.keys
+        while keys[0] < oldest_seq:
+            self.dropped = (keys.popleft(), self.values.popleft())
+
+    def value_at(self, seq):
+        """Return the value of the simplified polyline at a sequence number.
+
+        Only covers the segment from the last key point dropped by trim to
+        the oldest key point kept, where the polyline starts out of view.
+
+        Args:
+            seq (int): Sequence number between both key points.
+
+        Returns:
+            float: Interpolated value in pixels, None without a dropped key point.
+        """
+        if self.dropped is None or not self.keys:
+            return None
+        seq_0, y_0 = self.dropped
+        seq_1 = self.keys[0]
+        y_1 = self.values[0]
+        return y_0 + (y_1 - y_0) * (seq - seq_0) / (seq_1 - seq_0)
+
+
+class MinMaxPyramid:
+    """Multi-resolution min/max summary of an evenly sampled trace.
+
+    Level k holds the minimum and maximum of every bucket of 2**k
+    consecutive samples, bucket b covering sample sequence numbers
+    b * 2**k up to (b + 1) * 2**k. Every level is a ring buffer holding
+    the buckets of the most recent samples. A trace with more samples
+    than pixels can then be drawn from the min and max of a coarser
+    level, which bounds the geometry by the graph width, while a short
+    spike still shows up in the max or min of its bucket.
+
+    Args:
+        levels (int): Number of levels above the samples, at least 1.
+        size (int): Number of most recent samples to cover.
+    """
+    def __init__(self, levels, size):
+        self.levels = levels
+        self.sizes = [0] + [(size >> k) + 2 for k in range(1, levels + 1)]
+        self.minimum = [None] + [array('f', bytes(4 * n)) for n in self.sizes[1:]]
+        self.maximum = [None] + [array('f', bytes(4 * n)) for n in self.sizes[1:]]
+        # Sequence number of the first sample since the last clear
+        self.first = None
+
+    def clear(self):
+        """Drop all buckets, the next sample starts a new bucket on every level."""
+        self.first = None
+
+    def append(self, seq, value):
+        """Add sample to the buckets of all levels.
+
+        Args:
+            seq (int): Sequence number of the sample, increasing by one per sample.
+            value (float): Sample value.
+        """
+        if self.first is None:
+            self.first = seq
+        for k in range(1, self.levels + 1):
+            slot = (seq >> k) % self.sizes[k]
+            minimum = self.minimum[k]
+            maximum = self.maximum[k]
+            if not seq & ((1 << k) - 1) or seq == self.first:
+                # First sample of a new bucket
+                minimum[slot] = value
+                maximum[slot] = value
+            elif value < minimum[slot]:
+                minimum[slot] = value
+            elif value > maximum[slot]:
+                maximum[slot] = value
+
+    def bucket(self, level, index):
+        """Return min and max of a bucket of a level.
+
+        Args:
+            level (int): Level, 1 up to levels.
+            index (int): Bucket index, the sequence number shifted right by level.
+        """
+        slot = index % self.sizes[level]
+        return self.minimum[level][slot], self.maximum[level][slot]
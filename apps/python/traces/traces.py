@@ -1,30 +1,79 @@
 import ac
 
+import os
+import time
+
 from color_palette import Colors
 from config_handler import Config
 from ac_data import ACGlobalData, ACCarData 
-from drawables import Trace, PedalBar, SteeringWheel
+from telemetry_source import create_source
+from drawables import Trace, RingTrace, GhostTrace, PedalBar, SteeringWheel
+from channels import ChannelRegistry, BUILTIN_CHANNELS
+from channel_store import ChannelStore
 from app_window import AppWindow
 from ac_label import ACLabel
+from scheduler import Scheduler
+from profiler import Profiler
+from governor import QualityGovernor
+from capture import InputCapture
+from telemetry_recorder import TelemetryRecorder
+from input_stats import InputStats
+from reference_lap import ReferenceLap
+from car_history import CarHistory
+from history_store import HistoryStore
 from ac_gl_utils import Point
+from stream_protocol import GRID
 
 # Initialize general object variables
 cfg = None
 ac_global_data = None
 ac_car_data = None
 app_window = None
-
-# Trace drawable objects
-throttle_trace = None
-brake_trace = None
-clutch_trace = None
-steering_trace = None
+scheduler = None
+profiler = None
+governor = None
+input_capture = None
+recorder = None
+input_stats = None
+streamer = None
+car_history = None
+session_history = None
+
+# Traced channels, their shared sample store,
+# and trace drawable objects in channel order
+channel_registry = None
+trace_store = None
+traces = []
+
+# Best lap reference, the shared sample store of the ghost traces,
+# and ghost trace drawable objects in channel order: clutch, steering, throttle, brake
+reference_lap = None
+ghost_store = None
+ghost_traces = [None, None, None, None]
 
 # Timers
 timer_60_hz = 0
 timer_10_hz = 0
 timer_trace = 0
-trace_update_batch = 0 
+
+# Time since the last fresh read of car data recorded by the input capture
+capture_dt = 0
+
+# Time since the last row written by the telemetry recorder
+recorder_dt = 0
+
+# Horizontal distance between trace samples, for smooth scrolling
+scroll_step = 0
+
+# Traces take every n-th sample of the capture time grid,
+# trace_skip counts grid samples since the last trace sample
+decimation = 1
+trace_skip = 0
+
+# Trace groups the quality governor switches off first to last,
+# and the traces it has currently switched off
+quality_groups = []
+shed_traces = set()
 
 PERIOD_60_HZ = 1 / 60
 PERIOD_10_HZ = 1 / 10
@@ -41,6 +90,8 @@ wheel_indicator = None
 # Text labels
 label_speed = 0
 label_gear = 0
+label_stats = None
+label_last_lap = None
 
 
 def acMain(ac_version):
@@ -53,31 +104,120 @@ def acMain(ac_version):
     # Read config
     global cfg
     cfg = Config()
+    if cfg.deprecated_options:
+        ac.log("{app_name} - Deprecated options {options} replaced by telemetry_source={source}".format(
+            app_name=cfg.app_name, options=", ".join(cfg.deprecated_options), source=cfg.telemetry_source))
+
+    # The legacy quad backend only keeps up with short time windows
+    if cfg.trace_backend == "quad" and cfg.trace_time_window > Trace.max_time_window:
+        ac.log("{app_name} - Trace time window limited to {limit} seconds with the quad backend".format(
+            app_name=cfg.app_name, limit=Trace.max_time_window))
+        cfg.trace_time_window = Trace.max_time_window
 
-    # Initialize ac data objects
+    # Initialize ac data objects, reading from the configured telemetry source
     global ac_global_data, ac_car_data
-    ac_global_data = ACGlobalData(cfg)
-    ac_car_data = ACCarData(cfg)
+    source = create_source(cfg)
+    ac_global_data = ACGlobalData(cfg, source)
+    ac_car_data = ACCarData(cfg, source)
 
     # Set up app window
     global app_window
     app_window = AppWindow(cfg)
     ac.addRenderCallback(app_window.id, app_render)
 
-    # Initialize trace objects and add to drawables list
-    global throttle_trace, brake_trace, clutch_trace, steering_trace
-    if cfg.display_steering:
-        steering_trace = Trace(cfg, ac_global_data, Colors.light_grey)
-        app_window.add_drawable(steering_trace)
-    if cfg.display_clutch:
-        clutch_trace = Trace(cfg, ac_global_data, Colors.blue)
-        app_window.add_drawable(clutch_trace)
-    if cfg.display_throttle:
-        throttle_trace = Trace(cfg, ac_global_data, Colors.green)
-        app_window.add_drawable(throttle_trace)
-    if cfg.display_brake:
-        brake_trace = Trace(cfg, ac_global_data, Colors.red)
-        app_window.add_drawable(brake_trace)
+    # Suspend updates while the app is hidden or the sim is not running.
+    # While streaming, the viewer shows the traces and the app window may be hidden.
+    global scheduler
+    scheduler = Scheduler(ac_global_data, track_visibility=not cfg.stream)
+    ac.addOnAppActivatedListener(app_window.id, app_activated)
+    ac.addOnAppDismissedListener(app_window.id, app_dismissed)
+
+    # Input statistics per lap and over a rolling window
+    global input_stats
+    if cfg.stats:
+        input_stats = InputStats(cfg)
+
+    # Session telemetry recorder
+    global recorder
+    if cfg.recorder:
+        recorder = TelemetryRecorder(cfg, os.path.join(
+            cfg.recordings_dir, time.strftime("session_%Y%m%d_%H%M%S.trc")), input_stats)
+
+    # In streaming mode, samples are sent to an out-of-process viewer,
+    # and nothing is drawn in game. Input statistics and the recorder
+    # work as usual, features of the in-game traces are left out.
+    global streamer, input_capture
+    if cfg.stream:
+        from streamer import SampleStreamer
+        streamer = SampleStreamer(cfg)
+        if cfg.trace_capture:
+            input_capture = InputCapture(4, cfg.trace_sample_rate, cfg.trace_peak_hold)
+        unused = [option for option in ("car_history", "governor", "trace_ghost", "profiler")
+                  if getattr(cfg, option)]
+        if unused:
+            ac.log("{app_name} - Not used while streaming: {options}".format(
+                app_name=cfg.app_name, options=", ".join(unused)))
+        return
+
+    # Built-in and configured channels of the trace sample
+    global channel_registry
+    channel_registry = ChannelRegistry(cfg, ac_global_data.source)
+    channels = channel_registry.channels
+
+    # Best lap reference, shown as ghost traces behind the live traces
+    global reference_lap, ghost_store
+    if cfg.trace_ghost:
+        reference_lap = ReferenceLap(4, cfg.trace_ghost_bins)
+        ghost_store = ChannelStore(4, cfg.trace_time_window * cfg.trace_sample_rate)
+        displayed = (cfg.display_clutch, cfg.display_steering,
+                     cfg.display_throttle, cfg.display_brake)
+        colors = (Colors.blue, Colors.light_grey, Colors.green, Colors.red)
+        for channel in (1, 0, 2, 3):
+            if displayed[channel]:
+                ghost_traces[channel] = GhostTrace(cfg, ac_global_data, colors[channel],
+                                                   ghost_store, channel)
+                app_window.add_drawable(ghost_traces[channel])
+
+    # Initialize trace objects and add to drawables list.
+    # Ring buffer backend by default, with the samples of all channels in
+    # one store, legacy quad queue per trace on request.
+    # Configured channels are drawn behind the built-in traces.
+    global trace_store, traces
+    if cfg.trace_backend != "quad":
+        trace_store = ChannelStore(len(channels), cfg.trace_time_window * cfg.trace_sample_rate)
+    traces = [None] * len(channels)
+    for channel in list(range(len(BUILTIN_CHANNELS), len(channels))) + [1, 0, 2, 3]:
+        if not channels[channel].displayed:
+            continue
+        if trace_store is None:
+            traces[channel] = Trace(cfg, ac_global_data, channels[channel].color)
+        else:
+            traces[channel] = RingTrace(cfg, ac_global_data, channels[channel].color,
+                                        trace_store, channel)
+        app_window.add_drawable(traces[channel])
+
+    # Traces scroll smoothly by up to one sample between samples
+    global scroll_step
+    for trace in traces:
+        if trace is not None:
+            scroll_step = trace.x_step
+
+    # Physics rate capture of trace channels, resampled onto one time grid
+    if cfg.trace_capture:
+        input_capture = InputCapture(len(channels), cfg.trace_sample_rate, cfg.trace_peak_hold)
+
+    # Recent input history of all cars, for switching focus
+    global car_history
+    if cfg.car_history:
+        car_history = CarHistory(cfg, ac_global_data)
+
+    # Compact history of the trace samples of the player car.
+    # Pedals are quantized to 8 bits, normalized steering and
+    # configured channels to 16 bits.
+    global session_history
+    if cfg.trace_history:
+        session_history = HistoryStore(((0, 1, 8), (0, 1, 16), (0, 1, 8), (0, 1, 8))
+                                       + ((0, 1, 16),) * (len(channels) - len(BUILTIN_CHANNELS)))
 
     # Initialize pedal bars objects and add to drawables list
     global throttle_bar, brake_bar, clutch_bar, ffb_bar
@@ -113,6 +253,54 @@ def acMain(ac_version):
     label_gear = ACLabel(app_window.id, font='ACRoboto700', alignment='center')
     label_gear.fit_height(Point(1935 * cfg.app_scale, (300 - 112) * cfg.app_scale), 224 * cfg.app_scale)
 
+    # Input statistics of the current lap in the padding above the traces,
+    # and of the last complete lap below them
+    global label_stats, label_last_lap
+    if input_stats is not None:
+        label_stats = ACLabel(app_window.id, font='ACRoboto300', color=Colors.light_grey)
+        label_stats.fit_height(Point(cfg.app_height * cfg.app_padding, 0), cfg.app_padding * cfg.app_height)
+        label_last_lap = ACLabel(app_window.id, font='ACRoboto300', color=Colors.grey)
+        label_last_lap.fit_height(Point(cfg.app_height * cfg.app_padding,
+                                        cfg.app_height * (1 - cfg.app_padding)),
+                                  cfg.app_padding * cfg.app_height)
+
+    # Optional quality governor, trading trace detail for time per frame.
+    # Ghosts go first, then configured channels, the brake trace last.
+    global governor, quality_groups
+    if cfg.governor:
+        ghosts = [ghost for ghost in ghost_traces if ghost is not None]
+        if ghosts:
+            quality_groups.append(ghosts)
+        order = list(range(len(BUILTIN_CHANNELS), len(traces))) + [0, 1, 2, 3]
+        live = [traces[channel] for channel in order if traces[channel] is not None]
+        for trace in live[:max(0, len(live) - cfg.governor_min_traces)]:
+            quality_groups.append([trace])
+        governor = QualityGovernor(cfg, len(quality_groups))
+
+    # Optional profiler, instrumenting callbacks and drawables
+    global profiler
+    if cfg.profiler:
+        profiler = Profiler(cfg)
+        profiler.stage("acUpdate")
+        profiler.stage("app_render")
+        drawables = {
+            "throttle_bar": throttle_bar,
+            "brake_bar": brake_bar,
+            "clutch_bar": clutch_bar,
+            "ffb_bar": ffb_bar,
+            "wheel_indicator": wheel_indicator,
+        }
+        for channel, trace in zip(channel_registry.channels, traces):
+            drawables[channel.name + "_trace"] = trace
+        for channel, ghost in enumerate(ghost_traces):
+            drawables["ghost_trace_{}".format(channel)] = ghost
+        for name, drawable in drawables.items():
+            if drawable is not None:
+                profiler.instrument(drawable, "update", name + ".update")
+                profiler.instrument(drawable, "fill_batch", name + ".fill_batch")
+        if cfg.profiler_overlay:
+            profiler.setup_overlay(app_window.id)
+
 
 def acUpdate(deltaT):
     """Run every physics tick of Assetto Corsa.
@@ -121,14 +309,50 @@ def acUpdate(deltaT):
         deltaT (float): Time delta since last tick in seconds.
             Assetto Corsa passes this argument automatically.
     """
+    if governor is not None:
+        start = time.perf_counter()
+    if profiler is None:
+        update(deltaT)
+    else:
+        profiler.call("acUpdate", update, deltaT)
+    if governor is not None:
+        governor.add_update(time.perf_counter() - start)
+
+
+def update(deltaT):
+    """Update app data and drawables, called from acUpdate.
+
+    Args:
+        deltaT (float): Time delta since last tick in seconds.
+    """
     global timer_60_hz, timer_10_hz
-    global timer_trace
-    global trace_update_batch
+    global timer_trace, capture_dt, recorder_dt
+
+    # Skip all work while hidden or while the sim is not running.
+    # Timers don't advance meanwhile, so there is no burst of catch-up work.
+    # Telemetry recording and input statistics follow sim time without gaps,
+    # so they keep going while hidden.
+    if not scheduler.tick():
+        if not scheduler.visible and (recorder is not None or input_stats is not None):
+            update_hidden(deltaT)
+        return
+    if scheduler.reset_pending:
+        reset()
+    if governor is not None and governor.changed:
+        apply_quality()
 
     # Update timers
     timer_60_hz += deltaT
     timer_10_hz += deltaT
-    timer_trace += deltaT
+    if input_capture is None:
+        timer_trace += deltaT
+    else:
+        capture_dt += deltaT
+    recorder_dt += deltaT
+
+    if streamer is not None:
+        stream(deltaT)
+        return
 
     # Run on 10hz
     if timer_10_hz > PERIOD_10_HZ:
@@ -137,58 +361,452 @@ def acUpdate(deltaT):
         # Update ac global data
         ac_global_data.update()
 
-        # Set car id for car data
-        ac_car_data.set_car_id(ac_global_data.focused_car)
+        # Switch traces to the focused car
+        if ac_global_data.focused_car != ac_car_data.car_id:
+            switch_car(ac_global_data.focused_car)
+        ac_car_data.calibrate_steering()
+        if car_history is not None:
+            car_history.set_car_count(ac_global_data.num_cars)
 
         # Update text labels
         label_speed.set_text("{:.0f}".format(ac_car_data.speed))
         label_gear.set_text("{}".format(ac_car_data.gear_text))
+        if label_stats is not None:
+            label_stats.set_text(input_stats.describe())
+            last_lap = input_stats.last_lap
+            if last_lap is not None and last_lap.complete:
+                label_last_lap.set_text("Last lap  " + input_stats.describe(last_lap))
+            else:
+                label_last_lap.set_text("")
+
+    # Poll the next cars for the history of all cars
+    if car_history is not None:
+        car_history.poll()
+
+    # With physics rate capture, car data is read and recorded every tick.
+    # Traces are updated together on every sample of the capture time grid.
+    fresh = False
+    if input_capture is not None:
+        fresh = ac_car_data.update()
+        if fresh:
+            input_capture.record(capture_dt, channel_registry.read(ac_car_data))
+            capture_dt = 0
+        sample = input_capture.resample()
+        while sample is not None:
+            update_traces(sample)
+            sample = input_capture.resample()
+        if cfg.trace_smooth_scroll:
+            app_window.scroll_offset = -scroll_step * (trace_skip + input_capture.grid_phase())
 
     # Run on 60hz
     if timer_60_hz > PERIOD_60_HZ:
         timer_60_hz -= PERIOD_60_HZ
 
-        # Update ac car data
-        ac_car_data.update()
+        # Update ac car data, skip drawables if nothing changed
+        if input_capture is None:
+            fresh = ac_car_data.update()
+        if input_capture is not None or fresh:
+            # Update data for pedalbar and wheelindicator drawables
+            wheel_indicator.update(ac_car_data.steering)
+            throttle_bar.update(ac_car_data.throttle)
+            brake_bar.update(ac_car_data.brake)
+            clutch_bar.update(ac_car_data.clutch)
+
+            # Set FFB bar to red if FFB is clipping (greater than 1)
+            if ac_car_data.ffb < 1:
+                ffb_bar.color = Colors.grey
+                ffb_bar.update(ac_car_data.ffb)
+            else:
+                ffb_bar.color = Colors.red
+                ffb_bar.update(1)
+
+        if recorder is not None or reference_lap is not None or input_stats is not None:
+            ac_global_data.update_position()
+
+        # Record inputs of the current lap by position on track,
+        # lap data is only available for the player car.
+        if reference_lap is not None and ac_car_data.car_id == 0:
+            reference_lap.update(ac_global_data, (ac_car_data.clutch,
+                                                  ac_car_data.steering_normalized,
+                                                  ac_car_data.throttle,
+                                                  ac_car_data.brake))
+
+        # Record session telemetry
+        if recorder is not None:
+            record_telemetry()
+
+    update_stats(deltaT, fresh)
+
+    if input_capture is not None:
+        return
+
+    # Update traces with the car data at the trace sample rate
+    if timer_trace > (1 / cfg.trace_sample_rate):
+        timer_trace -= (1 / cfg.trace_sample_rate)
+        update_traces(channel_registry.read(ac_car_data))
 
-        # Update data for pedalbar and wheelindicator drawables
-        wheel_indicator.update(ac_car_data.steering)
-        throttle_bar.update(ac_car_data.throttle)
-        brake_bar.update(ac_car_data.brake)
-        clutch_bar.update(ac_car_data.clutch)
+    # Scroll traces by the time since the last trace sample,
+    # including the samples skipped at a reduced trace sample rate
+    if cfg.trace_smooth_scroll:
+        app_window.scroll_offset = -scroll_step * (
+            trace_skip + min(1, timer_trace * cfg.trace_sample_rate))
 
-        # Set FFB bar to red if FFB is clipping (greater than 1)
-        if ac_car_data.ffb < 1:
-            ffb_bar.color = Colors.grey
-            ffb_bar.update(ac_car_data.ffb)
-        else:
-            ffb_bar.color = Colors.red
-            ffb_bar.update(1)
 
-    # Update traces data in batches
-    # This is done to spread out calc load over physics update ticks.
-    if timer_trace > (1 / cfg.trace_sample_rate):
-        trace_update_batch += 1
+def update_stats(deltaT, fresh):
+    """Take in the car data of a physics tick in the input statistics.
 
-        if trace_update_batch == 1:
-            if cfg.display_clutch:
-                clutch_trace.update(ac_car_data.clutch)
+    Input statistics take in every read of the car data while sim time runs
+    forward, and start over on rewind. Laps are only known for the player car.
 
-        elif trace_update_batch == 2:
-            if cfg.display_steering:
-                steering_trace.update(ac_car_data.steering_normalized)
+    Args:
+        deltaT (float): Time delta since last tick in seconds.
+        fresh (bool): Car data was read this tick.
+    """
+    if input_stats is None:
+        return
+    multiplier = ac_global_data.replay_time_multiplier
+    if multiplier > 0:
+        input_stats.update(deltaT, ac_car_data, fresh,
+                           ac_global_data.completed_laps if ac_car_data.car_id == 0 else None)
+    elif multiplier < 0:
+        input_stats.clear()
 
-        elif trace_update_batch == 3:
-            if cfg.display_throttle:
-                throttle_trace.update(ac_car_data.throttle)
 
-        else:
-            if cfg.display_brake:
-                brake_trace.update(ac_car_data.brake)
-            
-            # On final batch, reset counter and timer
-            trace_update_batch = 0
-            timer_trace -= (1 / cfg.trace_sample_rate)
+def stream(deltaT):
+    """Send samples to the out-of-process viewer, instead of drawing in game.
+
+    Trace grid samples are sent with the GRID flag, car data at 60 Hz
+    without, for the pedal bars and wheel of the viewer. Input statistics
+    and the recorder are fed as when drawing in game.
+
+    Args:
+        deltaT (float): Time delta since last tick in seconds.
+    """
+    global timer_60_hz, timer_10_hz
+    global timer_trace, capture_dt
+
+    # Run on 10hz
+    if timer_10_hz > PERIOD_10_HZ:
+        timer_10_hz -= PERIOD_10_HZ
+        ac_global_data.update()
+        if ac_global_data.focused_car != ac_car_data.car_id:
+            ac_car_data.set_car_id(ac_global_data.focused_car)
+            if input_capture is not None:
+                input_capture.clear()
+            streamer.clear()
+        ac_car_data.calibrate_steering()
+
+    # Traces only advance while sim time runs forward, and start over on rewind
+    multiplier = ac_global_data.replay_time_multiplier
+    if multiplier < 0:
+        streamer.clear()
+    flags = GRID if multiplier > 0 else 0
+
+    fresh = False
+    if input_capture is not None:
+        fresh = ac_car_data.update()
+        if fresh:
+            input_capture.record(capture_dt, (ac_car_data.clutch,
+                                              ac_car_data.steering_normalized,
+                                              ac_car_data.throttle,
+                                              ac_car_data.brake))
+            capture_dt = 0
+        sample = input_capture.resample()
+        while sample is not None:
+            streamer.add(flags, ac_car_data, sample)
+            sample = input_capture.resample()
+    elif timer_trace > (1 / cfg.trace_sample_rate):
+        timer_trace -= (1 / cfg.trace_sample_rate)
+        fresh = ac_car_data.update()
+        streamer.add(flags, ac_car_data)
+
+    # Run on 60hz
+    if timer_60_hz > PERIOD_60_HZ:
+        timer_60_hz -= PERIOD_60_HZ
+        if input_capture is None:
+            fresh = ac_car_data.update() or fresh
+        streamer.add(0, ac_car_data)
+
+        if recorder is not None or input_stats is not None:
+            ac_global_data.update_position()
+        if recorder is not None:
+            record_telemetry()
+
+    update_stats(deltaT, fresh)
+
+
+def update_hidden(deltaT):
+    """Keep recording telemetry and input statistics while the app window is hidden.
+
+    Drawables are left alone, they are reset when the window is shown again.
+
+    Args:
+        deltaT (float): Time delta since last tick in seconds.
+    """
+    global timer_60_hz, recorder_dt
+
+    if not scheduler.sim_tick():
+        return
+    timer_60_hz += deltaT
+    recorder_dt += deltaT
+
+    fresh = False
+    if timer_60_hz > PERIOD_60_HZ:
+        timer_60_hz -= PERIOD_60_HZ
+        fresh = ac_car_data.update()
+        ac_global_data.update_position()
+        if recorder is not None:
+            record_telemetry()
+
+    update_stats(deltaT, fresh)
+
+
+def record_telemetry():
+    """Add a row with the current car data to the session recording."""
+    global recorder_dt
+
+    recorder.record(recorder_dt, ac_car_data, ac_global_data)
+    recorder_dt = 0
+
+
+def update_traces(sample):
+    """Update all traces with one sample of the trace time grid.
+
+    Args:
+        sample (list): Value of every channel of the registry.
+    """
+    global trace_skip
+
+    if car_history is not None:
+        car_history.advance()
+    record_history(sample)
+
+    # At a reduced trace sample rate, skip grid samples in between
+    trace_skip += 1
+    if trace_skip < decimation:
+        return
+    trace_skip = 0
+
+    if trace_store is None:
+        for trace, value in zip(traces, sample):
+            if trace is not None:
+                trace.update(value)
+    elif ac_global_data.replay_time_multiplier > 0:
+        # One append of all channels, then every trace takes in its column
+        trace_store.append(sample)
+        for trace in traces:
+            if trace is not None:
+                trace.advance()
+    elif ac_global_data.replay_time_multiplier < 0 and trace_store.count:
+        # Rewinding, start over
+        clear_traces()
+    if reference_lap is not None:
+        update_ghosts()
+
+
+def record_history(sample):
+    """Add trace sample of the player car to the session history.
+
+    Args:
+        sample (sequence): Value of every channel of the registry.
+    """
+    if (session_history is not None and ac_car_data.car_id == 0
+            and ac_global_data.replay_time_multiplier > 0):
+        session_history.append(sample)
+
+
+def update_ghosts():
+    """Add best lap samples at the current position on track to the ghost traces.
+
+    One sample of all channels is added to the shared ghost store,
+    then every ghost trace takes in its column.
+    """
+    if not reference_lap.has_best or ac_car_data.car_id != 0:
+        return
+    if ac_global_data.replay_time_multiplier > 0:
+        # Position at this trace sample, refreshed at 60 Hz otherwise,
+        # which would make the ghost traces stair-step
+        ac_global_data.update_position()
+        position = ac_global_data.lap_position
+        ghost_store.append([reference_lap.value(channel, position) for channel in range(4)])
+        for ghost in ghost_traces:
+            if ghost is not None:
+                ghost.advance()
+    elif ac_global_data.replay_time_multiplier < 0 and ghost_store.count:
+        # Rewinding, start over
+        clear_ghosts()
+
+
+def switch_car(car_id):
+    """Show the inputs of another car.
+
+    Traces are refilled with the recent history of the new car if
+    available, and cleared otherwise, so two cars never share a trace.
+
+    Args:
+        car_id (int): Car ID number.
+    """
+    ac_car_data.set_car_id(car_id)
+    if input_capture is not None:
+        input_capture.clear()
+    if input_stats is not None:
+        input_stats.clear()
+
+    history = [channel_history(car_id, channel) for channel in range(len(traces))]
+    if trace_store is not None:
+        trace_store.load(history)
+    for channel, trace in enumerate(traces):
+        if trace is None:
+            continue
+        trace.set_enabled(trace_enabled(trace, car_id))
+        if trace_store is not None:
+            trace.rebuild()
+        elif trace.enabled:
+            trace.load(history[channel])
+
+    # Best lap ghost is only available for the player car
+    if ghost_store is not None:
+        clear_ghosts()
+
+
+def channel_history(car_id, channel):
+    """Return recent samples of a channel of a car at the trace sample rate.
+
+    Uses the history of all cars, or the session history for the player car.
+    The history of all cars only holds the built-in channels.
+
+    Args:
+        car_id (int): Car ID number.
+        channel (int): Channel index in the registry.
+
+    Returns:
+        list: Sample values, oldest first, empty if no history is available.
+    """
+    samples = []
+    if car_history is not None and channel < len(BUILTIN_CHANNELS):
+        samples = car_history.history(car_id, channel)
+    if not samples and car_id == 0 and session_history is not None:
+        samples = session_history.window(channel, cfg.trace_time_window * cfg.trace_sample_rate)
+    # Keep every n-th sample, ending at the newest
+    return samples[(len(samples) - 1) % decimation::decimation]
+
+
+def trace_enabled(trace, car_id):
+    """Return whether a trace is shown.
+
+    Traces switched off by the quality governor are hidden, and traces of
+    configured channels while another car than the player car is focused.
+
+    Args:
+        trace (obj:RingTrace): Live or ghost trace.
+        car_id (int): Focused car ID number.
+    """
+    if trace in shed_traces:
+        return False
+    if trace in traces:
+        return channel_registry.channels[traces.index(trace)].builtin or car_id == 0
+    return True
+
+
+def apply_quality():
+    """Apply the current decisions of the quality governor to the traces."""
+    global decimation, trace_skip
+
+    governor.changed = False
+    ac.log("{app_name} - Governor: {decisions}".format(
+        app_name=cfg.app_name, decisions=governor.describe()))
+
+    reconfigure = governor.decimation != decimation
+    decimation = governor.decimation
+    trace_skip = 0
+
+    # Switch trace groups on or off, remembering the traces switched on
+    shed_traces.clear()
+    for group in quality_groups[:governor.traces_off]:
+        shed_traces.update(group)
+    refill = set()
+    for group in quality_groups:
+        for trace in group:
+            enabled = trace_enabled(trace, ac_car_data.car_id)
+            if enabled and not trace.enabled:
+                refill.add(trace)
+            trace.set_enabled(enabled)
+
+    # Refill the shared store from the history, which is kept at the full rate,
+    # or resample it if there is no history
+    if reconfigure and trace_store is not None:
+        trace_store.set_decimation(decimation)
+        history = [channel_history(ac_car_data.car_id, channel) for channel in range(len(traces))]
+        if any(history):
+            trace_store.load(history)
+
+    # Ghost traces have no history, their store is resampled
+    if reconfigure and ghost_store is not None:
+        ghost_store.set_decimation(decimation)
+
+    for trace in traces + ghost_traces:
+        if trace is None or not isinstance(trace, RingTrace):
+            continue
+        if reconfigure or trace.lod_tolerance != governor.lod_tolerance:
+            trace.configure(decimation, governor.lod_tolerance)
+
+    # Traces of the quad backend are refilled from the history one by one
+    if trace_store is None:
+        for channel, trace in enumerate(traces):
+            if trace in refill:
+                trace.load(channel_history(ac_car_data.car_id, channel))
+
+
+def clear_traces():
+    """Empty the live traces."""
+    if trace_store is not None:
+        trace_store.clear()
+    for trace in traces:
+        if trace is not None:
+            trace.clear()
+
+
+def clear_ghosts():
+    """Empty the ghost traces."""
+    ghost_store.clear()
+    for ghost in ghost_traces:
+        if ghost is not None:
+            ghost.clear()
+
+
+def reset():
+    """Reset timers and clear traces, e.g. after the app was hidden."""
+    global timer_60_hz, timer_10_hz
+    global timer_trace, capture_dt
+
+    timer_60_hz = 0
+    timer_10_hz = 0
+    timer_trace = 0
+    capture_dt = 0
+
+    clear_traces()
+    if ghost_store is not None:
+        clear_ghosts()
+    if reference_lap is not None:
+        reference_lap.clear_lap()
+    if car_history is not None:
+        car_history.clear()
+    if input_capture is not None:
+        input_capture.clear()
+    if streamer is not None:
+        streamer.clear()
+
+    scheduler.reset_pending = False
+
+
+def app_activated(*args):
+    """Run when the app window is shown."""
+    scheduler.on_activated()
+
+
+def app_dismissed(*args):
+    """Run when the app window is hidden."""
+    scheduler.on_dismissed()
 
 
 def app_render(deltaT):
@@ -198,11 +816,42 @@ def app_render(deltaT):
         deltaT (float): Time delta since last tick in seconds.
             Assetto Corsa passes this argument automatically.
     """
-    app_window.render(deltaT)
+    if streamer is not None:
+        # Drawn by the out-of-process viewer
+        return
+    if governor is not None:
+        start = time.perf_counter()
+    if profiler is None:
+        app_window.render(deltaT)
+    else:
+        profiler.call("app_render", app_window.render, deltaT)
+        profiler.update_overlay(deltaT)
+    if governor is not None:
+        governor.add_frame(time.perf_counter() - start)
 
 
 def acShutdown():
     """Run on shutdown of Assetto Corsa"""
+    # Write profiler results to the log
+    if profiler is not None:
+        ac.log("{app_name} - Profiler:\n{summary}".format(
+            app_name=cfg.app_name, summary=profiler.summary()))
+
+    # Send remaining samples to the viewer
+    if streamer is not None:
+        streamer.close()
+        if streamer.datagrams_dropped:
+            ac.log("{app_name} - Streamer dropped {dropped} of {total} datagrams".format(
+                app_name=cfg.app_name, dropped=streamer.datagrams_dropped,
+                total=streamer.datagrams_sent + streamer.datagrams_dropped))
+
+    # Write remaining telemetry to disk
+    if recorder is not None:
+        recorder.close()
+        if recorder.rows_dropped:
+            ac.log("{app_name} - Recorder dropped {rows} of {total} samples".format(
+                app_name=cfg.app_name, rows=recorder.rows_dropped, total=recorder.rows_recorded))
+
     # Update config if necessary
     if cfg.update_cfg:
         cfg.save()
\ No newline at end of file
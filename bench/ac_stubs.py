@@ -0,0 +1,304 @@
+"""Headless stand-ins for the Assetto Corsa Python API.
+
+Installs fake `ac`, `acsys` and `lib.sim_info` modules into sys.modules,
+so the Traces app can be imported and driven outside of Assetto Corsa.
+The `ac` stub counts calls to every function and optionally times the
+GL and text calls, which are the expensive ones inside the game.
+"""
+import math
+import os
+import sys
+import time
+import types
+
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       os.pardir, "apps", "python", "traces")
+APP_DIR = os.path.normpath(APP_DIR)
+
+# Calls that are timed when timing is enabled.
+TIMED_CALLS = ("glBegin", "glVertex2f", "glEnd", "glColor4f", "setText")
+
+# Steering lock of the synthetic car in degrees, used to normalize
+# steering input in the shared memory physics page.
+STEERING_LOCK = 450.0
+
+
+class CS:
+    """Subset of acsys.CS used by the app."""
+    SpeedMS = 0
+    SpeedMPH = 1
+    SpeedKMH = 2
+    Gas = 3
+    Brake = 4
+    Clutch = 5
+    Gear = 6
+    Steer = 7
+    LastFF = 8
+
+
+class GL:
+    """acsys.GL primitive types, as exposed by Assetto Corsa."""
+    Lines = 0
+    LineStrip = 1
+    Triangles = 2
+    Quads = 3
+
+
+class SyntheticDriver:
+    """Synthetic pedal and steering signals as a function of sim time.
+
+    Throttle and brake alternate like a straight followed by a braking zone,
+    with a short brake stab and a clutch kick on each gear change.
+
+    Args:
+        lap_time (float): Length of one synthetic lap in seconds.
+    """
+    def __init__(self, lap_time=20.0):
+        self.lap_time = lap_time
+        self.time = 0.0
+
+    def advance(self, dt):
+        self.time += dt
+
+    def state(self):
+        """Return dict with current driver inputs and car state."""
+        phase = (self.time % self.lap_time) / self.lap_time
+        wave = math.sin(2 * math.pi * 3 * phase)
+        throttle = min(1.0, max(0.0, 0.2 + wave))
+        brake = min(1.0, max(0.0, -wave - 0.3))
+        # Short brake stab between two regular samples
+        if 0.5 < (self.time % 3.1) < 0.53:
+            brake = 0.8
+        clutch = 1.0 if (self.time % 4.0) > 0.15 else 0.0
+        steer = 240 * math.sin(2 * math.pi * 5 * phase) * (0.5 + 0.5 * math.cos(self.time))
+        speed = 60 + 180 * (0.5 + 0.5 * math.sin(2 * math.pi * phase))
+        gear = 2 + int(speed // 45)
+        return {
+            CS.Gas: throttle,
+            CS.Brake: brake,
+            CS.Clutch: clutch,
+            CS.Steer: steer,
+            CS.LastFF: 0.6 + 0.5 * abs(wave),
+            CS.Gear: gear,
+            CS.SpeedKMH: speed,
+            CS.SpeedMPH: speed * 0.621371,
+            CS.SpeedMS: speed / 3.6,
+        }
+
+    def lap_state(self):
+        """Return normalized position, completed laps, last and best lap time in ms."""
+        laps = int(self.time // self.lap_time)
+        lap_ms = int(self.lap_time * 1000) if laps else 0
+        return (self.time % self.lap_time) / self.lap_time, laps, lap_ms, lap_ms
+
+
+class ReplayDriver:
+    """Driver inputs played back from a recorded telemetry file.
+
+    Playback restarts from the beginning at the end of the recording.
+
+    Args:
+        path (str): Path to a file written by the app's telemetry recorder.
+    """
+    def __init__(self, path):
+        if APP_DIR not in sys.path:
+            sys.path.insert(0, APP_DIR)
+        from telemetry_reader import TelemetryReader, ReplaySource
+        self.reader = TelemetryReader(path)
+        if not len(self.reader):
+            raise ValueError("{} holds no recorded rows".format(path))
+        self.source = ReplaySource(self.reader, CS)
+
+    def advance(self, dt):
+        if self.source.row >= len(self.reader) - 1:
+            self.source.seek_time(0)
+        self.source.advance(dt)
+
+    def state(self):
+        """Return dict with current driver inputs and car state."""
+        state = dict(self.source.state)
+        state[CS.SpeedMS] = state[CS.SpeedKMH] / 3.6
+        return state
+
+    def lap_state(self):
+        """Return normalized position, completed laps, last and best lap time in ms."""
+        graphics = self.source.graphics
+        return graphics.normalizedCarPosition, graphics.completedLaps, 0, 0
+
+
+class FakeAC:
+    """Recording implementation of the `ac` module.
+
+    Args:
+        driver (obj:SyntheticDriver): Source of car state values.
+        time_calls (bool): Measure time spent in GL and setText calls.
+    """
+    def __init__(self, driver, time_calls=False):
+        self.driver = driver
+        self.time_calls = time_calls
+        self.counts = {}
+        self.call_time = {}
+        self.render_callbacks = []
+        self.activated_callbacks = []
+        self.dismissed_callbacks = []
+        self.log_lines = []
+        self.focused_car = 0
+        self._next_id = 0
+        self._state = driver.state()
+
+    def refresh(self):
+        """Re-evaluate synthetic driver state, once per physics tick.
+
+        The shared memory physics page is filled with the same state.
+        """
+        self._state = self.driver.state()
+        sim_info = getattr(self, "sim_info", None)
+        if sim_info is not None:
+            fill_pages(sim_info.info, self._state, self.driver.lap_state())
+
+    def reset_counts(self):
+        self.counts.clear()
+        self.call_time.clear()
+
+    def module(self):
+        """Build a module object exposing the fake API."""
+        mod = types.ModuleType("ac")
+        fake = self
+
+        def counted(name, func):
+            def wrapper(*args):
+                fake.counts[name] = fake.counts.get(name, 0) + 1
+                return func(*args)
+
+            def timed(*args):
+                fake.counts[name] = fake.counts.get(name, 0) + 1
+                start = time.perf_counter()
+                result = func(*args)
+                fake.call_time[name] = fake.call_time.get(name, 0.0) + time.perf_counter() - start
+                return result
+            if fake.time_calls and name in TIMED_CALLS:
+                return timed
+            return wrapper
+
+        def noop(*args):
+            return 1
+
+        def new_id(*args):
+            fake._next_id += 1
+            return fake._next_id
+
+        def get_car_state(car_id, info, *args):
+            return fake._state.get(info, 0)
+
+        def get_focused_car():
+            return fake.focused_car
+
+        def add_render_callback(window_id, callback):
+            fake.render_callbacks.append(callback)
+            return 1
+
+        def add_on_app_activated(window_id, callback):
+            fake.activated_callbacks.append(callback)
+            return 1
+
+        def add_on_app_dismissed(window_id, callback):
+            fake.dismissed_callbacks.append(callback)
+            return 1
+
+        def log(message):
+            fake.log_lines.append(message)
+            return 1
+
+        special = {
+            "newApp": new_id,
+            "addLabel": new_id,
+            "getCarState": get_car_state,
+            "getFocusedCar": get_focused_car,
+            "addRenderCallback": add_render_callback,
+            "addOnAppActivatedListener": add_on_app_activated,
+            "addOnAppDismissedListener": add_on_app_dismissed,
+            "log": log,
+            "console": log,
+        }
+        for name, func in special.items():
+            setattr(mod, name, counted(name, func))
+
+        # Everything else (window setup, labels, GL drawing) is a counted no-op.
+        def module_getattr(name):
+            if name.startswith("__"):
+                raise AttributeError(name)
+            func = counted(name, noop)
+            setattr(mod, name, func)
+            return func
+        mod.__getattr__ = module_getattr
+        return mod
+
+
+def fill_pages(pages, state, lap_state):
+    """Write driver state into shared memory pages, like the sim does.
+
+    Args:
+        pages (obj:SimInfo): Pages to write, e.g. lib.sim_info.info.
+        state (dict): Driver inputs and car state by acsys.CS identifier.
+        lap_state (tuple): Normalized position, completed laps,
+            last and best lap time in ms.
+    """
+    physics = pages.physics
+    physics.packetId += 1
+    physics.gas = state[CS.Gas]
+    physics.brake = state[CS.Brake]
+    physics.clutch = state[CS.Clutch]
+    physics.steerAngle = state[CS.Steer] / STEERING_LOCK
+    physics.speedKmh = state[CS.SpeedKMH]
+    physics.gear = state[CS.Gear]
+    physics.finalFF = state[CS.LastFF]
+
+    graphics = pages.graphics
+    (graphics.normalizedCarPosition, graphics.completedLaps,
+     graphics.iLastTime, graphics.iBestTime) = lap_state
+
+
+def _load_sim_info():
+    """Import a fresh copy of the real lib.sim_info.
+
+    Outside of Windows, its pages are anonymous memory instead of the
+    named mappings of the sim.
+    """
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    sys.modules.pop("lib.sim_info", None)
+    import lib.sim_info as sim_info
+    return sim_info
+
+
+def install(driver=None, time_calls=False, cars=1):
+    """Install fake `ac`, `acsys` and `lib.sim_info` modules.
+
+    Args:
+        driver (obj:SyntheticDriver): Source of car state values.
+            Optional, defaults to a new SyntheticDriver.
+        time_calls (bool): Measure time spent in GL and setText calls.
+        cars (int): Number of cars in the session, all driven by the driver.
+
+    Returns:
+        obj:FakeAC: The recording fake, with access to counters and callbacks.
+    """
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    fake = FakeAC(driver or SyntheticDriver(), time_calls)
+    sys.modules["ac"] = fake.module()
+
+    acsys = types.ModuleType("acsys")
+    acsys.CS = CS
+    acsys.GL = GL
+    sys.modules["acsys"] = acsys
+
+    sim_info = _load_sim_info()
+    sim_info.info.graphics.status = sim_info.AC_LIVE
+    sim_info.info.graphics.replayTimeMultiplier = 1.0
+    sim_info.info.static.numCars = cars
+    fake.sim_info = sim_info
+    fake.refresh()
+    return fake
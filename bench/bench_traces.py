@@ -0,0 +1,281 @@
+"""Headless benchmark of the Traces app callbacks.
+
+Drives acMain, acUpdate and the render callback of the app with synthetic
+driver inputs, at 333 Hz physics and a configurable set of render rates,
+using the stub modules from ac_stubs. For every configuration in the sweep
+it reports per-callback latency percentiles and GL call counts per frame.
+
+Usage:
+    python bench/bench_traces.py [--full] [--seconds 2] [--render-rates 60,144,240]
+                                 [--replay recording.trc] [--pages]
+"""
+import argparse
+import configparser
+import itertools
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ac_stubs
+
+PHYSICS_RATE = 333
+# Seconds to wait for the page writer to create its page files
+PAGES_TIMEOUT = 10
+TOGGLES = ("display_throttle", "display_brake", "display_clutch", "display_steering")
+SWEPT = (("TRACES", "trace_time_window"),
+         ("TRACES", "trace_sample_rate"),
+         ("GENERAL", "app_height"))
+
+
+def option_range(defaults, section, option):
+    """Return (minimum, default, maximum) of an option in config_defaults.ini.
+
+    The range is parsed from the Content Manager description,
+    e.g. "from 4 seconds to 10 seconds".
+    """
+    raw = defaults.get(section, option, raw=True)
+    value, _, comment = raw.partition(";")
+    numbers = re.findall(r"from\s+([\d.]+).*?to\s+([\d.]+)", comment)
+    default = int(float(value))
+    if not numbers:
+        return default, default, default
+    low, high = numbers[0]
+    return int(float(low)), default, int(float(high))
+
+
+def sweep_values(defaults, full):
+    """Return dict of option name to the list of values to sweep."""
+    values = {}
+    for section, option in SWEPT:
+        low, default, high = option_range(defaults, section, option)
+        if full:
+            step = 50 if option == "app_height" else 1
+            values[option] = list(range(low, high + 1, step))
+        else:
+            values[option] = sorted({low, default, high})
+    return values
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def fresh_app_modules():
+    """Drop app modules from sys.modules so every run starts from scratch."""
+    for name in list(sys.modules):
+        module = sys.modules[name]
+        path = getattr(module, "__file__", None) or ""
+        if name == "lib.sim_info" or name.startswith("ac_stubs"):
+            continue
+        if os.path.normpath(os.path.dirname(path)) == ac_stubs.APP_DIR:
+            del sys.modules[name]
+
+
+def run_case(options, render_rate, seconds, time_calls, workdir, replay=None, cars=1,
+             pages=None):
+    """Run the app for a number of simulated seconds with given config options.
+
+    Args:
+        options (dict): (section, option) -> value, written to config.ini.
+        render_rate (int): Render callbacks per simulated second.
+        seconds (float): Simulated time.
+        time_calls (bool): Time GL and setText calls in the stub.
+        workdir (str): Directory to hold the temporary config.ini.
+        replay (str): Recorded telemetry file to drive inputs from.
+            Optional, defaults to the synthetic driver.
+        cars (int): Number of cars in the session. Optional, defaults to 1.
+        pages (str): Directory of page files filled by a page_writer process,
+            read through the app's file telemetry source.
+            Optional, defaults to the stand-in shared memory pages.
+
+    Returns:
+        dict: Latency samples and call counts of the run.
+    """
+    driver = ac_stubs.ReplayDriver(replay) if replay else None
+    fake = ac_stubs.install(driver, time_calls=time_calls, cars=cars)
+    fresh_app_modules()
+
+    cfg_path = os.path.join(workdir, "config.ini")
+    parser = configparser.ConfigParser()
+    if pages:
+        options = dict(options)
+        options[("GENERAL", "telemetry_source")] = "file"
+    for (section, option), value in options.items():
+        if not parser.has_section(section):
+            parser.add_section(section)
+        parser.set(section, option, str(value))
+    with open(cfg_path, "w") as cfgfile:
+        parser.write(cfgfile)
+
+    import config_handler
+
+    class BenchConfig(config_handler.Config):
+        """Config reading from the temporary config.ini."""
+        def load(self):
+            self.cfg_file_path = cfg_path
+            if pages:
+                self.telemetry_dir = pages
+            config_handler.Config.load(self)
+
+    import traces
+    traces.Config = BenchConfig
+    traces.acMain("bench")
+    render = fake.render_callbacks[0]
+
+    dt_physics = 1.0 / PHYSICS_RATE
+    dt_render = 1.0 / render_rate
+    next_physics = 0.0
+    next_render = 0.0
+    update_times = []
+    render_times = []
+    frame_counts = []
+    fake.reset_counts()
+
+    perf_counter = time.perf_counter
+    while min(next_physics, next_render) < seconds:
+        if next_physics <= next_render:
+            fake.driver.advance(dt_physics)
+            fake.refresh()
+            start = perf_counter()
+            traces.acUpdate(dt_physics)
+            update_times.append(perf_counter() - start)
+            next_physics += dt_physics
+        else:
+            before = fake.counts.get("glVertex2f", 0), fake.counts.get("glBegin", 0)
+            start = perf_counter()
+            render(dt_render)
+            render_times.append(perf_counter() - start)
+            frame_counts.append((fake.counts.get("glVertex2f", 0) - before[0],
+                                 fake.counts.get("glBegin", 0) - before[1]))
+            next_render += dt_render
+
+    traces.acShutdown()
+    return {
+        "update": sorted(update_times),
+        "render": sorted(render_times),
+        "frames": frame_counts,
+        "counts": dict(fake.counts),
+        "call_time": dict(fake.call_time),
+        "errors": [line for line in fake.log_lines if "Error" in line],
+    }
+
+
+def format_row(columns):
+    return " ".join(str(column).rjust(width) for column, width in columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--full", action="store_true",
+                        help="sweep every value in the configurable ranges, "
+                             "instead of minimum, default and maximum")
+    parser.add_argument("--seconds", type=float, default=2.0,
+                        help="simulated seconds per configuration")
+    parser.add_argument("--render-rates", default="60,144,240",
+                        help="comma separated render rates in Hz")
+    parser.add_argument("--time-calls", action="store_true",
+                        help="time GL and setText calls inside the stub")
+    parser.add_argument("--limit", type=int, default=0,
+                        help="stop after this many configurations")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="drive inputs from a recorded telemetry file "
+                             "instead of the synthetic driver")
+    parser.add_argument("--cars", type=int, default=1,
+                        help="number of cars in the session")
+    parser.add_argument("--pages", action="store_true",
+                        help="read inputs from page files filled at 333 Hz "
+                             "by a page_writer process")
+    args = parser.parse_args(argv)
+
+    defaults = configparser.ConfigParser(inline_comment_prefixes=None)
+    defaults.read(os.path.join(ac_stubs.APP_DIR, "config_defaults.ini"))
+    values = sweep_values(defaults, args.full)
+    render_rates = [int(rate) for rate in args.render_rates.split(",")]
+
+    header = [("window", 6), ("rate", 4), ("height", 6), ("TBCS", 4), ("fps", 4),
+              ("upd_p50", 8), ("upd_p99", 8), ("upd_max", 8),
+              ("rnd_p50", 8), ("rnd_p99", 8), ("rnd_max", 8),
+              ("vtx/frm", 8), ("begin/frm", 9), ("text/s", 7)]
+    print("Latencies in microseconds. TBCS: throttle, brake, clutch, steering toggles.")
+    print(format_row([(name, width) for name, width in header]))
+
+    workdir = tempfile.mkdtemp(prefix="traces_bench_")
+    runs = 0
+    writer = None
+    pages = None
+    if args.pages:
+        pages = os.path.join(workdir, "pages")
+        writer = subprocess.Popen([sys.executable,
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                "page_writer.py"),
+                                   pages, "--rate", str(PHYSICS_RATE)])
+    try:
+        # Give the writer time to create the page files
+        deadline = time.monotonic() + PAGES_TIMEOUT
+        while writer is not None and not os.path.exists(os.path.join(pages, "acpmf_static")):
+            if writer.poll() is not None:
+                sys.exit("page_writer exited with code {}".format(writer.returncode))
+            if time.monotonic() > deadline:
+                sys.exit("page_writer created no page files within {} s".format(PAGES_TIMEOUT))
+            time.sleep(0.05)
+
+        cases = itertools.product(values["trace_time_window"],
+                                  values["trace_sample_rate"],
+                                  values["app_height"],
+                                  itertools.product((True, False), repeat=len(TOGGLES)),
+                                  render_rates)
+        for window, rate, height, toggles, render_rate in cases:
+            options = {
+                ("TRACES", "trace_time_window"): window,
+                ("TRACES", "trace_sample_rate"): rate,
+                ("GENERAL", "app_height"): height,
+            }
+            for toggle, enabled in zip(TOGGLES, toggles):
+                options[("TRACES", toggle)] = enabled
+
+            result = run_case(options, render_rate, args.seconds, args.time_calls, workdir,
+                              args.replay, args.cars, pages)
+            frames = result["frames"] or [(0, 0)]
+            us = 1e6
+            row = [
+                (window, 6), (rate, 4), (height, 6),
+                ("".join("1" if t else "0" for t in toggles), 4), (render_rate, 4),
+                ("{:.1f}".format(percentile(result["update"], 0.5) * us), 8),
+                ("{:.1f}".format(percentile(result["update"], 0.99) * us), 8),
+                ("{:.1f}".format(percentile(result["update"], 1.0) * us), 8),
+                ("{:.1f}".format(percentile(result["render"], 0.5) * us), 8),
+                ("{:.1f}".format(percentile(result["render"], 0.99) * us), 8),
+                ("{:.1f}".format(percentile(result["render"], 1.0) * us), 8),
+                ("{:.0f}".format(sum(f[0] for f in frames) / len(frames)), 8),
+                ("{:.0f}".format(sum(f[1] for f in frames) / len(frames)), 9),
+                ("{:.1f}".format(result["counts"].get("setText", 0) / args.seconds), 7),
+            ]
+            print(format_row(row))
+            if args.time_calls:
+                print("    stub call time (us): " + ", ".join(
+                    "{}={:.0f}".format(name, seconds * us)
+                    for name, seconds in sorted(result["call_time"].items())))
+            for error in result["errors"]:
+                print("    " + error.replace("\n", " "))
+
+            runs += 1
+            if args.limit and runs >= args.limit:
+                break
+    finally:
+        if writer is not None:
+            writer.terminate()
+            writer.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
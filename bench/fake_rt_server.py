@@ -0,0 +1,194 @@
+"""Fake remote telemetry server of Assetto Corsa.
+
+Answers the handshake of remote telemetry clients and streams RTCarInfo
+packets to subscribers, either replayed from packets recorded by the
+viewer, or built from the synthetic driver or a telemetry recording of
+the app. Packets can be dropped and reordered at random, to exercise
+the loss and reordering handling of the client.
+
+Usage:
+    python bench/fake_rt_server.py [--packets FILE | --replay FILE.trc]
+                                   [--rate 333] [--loss 0.05] [--reorder 0.05]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, os.pardir, "viewer"))
+
+import ac_stubs
+from ac_stubs import CS
+from remote_telemetry import PORT, HANDSHAKE, SUBSCRIBE_UPDATE, DISMISS
+from remote_telemetry import HANDSHAKER, HANDSHAKER_RESPONSE, CAR_INFO
+from remote_telemetry import read_records
+
+
+def _wstring(text):
+    return text.encode("utf-16-le")[:100]
+
+
+def encode_car_info(state, lap_time, last_lap, best_lap, lap_count, position):
+    """Build an RTCarInfo packet from a driver state dict."""
+    speed = state[CS.SpeedKMH]
+    wheels = [0.0] * 56
+    return CAR_INFO.pack(b"a", CAR_INFO.size, speed, speed * 0.621371, speed / 3.6,
+                         False, False, False, False, False, False,
+                         0.0, 0.0, 0.0,
+                         lap_time, last_lap, best_lap, lap_count,
+                         state[CS.Gas], state[CS.Brake], state[CS.Clutch], 0.0,
+                         state[CS.Steer], state[CS.Gear], 0.0,
+                         *(wheels + [position, 0.0, 0.0, 0.0, 0.0]))
+
+
+class DriverPackets:
+    """Packets built from a driver at a fixed rate, with lap timing.
+
+    Args:
+        driver (obj:SyntheticDriver): Source of car state values.
+        rate (float): Packets per second.
+    """
+    def __init__(self, driver, rate):
+        self.driver = driver
+        self.period = 1.0 / rate
+        self.time = 0.0
+        self.laps = None
+        self.lap_start = 0.0
+        self.last_lap = 0
+        self.best_lap = 0
+
+    def __iter__(self):
+        while True:
+            self.driver.advance(self.period)
+            self.time += self.period
+            position, laps = self.driver.lap_state()[:2]
+            if self.laps is not None and laps == self.laps + 1:
+                self.last_lap = int((self.time - self.lap_start) * 1000)
+                self.best_lap = min(self.best_lap or self.last_lap, self.last_lap)
+                self.lap_start = self.time
+            self.laps = laps
+            lap_time = int((self.time - self.lap_start) * 1000)
+            yield self.period, encode_car_info(self.driver.state(), lap_time, self.last_lap,
+                                               self.best_lap, laps, position)
+
+
+class RecordedPackets:
+    """Packets recorded by the viewer, replayed with their original timing, looping."""
+    def __init__(self, path):
+        self.records = list(read_records(path))
+        if not self.records:
+            raise ValueError("{} holds no recorded packets".format(path))
+
+    def __iter__(self):
+        while True:
+            previous = self.records[0][0]
+            for arrival, data in self.records:
+                yield max(0.0, arrival - previous), data
+                previous = arrival
+
+
+class FakeServer(asyncio.DatagramProtocol):
+    """Remote telemetry server streaming packets to its subscribers.
+
+    Args:
+        packets (iterable): (delay in seconds, packet) pairs.
+        loss (float): Fraction of packets dropped.
+        reorder (float): Fraction of packets held back and sent after the next.
+        seed (int): Seed of the random impairments.
+    """
+    def __init__(self, packets, loss=0.0, reorder=0.0, seed=1):
+        self.packets = packets
+        self.loss = loss
+        self.reorder = reorder
+        self.random = random.Random(seed)
+        self.transport = None
+        self.subscribers = set()
+        self.task = None
+        self.sent = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) != HANDSHAKER.size:
+            return
+        operation = HANDSHAKER.unpack(data)[2]
+        if operation == HANDSHAKE:
+            self.transport.sendto(HANDSHAKER_RESPONSE.pack(
+                _wstring("bench_car"), _wstring("Bench Driver"), 1, 1,
+                _wstring("bench_track"), _wstring("")), addr)
+        elif operation == SUBSCRIBE_UPDATE:
+            self.subscribers.add(addr)
+            if self.task is None:
+                self.task = asyncio.ensure_future(self.stream())
+        elif operation == DISMISS:
+            self.subscribers.discard(addr)
+
+    async def stream(self):
+        """Send packets to all subscribers, with the timing of the source."""
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        held = None
+        for delay, data in self.packets:
+            next_time += delay
+            wait = next_time - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if self.random.random() < self.loss:
+                continue
+            if held is None and self.random.random() < self.reorder:
+                held = data
+                continue
+            for addr in list(self.subscribers):
+                self.transport.sendto(data, addr)
+                if held is not None:
+                    self.transport.sendto(held, addr)
+            held = None
+            self.sent += 1
+
+
+async def serve(server, host="127.0.0.1", port=PORT):
+    """Start the server, returns the transport."""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=(host, port))
+    return transport
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--packets", metavar="FILE",
+                        help="replay packets recorded by the viewer")
+    source.add_argument("--replay", metavar="FILE",
+                        help="build packets from a telemetry recording of the app")
+    parser.add_argument("--rate", type=float, default=333,
+                        help="packets per second, unless replaying recorded packets")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--loss", type=float, default=0.0,
+                        help="fraction of packets to drop")
+    parser.add_argument("--reorder", type=float, default=0.0,
+                        help="fraction of packets to send after the next one")
+    args = parser.parse_args(argv)
+
+    if args.packets:
+        packets = RecordedPackets(args.packets)
+    else:
+        driver = ac_stubs.ReplayDriver(args.replay) if args.replay else ac_stubs.SyntheticDriver()
+        packets = DriverPackets(driver, args.rate)
+    server = FakeServer(packets, args.loss, args.reorder)
+
+    async def run():
+        await serve(server, port=args.port)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Fill file-backed shared memory pages with synthetic telemetry.
+
+Stands in for the sim writing its shared memory pages, so the app's
+telemetry source "file" can be load tested outside of Assetto Corsa.
+The pages are laid out like the named mappings of the sim, using the
+struct definitions of lib.sim_info, and the physics page is written at
+the physics rate of the sim.
+
+Usage:
+    python bench/page_writer.py DIR [--rate 333] [--seconds 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ac_stubs
+
+sys.path.insert(0, ac_stubs.APP_DIR)
+
+from lib.sim_info import SimInfo, AC_LIVE
+
+
+class PageWriter:
+    """Writes the state of a driver into page files at a fixed rate.
+
+    Args:
+        directory (str): Directory of the page files, created if missing.
+        driver (obj:SyntheticDriver): Source of car state values.
+            Optional, defaults to a new SyntheticDriver.
+    """
+    def __init__(self, directory, driver=None):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.pages = SimInfo(directory)
+        self.driver = driver or ac_stubs.SyntheticDriver()
+        self.pages.graphics.status = AC_LIVE
+        self.pages.graphics.replayTimeMultiplier = 1.0
+        self.pages.static.numCars = 1
+        self.writes = 0
+
+    def write(self, dt):
+        """Advance the driver and write one physics tick."""
+        self.driver.advance(dt)
+        ac_stubs.fill_pages(self.pages, self.driver.state(), self.driver.lap_state())
+        self.writes += 1
+
+    def run(self, rate, seconds=0):
+        """Write at a rate in Hz, for a number of seconds or until interrupted.
+
+        Ticks are scheduled on wall-clock time. When the writer falls
+        behind, it writes the current time right away, like the sim
+        skipping frames, instead of catching up.
+        """
+        period = 1.0 / rate
+        start = time.perf_counter()
+        last = start
+        next_tick = start
+        while not seconds or last - start < seconds:
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                now = time.perf_counter()
+            self.write(now - last)
+            last = now
+            next_tick = max(next_tick + period, now)
+
+    def close(self):
+        self.pages.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("directory", help="directory of the page files")
+    parser.add_argument("--rate", type=float, default=333,
+                        help="physics page writes per second")
+    parser.add_argument("--seconds", type=float, default=0,
+                        help="stop after this many seconds, 0 runs until interrupted")
+    args = parser.parse_args(argv)
+
+    writer = PageWriter(args.directory)
+    start = time.perf_counter()
+    try:
+        writer.run(args.rate, args.seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        elapsed = time.perf_counter() - start
+        print("{} writes in {:.1f} s, {:.0f} Hz".format(
+            writer.writes, elapsed, writer.writes / elapsed if elapsed else 0))
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
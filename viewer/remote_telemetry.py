@@ -0,0 +1,258 @@
+"""Client of Assetto Corsa's UDP remote telemetry protocol.
+
+The client sends a handshake to the remote telemetry server of the sim,
+subscribes to car updates, and decodes every RTCarInfo packet into the
+channels of the app's ACCarData. Packets carry no sequence number, so
+the current lap time and lap count serve as timestamp: late and
+duplicate packets are dropped, and the time between accepted packets is
+passed on, so that gaps left by lost packets are spanned by the trace
+time grid.
+
+Needs asyncio and async/await, which are not available in the Python
+of Assetto Corsa, so the client runs outside of the game, e.g. in the
+viewer.
+"""
+import asyncio
+import math
+import struct
+
+PORT = 9996
+
+# Handshake operations
+HANDSHAKE = 0
+SUBSCRIBE_UPDATE = 1
+SUBSCRIBE_SPOT = 2
+DISMISS = 3
+
+# identifier, version, operation
+HANDSHAKER = struct.Struct("<iii")
+# car name, driver name, identifier, version, track name, track config,
+# names are UTF-16 strings of 50 characters
+HANDSHAKER_RESPONSE = struct.Struct("<100s100sii100s100s")
+# RTCarInfo, 328 bytes with the padding of the C struct
+CAR_INFO = struct.Struct("<c3xi3f6?2x3f4i5fif56f2f3f")
+
+# Indices of the fields of RTCarInfo used by the app
+SPEED_KMH = 2
+LAP_TIME = 14
+LAST_LAP = 15
+LAP_COUNT = 17
+GAS = 18
+BRAKE = 19
+CLUTCH = 20
+STEER = 22
+GEAR = 23
+CAR_POSITION = 81
+
+# Packets older than this are taken as a restart of the session, not as
+# reordered packets, in ms
+RESYNC_TIME = 1000
+
+# Recorded packets: arrival time in seconds and packet size, then the packet
+RECORD_HEADER = struct.Struct("<dH")
+
+
+def _wstring(raw):
+    """Decode a fixed size UTF-16 string of the protocol."""
+    return raw.decode("utf-16-le", "ignore").split("\0", 1)[0]
+
+
+def decode_handshake_response(data):
+    """Return dict with car, driver, track and protocol version of the server."""
+    car, driver, identifier, version, track, config = HANDSHAKER_RESPONSE.unpack_from(data)
+    return {
+        "car": _wstring(car),
+        "driver": _wstring(driver),
+        "identifier": identifier,
+        "version": version,
+        "track": _wstring(track),
+        "track_config": _wstring(config),
+    }
+
+
+class CarInfo:
+    """Channels of one RTCarInfo packet, named like those of ACCarData."""
+    def __init__(self):
+        self.throttle = 0
+        self.brake = 0
+        self.clutch = 0
+        self.steering = 0
+        self.ffb = 0
+        self.gear = 0
+        self.speed_kmh = 0
+        self.lap_position = 0
+        self.lap_time = 0
+        self.last_lap = 0
+        self.lap_count = 0
+
+    def decode(self, data):
+        """Decode a packet into the channels.
+
+        Clutch is converted to pedal travel like ACCarData does, steering
+        from degrees to radians. The protocol has no force feedback.
+        """
+        fields = CAR_INFO.unpack_from(data)
+        self.throttle = fields[GAS]
+        self.brake = fields[BRAKE]
+        self.clutch = 1 - fields[CLUTCH]
+        self.steering = fields[STEER] * math.pi / 180
+        self.gear = fields[GEAR]
+        self.speed_kmh = fields[SPEED_KMH]
+        self.lap_position = fields[CAR_POSITION]
+        self.lap_time = fields[LAP_TIME]
+        self.last_lap = fields[LAST_LAP]
+        self.lap_count = fields[LAP_COUNT]
+
+
+class PacketClock:
+    """Orders packets by lap count and lap time.
+
+    Returns the time since the previous accepted packet, or None for
+    packets that are late or duplicates. Lost packets are estimated from
+    gaps of more than one and a half times the shortest interval seen,
+    less the late packets that turn up after all.
+    """
+    def __init__(self):
+        self.lap_count = None
+        self.lap_time = 0
+        self.interval = None
+        self.accepted = 0
+        self.dropped = 0
+        self.lost = 0
+        self.resyncs = 0
+
+    def accept(self, lap_count, lap_time, last_lap):
+        """Return seconds since the previous packet, None to drop the packet.
+
+        Args:
+            lap_count (int): Completed laps.
+            lap_time (int): Current lap time in ms.
+            last_lap (int): Time of the last completed lap in ms.
+        """
+        if self.lap_count is None:
+            delta = 0
+        elif lap_count == self.lap_count:
+            delta = lap_time - self.lap_time
+        elif lap_count == self.lap_count + 1:
+            # Crossed the line, the rest of the previous lap plus the new lap
+            delta = last_lap - self.lap_time + lap_time
+        elif lap_count == self.lap_count - 1 and self.lap_time < RESYNC_TIME:
+            # Sent before crossing the line, arrived after a newer packet
+            delta = -1
+        else:
+            delta = None
+
+        if delta is None or delta < -RESYNC_TIME:
+            # Session restart or jump in time, start over
+            self.resyncs += 1
+            delta = 0
+        elif delta <= 0 and self.lap_count is not None:
+            # Duplicate, or late after a newer packet
+            if delta < 0 and self.lost:
+                # Already counted as lost in the gap it left
+                self.lost -= 1
+            self.dropped += 1
+            return None
+
+        if delta > 0:
+            if self.interval is None or delta < self.interval:
+                self.interval = delta
+            elif delta > 1.5 * self.interval:
+                self.lost += int(round(delta / self.interval)) - 1
+        self.lap_count = lap_count
+        self.lap_time = lap_time
+        self.accepted += 1
+        return delta / 1000
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    """Datagram protocol forwarding packets to the client."""
+    def __init__(self, client):
+        self.client = client
+
+    def connection_made(self, transport):
+        self.client.connection_made(transport)
+
+    def datagram_received(self, data, addr):
+        self.client.datagram_received(data)
+
+    def error_received(self, exc):
+        # E.g. no server listening yet, the handshake is retried
+        pass
+
+
+class RemoteTelemetryClient:
+    """Subscriber to car updates of the remote telemetry server.
+
+    Args:
+        host (str): Host running the sim.
+        port (int): Remote telemetry port. Optional, defaults to 9996.
+        on_sample (callable): Called as on_sample(deltaT, car_info) for
+            every accepted packet, from the event loop.
+        record (file): Binary file to record raw packets to. Optional.
+    """
+    # Seconds between handshake attempts until the server answers
+    retry_interval = 1.0
+
+    def __init__(self, host, port=PORT, on_sample=None, record=None):
+        self.address = (host, port)
+        self.on_sample = on_sample
+        self.record = record
+        self.transport = None
+        self.loop = None
+        self.server_info = None
+        self.car = CarInfo()
+        self.clock = PacketClock()
+
+    async def start(self, loop=None):
+        """Open the socket and start the handshake."""
+        self.loop = loop or asyncio.get_running_loop()
+        await self.loop.create_datagram_endpoint(lambda: _Protocol(self),
+                                                 remote_addr=self.address)
+
+    def send(self, operation):
+        self.transport.sendto(HANDSHAKER.pack(1, 1, operation))
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.handshake()
+
+    def handshake(self):
+        """Send the handshake, and again later until the server answers."""
+        if self.server_info is None and not self.transport.is_closing():
+            self.send(HANDSHAKE)
+            self.loop.call_later(self.retry_interval, self.handshake)
+
+    def datagram_received(self, data):
+        if len(data) == CAR_INFO.size:
+            if self.record is not None:
+                self.record.write(RECORD_HEADER.pack(self.loop.time(), len(data)))
+                self.record.write(data)
+            car = self.car
+            car.decode(data)
+            deltaT = self.clock.accept(car.lap_count, car.lap_time, car.last_lap)
+            if deltaT is not None and self.on_sample is not None:
+                self.on_sample(deltaT, car)
+        elif len(data) == HANDSHAKER_RESPONSE.size and self.server_info is None:
+            self.server_info = decode_handshake_response(data)
+            self.send(SUBSCRIBE_UPDATE)
+
+    def close(self):
+        """Unsubscribe and close the socket."""
+        if self.transport is not None and not self.transport.is_closing():
+            self.send(DISMISS)
+            self.transport.close()
+
+
+def read_records(path):
+    """Yield (arrival time, packet) of a file of recorded packets."""
+    with open(path, "rb") as record:
+        while True:
+            header = record.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            arrival, size = RECORD_HEADER.unpack(header)
+            data = record.read(size)
+            if len(data) < size:
+                return
+            yield arrival, data
@@ -0,0 +1,330 @@
+"""Out-of-process viewer of the Traces app.
+
+Receives the sample stream the app sends in streaming mode (stream=True
+in the app's config.ini), and draws the traces, pedal bars and steering
+wheel with the app's own drawables, in a window of its own, e.g. on a
+second monitor. Layout and trace options are read from the app's config.
+
+With --remote, the viewer instead subscribes to the UDP remote telemetry
+of the sim itself, which needs no app running in game, and captures
+every packet onto the trace time grid like the app does.
+
+Usage:
+    python viewer/traces_viewer.py [--port 9997] [--fps 60]
+    python viewer/traces_viewer.py --remote HOST[:PORT] [--record FILE]
+"""
+import argparse
+import asyncio
+import collections
+import math
+import os
+import socket
+import sys
+import threading
+import time
+import tkinter
+import types
+
+APP_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                        os.pardir, "apps", "python", "traces"))
+
+
+class GL:
+    """acsys.GL primitive types, as exposed by Assetto Corsa."""
+    Lines = 0
+    LineStrip = 1
+    Triangles = 2
+    Quads = 3
+
+
+def install_ac_modules():
+    """Provide the parts of the ac and acsys modules the drawables use.
+
+    The drawables only build vertex batches here, which the viewer draws
+    itself, so no GL calls are needed.
+    """
+    acsys = types.ModuleType("acsys")
+    acsys.GL = GL
+    sys.modules["acsys"] = acsys
+    ac = types.ModuleType("ac")
+    ac.log = print
+    ac.console = print
+    sys.modules["ac"] = ac
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+
+install_ac_modules()
+
+from capture import InputCapture
+from color_palette import Colors
+from config_handler import Config
+from drawables import RingTrace, PedalBar, SteeringWheel
+from stream_protocol import GRID, CLEAR, decode_datagram
+
+from remote_telemetry import PORT as REMOTE_PORT, RemoteTelemetryClient
+
+
+class StreamData:
+    """Stand-in for ACGlobalData, traces only advance on grid samples."""
+    replay_time_multiplier = 1
+
+
+def tk_color(rgba):
+    """Return Tk color of an r,g,b,a tuple, blended over black."""
+    r, g, b, a = rgba
+    return "#{:02x}{:02x}{:02x}".format(int(r * a * 255), int(g * a * 255), int(b * a * 255))
+
+
+class StreamFeed:
+    """Samples of the stream the app sends in streaming mode.
+
+    Args:
+        port (int): UDP port to listen on.
+    """
+    def __init__(self, port):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.socket.bind(("127.0.0.1", port))
+        self.socket.setblocking(False)
+
+        # Stream statistics
+        self.sequence = None
+        self.received = 0
+        self.lost = 0
+        self.rejected = 0
+
+    def poll(self):
+        """Return samples of all datagrams waiting in the socket."""
+        received = []
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return received
+            try:
+                sequence, rate, samples = decode_datagram(data)
+            except ValueError:
+                self.rejected += 1
+                continue
+            if self.sequence is not None:
+                gap = (sequence - self.sequence - 1) & 0xFFFFFFFF
+                if gap >= 0x80000000:
+                    # Late or duplicate datagram, already past it
+                    continue
+                self.lost += gap
+            self.sequence = sequence
+            self.received += 1
+            received.extend(samples)
+
+    def describe(self):
+        return "{} datagrams, {} lost, {} rejected".format(
+            self.received, self.lost, self.rejected)
+
+    def close(self):
+        self.socket.close()
+
+
+class RemoteFeed:
+    """Samples of the remote telemetry of the sim, at the full packet rate.
+
+    The client runs its own asyncio event loop in a background thread and
+    queues every accepted packet. Each frame, the queued packets are
+    recorded into an InputCapture with the time between packets, and the
+    grid samples are passed on like those of the app's stream, followed
+    by the newest packet for the pedal bars and wheel.
+
+    Args:
+        cfg (obj:Config): App configuration.
+        host (str): Host running the sim.
+        port (int): Remote telemetry port.
+        record (file): Binary file to record raw packets to. Optional.
+    """
+    def __init__(self, cfg, host, port=REMOTE_PORT, record=None):
+        self.steering_cap = cfg.trace_steering_cap * math.pi / 180
+        self.capture = InputCapture(4, cfg.trace_sample_rate, cfg.trace_peak_hold)
+        self.packets = collections.deque()
+        self.resyncs = 0
+
+        self.client = RemoteTelemetryClient(host, port, self.on_sample, record)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.run_loop, daemon=True)
+        self.thread.start()
+
+    def run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.client.start(self.loop))
+        self.loop.run_forever()
+
+    def on_sample(self, deltaT, car):
+        """Queue an accepted packet, called from the event loop."""
+        flags = 0
+        if self.client.clock.resyncs != self.resyncs:
+            self.resyncs = self.client.clock.resyncs
+            flags = CLEAR
+        steering_normalized = min(1, max(0, 0.5 - car.steering / (2 * self.steering_cap)))
+        self.packets.append((deltaT, flags, car.clutch, steering_normalized, car.throttle,
+                             car.brake, car.steering, car.ffb, car.speed_kmh, car.gear))
+
+    def poll(self):
+        """Return grid samples of the packets queued since the previous call."""
+        samples = []
+        latest = None
+        capture = self.capture
+        while self.packets:
+            packet = self.packets.popleft()
+            deltaT, flags = packet[0], packet[1]
+            if flags & CLEAR:
+                capture.clear()
+            capture.record(deltaT, packet[2:6])
+            latest = packet
+            sample = capture.resample()
+            while sample is not None:
+                samples.append((GRID | flags,) + tuple(sample) + packet[6:])
+                flags = 0
+                sample = capture.resample()
+            if flags:
+                samples.append(packet[1:])
+        if latest is not None:
+            samples.append((0,) + latest[2:])
+        return samples
+
+    def describe(self):
+        clock = self.client.clock
+        return "{} packets, {} lost, {} late".format(clock.accepted, clock.lost, clock.dropped)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.client.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1)
+
+
+class Viewer:
+    """Window drawing the app's drawables from the received sample stream.
+
+    Args:
+        cfg (obj:Config): App configuration.
+        feed (obj:StreamFeed): Source of samples, StreamFeed or RemoteFeed.
+    """
+    def __init__(self, cfg, feed):
+        self.cfg = cfg
+        self.feed = feed
+
+        self.root = tkinter.Tk()
+        self.root.title("Traces")
+        self.canvas = tkinter.Canvas(self.root, width=self.cfg.app_width,
+                                     height=self.cfg.app_height,
+                                     background="black", highlightthickness=0)
+        self.canvas.pack()
+
+        # Same drawables and layout as the app window
+        data = StreamData()
+        self.traces = [
+            RingTrace(self.cfg, data, Colors.blue) if self.cfg.display_clutch else None,
+            RingTrace(self.cfg, data, Colors.light_grey) if self.cfg.display_steering else None,
+            RingTrace(self.cfg, data, Colors.green) if self.cfg.display_throttle else None,
+            RingTrace(self.cfg, data, Colors.red) if self.cfg.display_brake else None,
+        ]
+        self.throttle_bar = PedalBar(self.cfg, 1555, Colors.green)
+        self.brake_bar = PedalBar(self.cfg, 1480, Colors.red)
+        self.clutch_bar = PedalBar(self.cfg, 1405, Colors.blue)
+        self.ffb_bar = PedalBar(self.cfg, 1630, Colors.grey)
+        self.wheel = SteeringWheel(self.cfg, Colors.yellow)
+        self.drawables = [trace for trace in self.traces if trace is not None]
+        self.drawables += [self.throttle_bar, self.brake_bar, self.clutch_bar,
+                           self.ffb_bar, self.wheel]
+        self.versions = [None] * len(self.drawables)
+        self.stats_time = time.perf_counter()
+
+    def receive(self):
+        """Apply all samples the feed received since the previous frame."""
+        for sample in self.feed.poll():
+            self.apply(sample)
+
+    def apply(self, sample):
+        """Update the drawables with one received sample."""
+        (flags, clutch, steering_normalized, throttle, brake,
+         steering, ffb, speed_kmh, gear) = sample
+        if flags & CLEAR:
+            for trace in self.traces:
+                if trace is not None:
+                    trace.clear()
+        if flags & GRID:
+            for trace, value in zip(self.traces, (clutch, steering_normalized, throttle, brake)):
+                if trace is not None:
+                    trace.update(value)
+        self.throttle_bar.update(throttle)
+        self.brake_bar.update(brake)
+        self.clutch_bar.update(clutch)
+        self.ffb_bar.color = Colors.grey if ffb < 1 else Colors.red
+        self.ffb_bar.update(min(1, ffb))
+        self.wheel.update(steering)
+
+    def draw(self):
+        """Redraw the drawables that changed since the previous frame."""
+        canvas = self.canvas
+        changed = False
+        for i, drawable in enumerate(self.drawables):
+            if drawable.version == self.versions[i]:
+                continue
+            self.versions[i] = drawable.version
+            changed = True
+            tag = "d{}".format(i)
+            canvas.delete(tag)
+            batch = drawable.fill_batch()
+            vertices = list(batch.vertices)
+            color = tk_color(batch.color)
+            for j in range(0, len(vertices), 8):
+                canvas.create_polygon(vertices[j:j + 8], fill=color, outline="", tags=tag)
+        if changed:
+            # Keep the stacking order of the app
+            for i in range(len(self.drawables)):
+                canvas.tag_raise("d{}".format(i))
+
+    def tick(self, period_ms):
+        """Receive, draw and schedule the next frame."""
+        self.receive()
+        self.draw()
+        now = time.perf_counter()
+        if now - self.stats_time > 1:
+            self.stats_time = now
+            self.root.title("Traces - {}".format(self.feed.describe()))
+        self.root.after(period_ms, self.tick, period_ms)
+
+    def run(self, fps):
+        period_ms = max(1, int(1000 / fps))
+        self.root.after(period_ms, self.tick, period_ms)
+        self.root.mainloop()
+        self.feed.close()
+
+
+def main(argv=None):
+    cfg = Config()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=cfg.stream_port,
+                        help="UDP port to listen on, defaults to stream_port of the app")
+    parser.add_argument("--fps", type=float, default=60,
+                        help="redraws per second")
+    parser.add_argument("--remote", metavar="HOST[:PORT]",
+                        help="subscribe to the remote telemetry of the sim instead")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record the raw remote telemetry packets to a file")
+    args = parser.parse_args(argv)
+
+    record = None
+    if args.remote:
+        host, _, port = args.remote.partition(":")
+        if args.record:
+            record = open(args.record, "wb")
+        feed = RemoteFeed(cfg, host, int(port) if port else REMOTE_PORT, record)
+    else:
+        feed = StreamFeed(args.port)
+    try:
+        Viewer(cfg, feed).run(args.fps)
+    finally:
+        if record is not None:
+            record.close()
+
+
+if __name__ == "__main__":
+    main()